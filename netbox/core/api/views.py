@@ -1,3 +1,5 @@
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 from rest_framework.decorators import action
@@ -54,3 +56,22 @@ class JobViewSet(ReadOnlyModelViewSet):
     queryset = Job.objects.all()
     serializer_class = serializers.JobSerializer
     filterset_class = filtersets.JobFilterSet
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk):
+        """
+        Download the file artifact produced by the Job (e.g. a background export).
+        """
+        job = self.get_object()
+
+        if job.user != request.user and not request.user.is_superuser:
+            raise PermissionDenied(_("Only the user who created this job may download its results."))
+        if not job.artifact or not default_storage.exists(job.artifact['path']):
+            raise Http404(_("No file is available for this job."))
+
+        return FileResponse(
+            default_storage.open(job.artifact['path']),
+            as_attachment=True,
+            filename=job.artifact['filename'],
+            content_type='application/gzip'
+        )
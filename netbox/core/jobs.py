@@ -1,13 +1,32 @@
+import gzip
 import logging
+import tempfile
+from datetime import timedelta
 
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from extras.context_managers import deferred_updates, event_tracking
 from netbox.search.backends import search_backend
+from utilities.exceptions import AbortRequest, PermissionsViolation
+from utilities.export import get_export_key, iter_buffered, iter_csv, iter_table_values, iter_yaml
+from utilities.request import NetBoxFakeRequest
+from utilities.views import get_viewname
 from .choices import *
 from .exceptions import SyncError
-from .models import DataSource
+from .models import DataSource, Job
 from rq.timeouts import JobTimeoutException
 
 logger = logging.getLogger(__name__)
 
+EXPORT_ARTIFACT_PATH = 'exports/{job_id}/{filename}.gz'
+
 
 def sync_datasource(job, *args, **kwargs):
     """
@@ -31,3 +50,199 @@ def sync_datasource(job, *args, **kwargs):
             logging.error(e)
         else:
             raise e
+
+
+def export_objects(job, query, filename, content_type, export_key, table=None, exclude_columns=None, template=None,
+                   *args, **kwargs):
+    """
+    Export the objects matched by a query to a gzip-compressed file artifact. Objects are exported as CSV if a table
+    is specified, rendered using an ExportTemplate if one is specified, or otherwise exported as YAML.
+
+    Args:
+        job: The Job tracking the export
+        query: The Query identifying the objects to export
+        filename: The name of the exported file
+        content_type: The MIME type of the exported file
+        export_key: A string identifying identical exports (see get_export_key())
+        table: The Table class used to export objects as CSV
+        exclude_columns: The names of any table columns to be excluded from the export
+        template: The ExportTemplate used to render the objects
+    """
+    try:
+        # Record the export key, by which identical exports are identified while pending or running
+        job.data = {'export_key': export_key}
+        job.start()
+
+        queryset = query.model.objects.all()
+        queryset.query = query
+        if template is not None:
+            chunks = template.iter_render(queryset)
+        elif table is not None:
+            chunks = iter_csv(iter_table_values(table(queryset, user=job.user), exclude_columns))
+        else:
+            chunks = iter_yaml(queryset)
+
+        # Write the compressed output to a temporary file, then save it to the configured storage backend
+        with tempfile.TemporaryFile() as f:
+            with gzip.GzipFile(filename=filename, mode='wb', fileobj=f) as gz:
+                for chunk in iter_buffered(chunks):
+                    gz.write(chunk.encode('utf-8'))
+            size = f.tell()
+            f.seek(0)
+            path = default_storage.save(EXPORT_ARTIFACT_PATH.format(job_id=job.job_id, filename=filename), File(f))
+
+        job.data = {
+            'export_key': export_key,
+            'artifact': {
+                'key': export_key,
+                'path': path,
+                'filename': f'{filename}.gz',
+                'content_type': content_type,
+                'size': size,
+            }
+        }
+        job.terminate()
+
+    except Exception as e:
+        job.terminate(status=JobStatusChoices.STATUS_ERRORED, error=repr(e))
+        raise e
+
+
+def enqueue_export(user, queryset, filename, content_type, table=None, exclude_columns=None, template=None):
+    """
+    Enqueue a Job to export the given QuerySet in the background (see export_objects()). If the user has an identical
+    export pending or running, or has completed one within the past EXPORT_JOB_CACHE_TIMEOUT seconds, its Job is
+    returned instead. Pending or running exports are reused only until they exceed RQ_DEFAULT_TIMEOUT, after which
+    they are presumed to have been lost (e.g. due to a worker crashing).
+
+    Export Jobs are assigned to the Job object type, rather than to that of the exported model or ExportTemplate, such
+    that they do not trigger any job start or end event rules assigned to those object types.
+
+    Returns a two-tuple of the Job and a boolean indicating whether it was newly enqueued.
+    """
+    user = user if user and user.is_authenticated else None
+    export_key = get_export_key(
+        user,
+        queryset,
+        filename,
+        f'{table.__module__}.{table.__qualname__}' if table else None,
+        sorted(exclude_columns or []),
+        (template.pk, str(template.last_updated)) if template else None
+    )
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.EXPORT_JOB_CACHE_TIMEOUT)
+    active_cutoff = now - timedelta(seconds=settings.RQ_DEFAULT_TIMEOUT)
+
+    # Reuse an identical export which is still pending or running (and has not timed out)
+    active_job = Job.objects.filter(
+        Q(status=JobStatusChoices.STATUS_PENDING, created__gte=active_cutoff) |
+        Q(status=JobStatusChoices.STATUS_RUNNING, started__gte=active_cutoff),
+        user=user,
+        created__gte=cutoff,
+        data__export_key=export_key
+    ).order_by('-created').first()
+    if active_job:
+        return active_job, False
+
+    # Reuse the artifact of a recent identical export, if one exists
+    recent_jobs = Job.objects.filter(
+        user=user,
+        status=JobStatusChoices.STATUS_COMPLETED,
+        completed__gte=cutoff,
+        data__export_key=export_key
+    ).order_by('-completed')
+    for job in recent_jobs:
+        if default_storage.exists(job.artifact['path']):
+            return job, False
+
+    job = Job.enqueue(
+        export_objects,
+        instance=Job,
+        name=filename,
+        user=user,
+        query=queryset.query,
+        filename=filename,
+        content_type=content_type,
+        export_key=export_key,
+        table=table,
+        exclude_columns=exclude_columns,
+        template=template
+    )
+
+    # Record the export key on the pending Job (export_objects() also records it when the Job is started)
+    job.data = {'export_key': export_key}
+    Job.objects.filter(pk=job.pk, status=JobStatusChoices.STATUS_PENDING).update(data=job.data)
+
+    return job, True
+
+
+def import_objects(job, view, records, request, headers=None, *args, **kwargs):
+    """
+    Import objects from the given records using a BulkImportView. Records are imported in batches (see
+    BulkImportView.import_records()), each of which is committed in its own transaction, and the Job's data is updated
+    with the progress of the import as each batch is completed. If an invalid record is encountered, the import is
+    stopped and the errors are recorded in the Job's data.
+
+    Args:
+        job: The Job tracking the import
+        view: The BulkImportView class
+        records: A list of dictionaries, each representing an object to be created or updated
+        request: A copy of the request which submitted the import, used for change logging
+        headers: A dictionary mapping CSV headers to any customized to_field_name values
+    """
+    importer = view()
+    importer.queryset = importer.get_queryset(request).restrict(request.user, 'add')
+    model = importer.queryset.model
+
+    try:
+        job.start()
+        job.data = {
+            'total': len(records),
+            'imported': 0,
+            'results_url': f"{reverse(get_viewname(model, action='list'))}?modified_by_request={request.id}",
+        }
+
+        for i in range(0, len(records), importer.batch_size):
+            batch = records[i:i + importer.batch_size]
+            with event_tracking(request):
+                with transaction.atomic(), deferred_updates():
+                    objects = importer.import_records(batch, request, headers=headers, offset=i)
+            job.data['imported'] += len(objects)
+            job.save(update_fields=['data'])
+
+        logger.info(f"Imported {job.data['imported']} {model._meta.verbose_name_plural}")
+        job.terminate()
+
+    except (AbortRequest, PermissionsViolation, ValidationError) as e:
+        job.data['errors'] = e.messages if type(e) is ValidationError else [e.message]
+        job.terminate(status=JobStatusChoices.STATUS_FAILED)
+
+    except Exception as e:
+        job.terminate(status=JobStatusChoices.STATUS_ERRORED, error=repr(e))
+        raise e
+
+
+def enqueue_import(request, view, records, headers=None):
+    """
+    Enqueue a Job to import the given records in the background (see import_objects()). Returns the Job.
+    """
+    model = view.queryset.model
+
+    # Retain only the attributes of the request needed for change logging
+    request = NetBoxFakeRequest({
+        'META': {},
+        'user': request.user,
+        'path': request.path,
+        'id': request.id,
+    })
+
+    return Job.enqueue(
+        import_objects,
+        instance=model,
+        name=f'Import {model._meta.verbose_name_plural}',
+        user=request.user,
+        view=view,
+        records=records,
+        request=request,
+        headers=headers
+    )
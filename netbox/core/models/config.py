@@ -3,6 +3,7 @@ from django.db import models
 from django.urls import reverse
 from django.utils.translation import gettext, gettext_lazy as _
 
+from netbox.config import invalidate_config
 from utilities.querysets import RestrictedQuerySet
 
 __all__ = (
@@ -59,6 +60,7 @@ class ConfigRevision(models.Model):
         """
         cache.set('config', self.data, None)
         cache.set('config_version', self.pk, None)
+        invalidate_config()
     activate.alters_data = True
 
     @property
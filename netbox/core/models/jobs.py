@@ -4,6 +4,7 @@ import django_rq
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.urls import reverse
@@ -150,8 +151,25 @@ class Job(models.Model):
 
         return f"{int(minutes)} minutes, {seconds:.2f} seconds"
 
+    @property
+    def artifact(self):
+        """
+        Return the attributes of the file artifact produced by the job (if any).
+        """
+        if isinstance(self.data, dict):
+            return self.data.get('artifact')
+
+    def delete_artifact(self):
+        """
+        Delete the file artifact produced by the job (if any) from storage.
+        """
+        if self.artifact and default_storage.exists(self.artifact['path']):
+            default_storage.delete(self.artifact['path'])
+    delete_artifact.alters_data = True
+
     def delete(self, *args, **kwargs):
         super().delete(*args, **kwargs)
+        self.delete_artifact()
 
         rq_queue_name = get_config().QUEUE_MAPPINGS.get(self.object_type.model, RQ_QUEUE_DEFAULT)
         queue = django_rq.get_queue(rq_queue_name)
@@ -204,7 +222,8 @@ class Job(models.Model):
 
         Args:
             func: The callable object to be enqueued for execution
-            instance: The NetBox object to which this job pertains
+            instance: The NetBox object (or model, if the job does not pertain to a specific object) to which this job
+                pertains
             name: Name for the job (optional)
             user: The user responsible for running the job
             schedule_at: Schedule the job to be executed at the passed date and time
@@ -216,7 +235,7 @@ class Job(models.Model):
         status = JobStatusChoices.STATUS_SCHEDULED if schedule_at else JobStatusChoices.STATUS_PENDING
         job = Job.objects.create(
             object_type=object_type,
-            object_id=instance.pk,
+            object_id=instance.pk if isinstance(instance, models.Model) else None,
             name=name,
             status=status,
             scheduled=schedule_at,
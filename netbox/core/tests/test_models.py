@@ -1,6 +1,18 @@
-from django.test import TestCase
-
-from core.models import DataSource
+import gzip
+import tempfile
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.choices import JobStatusChoices
+from core.jobs import enqueue_export, export_objects
+from core.models import DataSource, Job, ObjectType
+from dcim.models import Site
+from dcim.tables import SiteTable
 from extras.choices import ObjectChangeActionChoices
 from netbox.constants import CENSOR_TOKEN, CENSOR_TOKEN_CHANGED
 
@@ -120,3 +132,97 @@ class DataSourceChangeLoggingTestCase(TestCase):
         self.assertEqual(objectchange.prechange_data['parameters']['password'], CENSOR_TOKEN)
         self.assertEqual(objectchange.postchange_data['parameters']['username'], 'username2')
         self.assertEqual(objectchange.postchange_data['parameters']['password'], CENSOR_TOKEN)
+
+
+class ExportJobTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Site.objects.bulk_create([
+            Site(name='Site 1', slug='site-1'),
+            Site(name='Site 2', slug='site-2'),
+            Site(name='Site 3', slug='site-3'),
+        ])
+
+    def test_export_objects(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            job = Job.objects.create(
+                object_type=ObjectType.objects.get_for_model(Site),
+                name='netbox_sites.csv',
+                job_id=uuid.uuid4()
+            )
+            export_objects(
+                job,
+                query=Site.objects.order_by('name').query,
+                filename='netbox_sites.csv',
+                content_type='text/csv; charset=utf-8',
+                export_key='abc',
+                table=SiteTable,
+                exclude_columns={'pk', 'actions'}
+            )
+            job.refresh_from_db()
+            self.assertEqual(job.status, JobStatusChoices.STATUS_COMPLETED)
+            self.assertEqual(job.artifact['key'], 'abc')
+            self.assertEqual(job.artifact['filename'], 'netbox_sites.csv.gz')
+
+            # Validate the exported data
+            with default_storage.open(job.artifact['path']) as f:
+                lines = gzip.decompress(f.read()).decode().splitlines()
+            self.assertEqual(len(lines), 4)
+            self.assertTrue(lines[1].startswith('Site 1,'))
+
+            # Deleting the Job should delete its artifact
+            path = job.artifact['path']
+            job.delete()
+            self.assertFalse(default_storage.exists(path))
+
+    def test_enqueue_export(self):
+        user = get_user_model().objects.create_user(username='testuser')
+        queryset = Site.objects.order_by('name')
+        kwargs = {
+            'filename': 'netbox_sites.yaml',
+            'content_type': 'text/yaml',
+        }
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            job, created = enqueue_export(user, queryset, **kwargs)
+            self.assertTrue(created)
+            self.assertEqual(job.status, JobStatusChoices.STATUS_PENDING)
+            self.assertEqual(job.object_type, ObjectType.objects.get_for_model(Job))
+
+            # An identical export which is still pending should be reused
+            pending_job, created = enqueue_export(user, queryset, **kwargs)
+            self.assertFalse(created)
+            self.assertEqual(pending_job.pk, job.pk)
+
+            # An identical export which is running should be reused
+            job = Job.objects.get(pk=job.pk)
+            Job.objects.filter(pk=job.pk).update(status=JobStatusChoices.STATUS_RUNNING, started=timezone.now())
+            running_job, created = enqueue_export(user, queryset, **kwargs)
+            self.assertFalse(created)
+            self.assertEqual(running_job.pk, job.pk)
+
+            # An export which has been running for longer than the job timeout should not be reused
+            with override_settings(RQ_DEFAULT_TIMEOUT=0):
+                stale_job, created = enqueue_export(user, queryset, **kwargs)
+            self.assertTrue(created)
+            self.assertNotEqual(stale_job.pk, job.pk)
+            stale_job.delete()
+
+            # The artifact of a completed identical export should be reused
+            export_objects(job, query=queryset.query, export_key=job.data['export_key'], **kwargs)
+            completed_job, created = enqueue_export(user, queryset, **kwargs)
+            self.assertFalse(created)
+            self.assertEqual(completed_job.pk, job.pk)
+            self.assertEqual(completed_job.status, JobStatusChoices.STATUS_COMPLETED)
+
+            # A different export should not be reused
+            other_job, created = enqueue_export(user, queryset.filter(name='Site 1'), **kwargs)
+            self.assertTrue(created)
+            self.assertNotEqual(other_job.pk, job.pk)
+
+            # Once its artifact has been deleted, a completed export should not be reused
+            job.delete_artifact()
+            new_job, created = enqueue_export(user, queryset, **kwargs)
+            self.assertTrue(created)
+            self.assertNotEqual(new_job.pk, job.pk)
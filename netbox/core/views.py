@@ -7,8 +7,9 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.core.cache import cache
+from django.core.files.storage import default_storage
 from django.db import connection, ProgrammingError
-from django.http import HttpResponse, HttpResponseForbidden, Http404
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden, Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
@@ -162,6 +163,32 @@ class JobView(generic.ObjectView):
     queryset = Job.objects.all()
 
 
+class JobDownloadView(BaseObjectView):
+    """
+    Download the file artifact produced by a Job (e.g. a background export). Artifacts may be downloaded only by the
+    user who created the Job, or by a superuser.
+    """
+    queryset = Job.objects.all()
+
+    def get_required_permission(self):
+        return 'core.view_job'
+
+    def get(self, request, pk):
+        job = self.get_object(pk=pk)
+
+        if job.user != request.user and not request.user.is_superuser:
+            return HttpResponseForbidden()
+        if not job.artifact or not default_storage.exists(job.artifact['path']):
+            raise Http404(_("No file is available for this job."))
+
+        return FileResponse(
+            default_storage.open(job.artifact['path']),
+            as_attachment=True,
+            filename=job.artifact['filename'],
+            content_type='application/gzip'
+        )
+
+
 class JobDeleteView(generic.ObjectDeleteView):
     queryset = Job.objects.all()
 
@@ -13,6 +13,7 @@ from .sites import LocationSerializer, SiteSerializer
 
 __all__ = (
     'RackElevationDetailFilterSerializer',
+    'RackElevationSVGSerializer',
     'RackReservationSerializer',
     'RackRoleSerializer',
     'RackSerializer',
@@ -115,3 +116,14 @@ class RackElevationDetailFilterSerializer(serializers.Serializer):
         required=False,
         default=True
     )
+
+
+class RackElevationSVGSerializer(serializers.Serializer):
+    """
+    A rendered SVG drawing of a rack elevation.
+    """
+    id = serializers.IntegerField(read_only=True)
+    url = serializers.HyperlinkedIdentityField(view_name='dcim-api:rack-detail')
+    name = serializers.CharField(read_only=True)
+    face = ChoiceField(choices=DeviceFaceChoices, read_only=True)
+    svg = serializers.CharField(read_only=True)
@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from drf_spectacular.types import OpenApiTypes
@@ -9,8 +10,9 @@ from rest_framework.viewsets import ViewSet
 
 from dcim import filtersets
 from dcim.constants import CABLE_TRACE_SVG_DEFAULT_WIDTH
+from dcim.instantiation import deferred_instantiation
 from dcim.models import *
-from dcim.svg import CableTraceSVG
+from dcim.svg import CableTraceSVG, RackElevationSVG
 from extras.api.mixins import ConfigContextQuerySetMixin, RenderConfigMixin
 from netbox.api.authentication import IsAuthenticatedOrLoginNotRequired
 from netbox.api.metadata import ContentTypeMetadata
@@ -170,6 +172,32 @@ class RackViewSet(NetBoxModelViewSet):
     serializer_class = serializers.RackSerializer
     filterset_class = filtersets.RackFilterSet
 
+    def _render_elevation_svg(self, rack, data):
+        """
+        Return the SVG drawing of a rack elevation as a string.
+        """
+        # Determine attributes for highlighting devices (if any)
+        highlight_params = []
+        for param in self.request.GET.getlist('highlight'):
+            try:
+                highlight_params.append(param.split(':', 1))
+            except ValueError:
+                pass
+
+        elevation = RackElevationSVG(
+            rack,
+            unit_width=data['unit_width'],
+            unit_height=data['unit_height'],
+            legend_width=data['legend_width'],
+            margin_width=data['margin_width'],
+            user=self.request.user,
+            include_images=data['include_images'],
+            base_url=self.request.build_absolute_uri('/'),
+            highlight_params=highlight_params
+        )
+
+        return elevation.render_cached(data['face'])
+
     @extend_schema(
         operation_id='dcim_racks_elevation_retrieve',
         filters=False,
@@ -188,26 +216,8 @@ class RackViewSet(NetBoxModelViewSet):
         data = serializer.validated_data
 
         if data['render'] == 'svg':
-            # Determine attributes for highlighting devices (if any)
-            highlight_params = []
-            for param in request.GET.getlist('highlight'):
-                try:
-                    highlight_params.append(param.split(':', 1))
-                except ValueError:
-                    pass
-
             # Render and return the elevation as an SVG drawing with the correct content type
-            drawing = rack.get_elevation_svg(
-                face=data['face'],
-                user=request.user,
-                unit_width=data['unit_width'],
-                unit_height=data['unit_height'],
-                legend_width=data['legend_width'],
-                include_images=data['include_images'],
-                base_url=request.build_absolute_uri('/'),
-                highlight_params=highlight_params
-            )
-            return HttpResponse(drawing.tostring(), content_type='image/svg+xml')
+            return HttpResponse(self._render_elevation_svg(rack, data), content_type='image/svg+xml')
 
         else:
             # Return a JSON representation of the rack units in the elevation
@@ -228,6 +238,37 @@ class RackViewSet(NetBoxModelViewSet):
                 rack_units = serializers.RackUnitSerializer(page, many=True, context={'request': request})
                 return self.get_paginated_response(rack_units.data)
 
+    @extend_schema(
+        operation_id='dcim_racks_elevations_list',
+        parameters=[serializers.RackElevationDetailFilterSerializer],
+        responses={200: serializers.RackElevationSVGSerializer(many=True)}
+    )
+    @action(detail=False, url_path='elevations')
+    def elevations(self, request):
+        """
+        Render the elevations of multiple racks as SVG drawings in a single request. Racks may be filtered as for the
+        list endpoint.
+        """
+        serializer = serializers.RackElevationDetailFilterSerializer(data=request.GET)
+        if not serializer.is_valid():
+            return Response(serializer.errors, 400)
+        data = serializer.validated_data
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        racks = page if page is not None else queryset
+
+        elevations = []
+        for rack in racks:
+            rack.face = data['face']
+            rack.svg = self._render_elevation_svg(rack, data)
+            elevations.append(rack)
+        elevations = serializers.RackElevationSVGSerializer(elevations, many=True, context={'request': request})
+
+        if page is not None:
+            return self.get_paginated_response(elevations.data)
+        return Response(elevations.data)
+
 
 #
 # Rack reservations
@@ -365,6 +406,16 @@ class DeviceViewSet(
     filterset_class = filtersets.DeviceFilterSet
     pagination_class = StripCountAnnotationsPaginator
 
+    @transaction.atomic
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            # Creating a single device
+            return super().create(request, *args, **kwargs)
+
+        # Instantiate the components of all new devices together
+        with deferred_instantiation():
+            return super().create(request, *args, **kwargs)
+
     def get_serializer_class(self):
         """
         Select the specific serializer based on the request context.
@@ -207,7 +207,7 @@ class ConsoleServerPortTemplateType(ModularComponentTemplateType):
 
 @strawberry_django.type(
     models.Device,
-    fields='__all__',
+    exclude=('_config_context', '_config_context_hash'),
     filters=DeviceFilter
 )
 class DeviceType(ConfigContextMixin, ImageAttachmentsMixin, ContactsMixin, NetBoxObjectType):
@@ -0,0 +1,215 @@
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.signals import post_save
+
+from extras.models import CustomField
+from extras.signals import handle_bulk_save, supports_bulk_save
+from netbox.context import component_instantiation_queue
+from utilities.counters import deferred_counters
+from .models import *
+
+__all__ = (
+    'ComponentInstantiator',
+    'INSTANTIATION_BATCH_SIZE',
+    'deferred_instantiation',
+)
+
+# The number of components created per query
+INSTANTIATION_BATCH_SIZE = 1000
+
+# Component template models, in the order in which their components must be created (such that any referenced
+# components already exist)
+COMPONENT_TEMPLATE_MODELS = (
+    ConsolePortTemplate,
+    ConsoleServerPortTemplate,
+    PowerPortTemplate,
+    PowerOutletTemplate,
+    InterfaceTemplate,
+    RearPortTemplate,
+    FrontPortTemplate,
+    ModuleBayTemplate,
+    DeviceBayTemplate,
+    InventoryItemTemplate,
+)
+
+
+class ComponentInstantiator:
+    """
+    Instantiate the components of many new Devices at once, per the component templates of their DeviceTypes. This
+    replicates the instantiation of components by Device.save() with a constant number of queries for any number of
+    devices:
+
+      * The component templates of each DeviceType are retrieved once and cached.
+      * Components of each type are created for all devices together using bulk_create(). References to other
+        components (e.g. a FrontPort's RearPort) are resolved in memory, rather than by querying for each component.
+      * The MPTT attributes of inventory items are copied from their templates, with a new tree assigned to each root
+        item, so that inventory items can be created in bulk rather than saved individually.
+      * Where the effects of the post_save signal can be replicated (see supports_bulk_save()), counters are
+        updated, the search cache is populated, and change records and events (if processing a request) are created
+        for all components of a type together (see handle_bulk_save()). Otherwise, post_save is sent for each
+        component, so that any other receivers (e.g. those registered by plugins) are notified.
+    """
+    def __init__(self):
+        self._templates = {}
+        self._template_models = {}
+
+    def get_templates(self, device_type_ids):
+        """
+        Return a mapping of each DeviceType ID to the component templates of that DeviceType, grouped by model.
+        Templates are retrieved for all DeviceTypes not already cached together.
+        """
+        if missing := set(device_type_ids) - set(self._templates):
+            for pk in missing:
+                self._templates[pk] = {model: [] for model in COMPONENT_TEMPLATE_MODELS}
+            for model in COMPONENT_TEMPLATE_MODELS:
+                queryset = model.objects.filter(device_type__in=missing)
+                if model is InventoryItemTemplate:
+                    queryset = queryset.select_related('role', 'manufacturer').order_by('tree_id', 'lft')
+                for template in queryset:
+                    self._templates[template.device_type_id][model].append(template)
+
+        return {pk: self._templates[pk] for pk in device_type_ids}
+
+    def _get_template_model(self, content_type_id):
+        if content_type_id not in self._template_models:
+            self._template_models[content_type_id] = ContentType.objects.get_for_id(content_type_id).model_class()
+        return self._template_models[content_type_id]
+
+    def instantiate(self, devices):
+        """
+        Create all components for the given (saved) Devices. Returns a dictionary mapping each component model to the
+        list of components created.
+        """
+        devices = list(devices)
+        templates = self.get_templates({device.device_type_id for device in devices})
+
+        # Maps (template model, template ID, device ID) to each new component
+        components = {}
+        created = {}
+
+        for template_model in COMPONENT_TEMPLATE_MODELS:
+            model = template_model.component_model
+            instances = []
+            for device in devices:
+                for template in templates[device.device_type_id][template_model]:
+                    component = template.instantiate(
+                        device=device,
+                        **self._get_references(template, device, components)
+                    )
+                    components[(template_model, template.pk, device.pk)] = component
+                    instances.append(component)
+
+            # Set default values for any applicable custom fields
+            if instances and (cf_defaults := CustomField.objects.get_defaults_for_model(model)):
+                for component in instances:
+                    component.custom_field_data = dict(cf_defaults)
+
+            if template_model is InventoryItemTemplate:
+                self._create_inventory_items(devices, templates, components)
+            else:
+                model.objects.bulk_create(instances, batch_size=INSTANTIATION_BATCH_SIZE)
+            created[model] = instances
+
+        # Interface bridges have to be set after interface instantiation
+        bridged_interfaces = []
+        for device in devices:
+            for template in templates[device.device_type_id][InterfaceTemplate]:
+                if template.bridge_id:
+                    interface = components[(InterfaceTemplate, template.pk, device.pk)]
+                    interface.bridge = components[(InterfaceTemplate, template.bridge_id, device.pk)]
+                    bridged_interfaces.append(interface)
+        Interface.objects.bulk_update(bridged_interfaces, ['bridge'], batch_size=INSTANTIATION_BATCH_SIZE)
+
+        self._post_create(created)
+
+        return created
+
+    def _get_references(self, template, device, components):
+        """
+        Return the keyword arguments to pass to a template's instantiate() method for any other components it
+        references.
+        """
+        if type(template) is PowerOutletTemplate and template.power_port_id:
+            return {'power_port': components[(PowerPortTemplate, template.power_port_id, device.pk)]}
+        if type(template) is FrontPortTemplate and template.rear_port_id:
+            return {'rear_port': components[(RearPortTemplate, template.rear_port_id, device.pk)]}
+        if type(template) is InventoryItemTemplate:
+            references = {}
+            if template.parent_id:
+                references['parent'] = components[(InventoryItemTemplate, template.parent_id, device.pk)]
+            if template.component_type_id and template.component_id:
+                template_model = self._get_template_model(template.component_type_id)
+                references['component'] = components[(template_model, template.component_id, device.pk)]
+            return references
+        return {}
+
+    def _create_inventory_items(self, devices, templates, components):
+        """
+        Assign MPTT attributes to new inventory items and create them. The structure of each tree of items is identical
+        to that of its templates, so the left, right, and level values of each template are retained and only a new
+        tree ID is assigned. Items are created one level at a time, such that each parent is saved before its children.
+        """
+        opts = InventoryItem._mptt_meta
+        tree_id = (InventoryItem.objects.aggregate(Max(opts.tree_id_attr))[f'{opts.tree_id_attr}__max'] or 0) + 1
+
+        levels = defaultdict(list)
+        for device in devices:
+            tree_ids = {}
+            for template in templates[device.device_type_id][InventoryItemTemplate]:
+                template_tree_id = getattr(template, opts.tree_id_attr)
+                if template_tree_id not in tree_ids:
+                    tree_ids[template_tree_id] = tree_id
+                    tree_id += 1
+                item = components[(InventoryItemTemplate, template.pk, device.pk)]
+                setattr(item, opts.tree_id_attr, tree_ids[template_tree_id])
+                for attr in (opts.left_attr, opts.right_attr, opts.level_attr):
+                    setattr(item, attr, getattr(template, attr))
+                levels[getattr(item, opts.level_attr)].append(item)
+
+        for level in sorted(levels):
+            InventoryItem.objects.bulk_create(levels[level], batch_size=INSTANTIATION_BATCH_SIZE)
+
+    def _post_create(self, created):
+        """
+        Apply the effects of the post_save signal for all new components together where possible, or else send the
+        signal for each component.
+        """
+        for model, instances in created.items():
+            if supports_bulk_save(model):
+                handle_bulk_save(model, instances, created=True, batch_size=INSTANTIATION_BATCH_SIZE)
+                continue
+            for instance in instances:
+                post_save.send(
+                    sender=model,
+                    instance=instance,
+                    created=True,
+                    raw=False,
+                    using='default',
+                    update_fields=None
+                )
+
+
+@contextmanager
+def deferred_instantiation():
+    """
+    Defer the instantiation of components for all Devices created within the context, and instantiate them in bulk
+    upon exit (see ComponentInstantiator). This should be employed within a transaction. Nested contexts defer to the
+    outermost context.
+    """
+    if component_instantiation_queue.get() is not None:
+        yield
+        return
+
+    queue = []
+    token = component_instantiation_queue.set(queue)
+    try:
+        yield
+    finally:
+        component_instantiation_queue.reset(token)
+    if queue:
+        with transaction.atomic(), deferred_counters():
+            ComponentInstantiator().instantiate(queue)
@@ -1,10 +1,12 @@
-from django.core.management.base import BaseCommand
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
 from django.core.management.color import no_style
-from django.db import connection
-from django.db.models import Q
+from django.db import connection, connections
 
 from dcim.models import CablePath, ConsolePort, ConsoleServerPort, Interface, PowerFeed, PowerOutlet, PowerPort
-from dcim.signals import create_cablepath
+from dcim.tracing import CABLE_TRACE_BATCH_SIZE, CablePathTracer
 
 ENDPOINT_MODELS = (
     ConsolePort,
@@ -15,6 +17,24 @@ ENDPOINT_MODELS = (
     PowerPort
 )
 
+# The CablePathTracer inherited by each worker process
+_tracer = None
+
+
+def _init_worker(tracer):
+    global _tracer
+    _tracer = tracer
+
+
+def _trace_origins_worker(model, pks, batch_size):
+    """
+    Entry point for worker processes. Each worker establishes its own database connection.
+    """
+    try:
+        return len(pks), _tracer.trace_origins(model, pks, batch_size=batch_size)
+    finally:
+        connections.close_all()
+
 
 class Command(BaseCommand):
     help = "Generate any missing cable paths among all cable termination objects in NetBox"
@@ -28,6 +48,18 @@ class Command(BaseCommand):
             "--no-input", action='store_true', dest='no_input',
             help="Do not prompt user for any input/confirmation"
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=CABLE_TRACE_BATCH_SIZE,
+            help=f"The number of paths to trace and save per transaction (default: {CABLE_TRACE_BATCH_SIZE})"
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="The number of worker processes among which to distribute origins (default: 1)"
+        )
 
     def draw_progress_bar(self, percentage):
         """
@@ -37,6 +69,10 @@ class Command(BaseCommand):
         self.stdout.write(f"\r  [{'#' * bar_size}{' ' * (20 - bar_size)}] {int(percentage)}%", ending='')
 
     def handle(self, *model_names, **options):
+        if options['workers'] < 1:
+            raise CommandError("The number of workers must be at least 1.")
+        if options['batch_size'] < 1:
+            raise CommandError("The batch size must be at least 1.")
 
         # If --force was passed, first delete all existing CablePaths
         if options['force']:
@@ -66,25 +102,43 @@ class Command(BaseCommand):
                 for sql in sequence_sql:
                     cursor.execute(sql)
 
+        # Load all cabling into memory
+        self.stdout.write('Loading cable topology...')
+        tracer = CablePathTracer()
+
         # Retrace paths
         for model in ENDPOINT_MODELS:
-            params = Q(cable__isnull=False)
-            if hasattr(model, 'wireless_link'):
-                params |= Q(wireless_link__isnull=False)
-            origins = model.objects.filter(params)
-            if not options['force']:
-                origins = origins.filter(_path__isnull=True)
-            origins_count = origins.count()
+            origins = tracer.get_origins(model, missing_only=not options['force'])
+            origins_count = len(origins)
             if not origins_count:
                 self.stdout.write(f'Found no missing {model._meta.verbose_name} paths; skipping')
                 continue
             self.stdout.write(f'Retracing {origins_count} cabled {model._meta.verbose_name_plural}...')
-            i = 0
-            for i, obj in enumerate(origins, start=1):
-                create_cablepath([obj])
-                if not i % 100:
+            batch_size = options['batch_size']
+            batches = [origins[i:i + batch_size] for i in range(0, origins_count, batch_size)]
+            i = count = 0
+            if options['workers'] > 1:
+                # Close any open database connections prior to forking worker processes
+                connections.close_all()
+                with ProcessPoolExecutor(
+                    max_workers=options['workers'],
+                    mp_context=multiprocessing.get_context('fork'),
+                    initializer=_init_worker,
+                    initargs=(tracer,)
+                ) as executor:
+                    futures = [
+                        executor.submit(_trace_origins_worker, model, batch, batch_size) for batch in batches
+                    ]
+                    for future in as_completed(futures):
+                        traced, created = future.result()
+                        i += traced
+                        count += created
+                        self.draw_progress_bar(i * 100 / origins_count)
+            else:
+                for batch in batches:
+                    count += tracer.trace_origins(model, batch, batch_size=batch_size)
+                    i += len(batch)
                     self.draw_progress_bar(i * 100 / origins_count)
-            self.draw_progress_bar(100)
-            self.stdout.write(self.style.SUCCESS(f'\n  Retraced {i} {model._meta.verbose_name_plural}'))
+            self.stdout.write(self.style.SUCCESS(f'\n  Retraced {count} {model._meta.verbose_name_plural}'))
 
         self.stdout.write(self.style.SUCCESS('Finished.'))
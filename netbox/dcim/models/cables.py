@@ -2,6 +2,7 @@ import itertools
 from collections import defaultdict
 
 from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models import Sum
@@ -459,6 +460,9 @@ class CablePath(models.Model):
     _netbox_private = True
 
     class Meta:
+        indexes = (
+            GinIndex(fields=('_nodes',), name='dcim_cablepath_nodes'),
+        )
         verbose_name = _('cable path')
         verbose_name_plural = _('cable paths')
 
@@ -6,7 +6,7 @@ from functools import cached_property
 from django.core.exceptions import ValidationError
 from django.core.files.storage import default_storage
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.db.models import F, ProtectedError
 from django.db.models.functions import Lower
 from django.db.models.signals import post_save
@@ -16,12 +16,14 @@ from django.utils.translation import gettext_lazy as _
 
 from dcim.choices import *
 from dcim.constants import *
-from extras.models import ConfigContextModel, CustomField
+from extras.models import ConfigContextModel, CustomField, MaterializedConfigContextModel
 from extras.querysets import ConfigContextModelQuerySet
 from netbox.choices import ColorChoices
 from netbox.config import ConfigItem
+from netbox.context import component_instantiation_queue
 from netbox.models import OrganizationalModel, PrimaryModel
 from netbox.models.features import ContactsMixin, ImageAttachmentsMixin
+from utilities.counters import deferred_counters
 from utilities.fields import ColorField, CounterCacheField, NaturalOrderingField
 from utilities.tracking import TrackingModelMixin
 from .device_components import *
@@ -539,7 +541,7 @@ class Device(
     ContactsMixin,
     ImageAttachmentsMixin,
     RenderConfigMixin,
-    ConfigContextModel,
+    MaterializedConfigContextModel,
     TrackingModelMixin,
     PrimaryModel
 ):
@@ -1027,21 +1029,26 @@ class Device(
 
         super().save(*args, **kwargs)
 
-        # If this is a new Device, instantiate all the related components per the DeviceType definition
-        if is_new:
-            self._instantiate_components(self.device_type.consoleporttemplates.all())
-            self._instantiate_components(self.device_type.consoleserverporttemplates.all())
-            self._instantiate_components(self.device_type.powerporttemplates.all())
-            self._instantiate_components(self.device_type.poweroutlettemplates.all())
-            self._instantiate_components(self.device_type.interfacetemplates.all())
-            self._instantiate_components(self.device_type.rearporttemplates.all())
-            self._instantiate_components(self.device_type.frontporttemplates.all())
-            self._instantiate_components(self.device_type.modulebaytemplates.all())
-            self._instantiate_components(self.device_type.devicebaytemplates.all())
-            # Disable bulk_create to accommodate MPTT
-            self._instantiate_components(self.device_type.inventoryitemtemplates.all(), bulk_create=False)
-            # Interface bridges have to be set after interface instantiation
-            update_interface_bridges(self, self.device_type.interfacetemplates.all())
+        # If this is a new Device, instantiate all the related components per the DeviceType definition. If component
+        # instantiation is being deferred, the Device is queued for the instantiation of its components in bulk.
+        if is_new and (queue := component_instantiation_queue.get()) is not None:
+            queue.append(self)
+        elif is_new:
+            # Counter updates for all new components are applied together, atomically with their creation
+            with transaction.atomic(), deferred_counters():
+                self._instantiate_components(self.device_type.consoleporttemplates.all())
+                self._instantiate_components(self.device_type.consoleserverporttemplates.all())
+                self._instantiate_components(self.device_type.powerporttemplates.all())
+                self._instantiate_components(self.device_type.poweroutlettemplates.all())
+                self._instantiate_components(self.device_type.interfacetemplates.all())
+                self._instantiate_components(self.device_type.rearporttemplates.all())
+                self._instantiate_components(self.device_type.frontporttemplates.all())
+                self._instantiate_components(self.device_type.modulebaytemplates.all())
+                self._instantiate_components(self.device_type.devicebaytemplates.all())
+                # Disable bulk_create to accommodate MPTT
+                self._instantiate_components(self.device_type.inventoryitemtemplates.all(), bulk_create=False)
+                # Interface bridges have to be set after interface instantiation
+                update_interface_bridges(self, self.device_type.interfacetemplates.all())
 
         # Update Site and Rack assignment for any child Devices
         devices = Device.objects.filter(parent_bay__device=self)
@@ -1,13 +1,16 @@
 import logging
 
+from django.conf import settings
 from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 
+from extras.configcontexts import invalidate_config_contexts
 from .choices import CableEndChoices, LinkStatusChoices
 from .models import (
     Cable, CablePath, CableTermination, Device, FrontPort, PathEndpoint, PowerPanel, Rack, Location, VirtualChassis,
 )
 from .models.cables import trace_paths
+from .tracing import CablePathTracer
 from .utils import create_cablepath, rebuild_paths
 
 
@@ -25,7 +28,10 @@ def handle_location_site_change(instance, created, **kwargs):
         instance.get_descendants().update(site=instance.site)
         locations = instance.get_descendants(include_self=True).values_list('pk', flat=True)
         Rack.objects.filter(location__in=locations).update(site=instance.site)
-        Device.objects.filter(location__in=locations).update(site=instance.site)
+        devices = Device.objects.filter(location__in=locations)
+        if settings.MATERIALIZE_CONFIG_CONTEXTS:
+            invalidate_config_contexts(devices.exclude(site=instance.site))
+        devices.update(site=instance.site)
         PowerPanel.objects.filter(location__in=locations).update(site=instance.site)
         CableTermination.objects.filter(_location__in=locations).update(_site=instance.site)
 
@@ -36,7 +42,10 @@ def handle_rack_site_change(instance, created, **kwargs):
     Update child Devices if Site or Location assignment has changed.
     """
     if not created:
-        Device.objects.filter(rack=instance).update(site=instance.site, location=instance.location)
+        devices = Device.objects.filter(rack=instance)
+        if settings.MATERIALIZE_CONFIG_CONTEXTS:
+            invalidate_config_contexts(devices.exclude(site=instance.site, location=instance.location))
+        devices.update(site=instance.site, location=instance.location)
 
 
 #
@@ -112,8 +121,7 @@ def retrace_cable_paths(instance, **kwargs):
     """
     When a Cable is deleted, check for and update its connected endpoints
     """
-    for cablepath in CablePath.objects.filter(_nodes__contains=instance):
-        cablepath.retrace()
+    CablePathTracer(preload=False).retrace(CablePath.objects.filter(_nodes__contains=instance))
 
 
 @receiver(post_delete, sender=CableTermination)
@@ -124,11 +132,11 @@ def nullify_connected_endpoints(instance, **kwargs):
     model = instance.termination_type.model_class()
     model.objects.filter(pk=instance.termination_id).update(cable=None, cable_end='')
 
-    for cablepath in CablePath.objects.filter(_nodes__contains=instance.cable):
-        # Remove the deleted CableTermination if it's one of the path's originating nodes
-        if instance.termination in cablepath.origins:
-            cablepath.origins.remove(instance.termination)
-        cablepath.retrace()
+    # Remove the deleted CableTermination from the originating nodes of any paths
+    CablePathTracer(preload=False).retrace(
+        CablePath.objects.filter(_nodes__contains=instance.cable),
+        exclude=[(instance.termination_type_id, instance.termination_id)]
+    )
 
 
 @receiver(post_save, sender=FrontPort)
@@ -138,5 +146,4 @@ def extend_rearport_cable_paths(instance, created, raw, **kwargs):
     """
     if created and not raw:
         rearport = instance.rear_port
-        for cablepath in CablePath.objects.filter(_nodes__contains=rearport):
-            cablepath.retrace()
+        CablePathTracer(preload=False).retrace(CablePath.objects.filter(_nodes__contains=rearport))
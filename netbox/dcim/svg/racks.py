@@ -1,4 +1,6 @@
 import decimal
+import hashlib
+
 import svgwrite
 from svgwrite.container import Hyperlink
 from svgwrite.image import Image
@@ -7,8 +9,9 @@ from svgwrite.shapes import Rect
 from svgwrite.text import Text
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import FieldError
-from django.db.models import Q
+from django.db.models import Count, Max, Q
 from django.template.defaultfilters import floatformat
 from django.urls import reverse
 from django.utils.http import urlencode
@@ -28,6 +31,8 @@ GRADIENT_OCCUPIED = '#d7d7d7'
 GRADIENT_BLOCKED = '#ffc0c0'
 STROKE_RESERVED = '#4d4dff'
 
+RACK_ELEVATION_CACHE_KEY = 'rack_elevation.{rack}.{face}.{digest}'
+
 
 def get_device_name(device):
     if device.virtual_chassis:
@@ -320,6 +325,59 @@ class RackElevationSVG:
                 # Devices which the user does not have permission to view are rendered only as unavailable space
                 self.drawing.add(Rect(device_coords, device_size, class_='blocked'))
 
+    def get_cache_key(self, face):
+        """
+        Return the key under which the rendered SVG document for the specified face is cached. The key reflects the
+        rendering options, the devices viewable by the user, and the most recent changes to the rack and to its
+        devices and reservations.
+        """
+        devices = self.rack.devices.aggregate(
+            count=Count('pk', distinct=True),
+            last_updated=Max('last_updated'),
+            device_type_last_updated=Max('device_type__last_updated'),
+            manufacturer_last_updated=Max('device_type__manufacturer__last_updated'),
+            role_last_updated=Max('role__last_updated'),
+            virtual_chassis_last_updated=Max('virtual_chassis__last_updated'),
+            devicebay_last_updated=Max('devicebays__last_updated'),
+        )
+        reservations = self.rack.reservations.aggregate(
+            count=Count('pk'),
+            last_updated=Max('last_updated'),
+        )
+        params = (
+            settings.VERSION,
+            self.rack.last_updated,
+            sorted(devices.items()),
+            sorted(reservations.items()),
+            sorted(self.permitted_device_ids),
+            sorted(device.pk for device in self.highlight_devices),
+            self.unit_width,
+            self.unit_height,
+            self.legend_width,
+            self.margin_width,
+            self.include_images,
+            self.base_url,
+        )
+        digest = hashlib.sha256(repr(params).encode()).hexdigest()
+
+        return RACK_ELEVATION_CACHE_KEY.format(rack=self.rack.pk, face=face, digest=digest)
+
+    def render_cached(self, face):
+        """
+        Return the SVG document representing a rack elevation as a string. The rendered document is cached for
+        RACK_ELEVATION_CACHE_TIMEOUT seconds, and rendered again if the rack, its devices, or its reservations change.
+        """
+        if not settings.RACK_ELEVATION_CACHE_TIMEOUT:
+            return self.render(face).tostring()
+
+        cache_key = self.get_cache_key(face)
+        svg = cache.get(cache_key)
+        if svg is None:
+            svg = self.render(face).tostring()
+            cache.set(cache_key, svg, settings.RACK_ELEVATION_CACHE_TIMEOUT)
+
+        return svg
+
     def render(self, face):
         """
         Return an SVG document representing a rack elevation.
@@ -361,6 +361,24 @@ class RackTest(APIViewTestCases.APIViewTestCase):
         self.assertHttpStatus(response, status.HTTP_200_OK)
         self.assertEqual(response.get('Content-Type'), 'image/svg+xml')
 
+        # Retrieve the cached drawing
+        cached_response = self.client.get(url, **self.header)
+        self.assertEqual(cached_response.content, response.content)
+
+    def test_get_rack_elevations_svg(self):
+        """
+        GET multiple rack elevations in SVG format.
+        """
+        self.add_permissions('dcim.view_rack')
+        url = reverse('dcim-api:rack-elevations')
+
+        response = self.client.get(f'{url}?name=Rack 1&name=Rack 2&face=rear', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        for elevation in response.data['results']:
+            self.assertEqual(elevation['face']['value'], 'rear')
+            self.assertTrue(elevation['svg'].startswith('<svg'))
+
 
 class RackReservationTest(APIViewTestCases.APIViewTestCase):
     model = RackReservation
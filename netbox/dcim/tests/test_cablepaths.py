@@ -1,9 +1,11 @@
 from django.test import TestCase
 
 from circuits.models import *
+from core.models import ObjectType
 from dcim.choices import LinkStatusChoices
 from dcim.models import *
 from dcim.svg import CableTraceSVG
+from dcim.tracing import CablePathTracer
 from dcim.utils import object_to_path_node
 
 
@@ -2300,3 +2302,112 @@ class CablePathTestCase(TestCase):
             is_active=True
         )
         self.assertEqual(CablePath.objects.count(), 0)
+
+
+class CablePathTracerTestCase(TestCase):
+    """
+    Test that CablePathTracer produces the same CablePaths as CablePath.from_origin().
+    """
+    @classmethod
+    def setUpTestData(cls):
+        site = Site.objects.create(name='Site', slug='site')
+        manufacturer = Manufacturer.objects.create(name='Generic', slug='generic')
+        device_type = DeviceType.objects.create(manufacturer=manufacturer, model='Test Device')
+        role = DeviceRole.objects.create(name='Device Role', slug='device-role')
+        device = Device.objects.create(site=site, device_type=device_type, role=role, name='Test Device')
+        provider = Provider.objects.create(name='Provider', slug='provider')
+        circuit_type = CircuitType.objects.create(name='Circuit Type', slug='circuit-type')
+        circuit = Circuit.objects.create(provider=provider, type=circuit_type, cid='Circuit 1')
+
+        # [IF1] --C1-- [FP1:1] [RP1] --C3-- [RP2] [FP2:1] --C4-- [IF3]
+        # [IF2] --C2-- [FP1:2]                    [FP2:2] --C5-- [CT1] [CT2] --C6-- [IF4]
+        # [IF5] --C7-- [IF6] (planned)
+        # [IF7] --C8-- [FP3:1] [RP3]
+        interfaces = [
+            Interface.objects.create(device=device, name=f'Interface {i}') for i in range(1, 9)
+        ]
+        rearport1 = RearPort.objects.create(device=device, name='Rear Port 1', positions=2)
+        rearport2 = RearPort.objects.create(device=device, name='Rear Port 2', positions=2)
+        rearport3 = RearPort.objects.create(device=device, name='Rear Port 3', positions=2)
+        frontport1_1 = FrontPort.objects.create(
+            device=device, name='Front Port 1:1', rear_port=rearport1, rear_port_position=1
+        )
+        frontport1_2 = FrontPort.objects.create(
+            device=device, name='Front Port 1:2', rear_port=rearport1, rear_port_position=2
+        )
+        frontport2_1 = FrontPort.objects.create(
+            device=device, name='Front Port 2:1', rear_port=rearport2, rear_port_position=1
+        )
+        frontport2_2 = FrontPort.objects.create(
+            device=device, name='Front Port 2:2', rear_port=rearport2, rear_port_position=2
+        )
+        frontport3_1 = FrontPort.objects.create(
+            device=device, name='Front Port 3:1', rear_port=rearport3, rear_port_position=1
+        )
+        circuittermination1 = CircuitTermination.objects.create(circuit=circuit, site=site, term_side='A')
+        circuittermination2 = CircuitTermination.objects.create(circuit=circuit, site=site, term_side='Z')
+
+        for a_terminations, b_terminations, status in (
+            ([interfaces[0]], [frontport1_1], LinkStatusChoices.STATUS_CONNECTED),
+            ([interfaces[1]], [frontport1_2], LinkStatusChoices.STATUS_CONNECTED),
+            ([rearport1], [rearport2], LinkStatusChoices.STATUS_CONNECTED),
+            ([frontport2_1], [interfaces[2]], LinkStatusChoices.STATUS_CONNECTED),
+            ([frontport2_2], [circuittermination1], LinkStatusChoices.STATUS_CONNECTED),
+            ([circuittermination2], [interfaces[3]], LinkStatusChoices.STATUS_CONNECTED),
+            ([interfaces[4]], [interfaces[5]], LinkStatusChoices.STATUS_PLANNED),
+            ([interfaces[6]], [frontport3_1], LinkStatusChoices.STATUS_CONNECTED),
+        ):
+            Cable(a_terminations=a_terminations, b_terminations=b_terminations, status=status).save()
+
+    def test_trace(self):
+        tracer = CablePathTracer()
+        interface_type = ObjectType.objects.get_for_model(Interface).pk
+
+        for interface in Interface.objects.all():
+            expected = CablePath.from_origin([interface])
+            origin = (interface_type, interface.pk)
+            origin_links = {}
+            if interface.cable_id:
+                origin_links[origin] = (tracer.cable_type, interface.cable_id)
+            cablepath = tracer.trace([origin], origin_links=origin_links)
+
+            if expected is None:
+                self.assertIsNone(cablepath, msg=f'Unexpected path from {interface}')
+                continue
+            self.assertEqual(cablepath.path, expected.path, msg=f'Path from {interface} differs')
+            self.assertEqual(cablepath.is_complete, expected.is_complete)
+            self.assertEqual(cablepath.is_active, expected.is_active)
+            self.assertEqual(cablepath.is_split, expected.is_split)
+
+    def test_trace_origins(self):
+        expected = {cp.path[0][0]: cp.path for cp in CablePath.objects.all()}
+        CablePath.objects.all().delete()
+
+        origins = CablePathTracer().get_origins(Interface, missing_only=True)
+        self.assertEqual(len(origins), 7)
+        count = CablePathTracer().trace_origins(Interface, origins, batch_size=3)
+
+        self.assertEqual(count, 7)
+        self.assertEqual(CablePath.objects.count(), 7)
+        for interface in Interface.objects.filter(pk__in=origins):
+            self.assertIsNotNone(interface._path_id)
+            cablepath = CablePath.objects.get(pk=interface._path_id)
+            self.assertEqual(cablepath.path, expected[object_to_path_node(interface)])
+            self.assertEqual(cablepath._nodes, [node for step in cablepath.path for node in step])
+
+    def test_retrace(self):
+        # Change the status of the trunk cable without triggering any signals
+        trunk = RearPort.objects.get(name='Rear Port 1').cable
+        Cable.objects.filter(pk=trunk.pk).update(status=LinkStatusChoices.STATUS_PLANNED)
+
+        cable_paths = CablePath.objects.filter(_nodes__contains=trunk)
+        self.assertEqual(cable_paths.count(), 4)
+        count = CablePathTracer(preload=False).retrace(cable_paths)
+        self.assertEqual(count, 4)
+        self.assertEqual(CablePath.objects.filter(_nodes__contains=trunk, is_active=True).count(), 0)
+
+        for interface in Interface.objects.filter(_path__isnull=False):
+            expected = CablePath.from_origin([interface])
+            self.assertEqual(interface.path.path, expected.path, msg=f'Path from {interface} differs')
+            self.assertEqual(interface.path.is_active, expected.is_active)
+            self.assertEqual(interface.path._nodes, [node for step in expected.path for node in step])
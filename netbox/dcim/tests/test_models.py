@@ -1,10 +1,13 @@
 from django.core.exceptions import ValidationError
+from django.db.models.signals import post_save
 from django.test import TestCase
 
 from circuits.models import *
 from core.models import ObjectType
 from dcim.choices import *
+from dcim.instantiation import deferred_instantiation
 from dcim.models import *
+from extras.context_managers import deferred_updates
 from extras.models import CustomField
 from tenancy.models import Tenant
 from utilities.data import drange
@@ -456,6 +459,87 @@ class DeviceTestCase(TestCase):
         )
         self.assertEqual(inventoryitem.cf['cf1'], 'foo')
 
+    def test_deferred_instantiation(self):
+        """
+        Ensure that the components of Devices created within deferred_instantiation() are instantiated in bulk
+        identically to those of Devices saved individually.
+        """
+        device_type = DeviceType.objects.first()
+        interface = InterfaceTemplate.objects.create(
+            device_type=device_type,
+            name='Interface 2',
+            type=InterfaceTypeChoices.TYPE_1GE_FIXED,
+            bridge=InterfaceTemplate.objects.get(name='Interface 1')
+        )
+        InventoryItemTemplate.objects.create(
+            device_type=device_type,
+            parent=InventoryItemTemplate.objects.get(name='Inventory Item 1'),
+            name='Inventory Item 2',
+            component=interface
+        )
+
+        with deferred_instantiation():
+            devices = [
+                Device.objects.create(
+                    site=Site.objects.first(),
+                    device_type=device_type,
+                    role=DeviceRole.objects.first(),
+                    name=f'Test Device {i}'
+                ) for i in range(1, 4)
+            ]
+            self.assertFalse(Interface.objects.filter(device__in=devices).exists())
+
+        for device in devices:
+            device.refresh_from_db()
+            self.assertEqual(device.console_port_count, 1)
+            self.assertEqual(device.interface_count, 2)
+            self.assertEqual(device.inventory_item_count, 2)
+
+            poweroutlet = PowerOutlet.objects.get(device=device, name='Power Outlet 1')
+            self.assertEqual(poweroutlet.power_port, PowerPort.objects.get(device=device, name='Power Port 1'))
+            self.assertEqual(poweroutlet.cf['cf1'], 'foo')
+            frontport = FrontPort.objects.get(device=device, name='Front Port 1')
+            self.assertEqual(frontport.rear_port, RearPort.objects.get(device=device, name='Rear Port 1'))
+            interface = Interface.objects.get(device=device, name='Interface 2')
+            self.assertEqual(interface.bridge, Interface.objects.get(device=device, name='Interface 1'))
+
+            # Validate the inventory item hierarchy
+            parent = InventoryItem.objects.get(device=device, name='Inventory Item 1')
+            child = InventoryItem.objects.get(device=device, name='Inventory Item 2')
+            self.assertEqual(child.parent, parent)
+            self.assertEqual(child.component, interface)
+            self.assertEqual(list(parent.get_descendants()), [child])
+            self.assertEqual(child.cf['cf1'], 'foo')
+
+        # Each device's inventory items must belong to a separate tree
+        self.assertEqual(
+            InventoryItem.objects.filter(device__in=devices).values('tree_id').distinct().count(),
+            len(devices)
+        )
+
+    def test_deferred_instantiation_post_save(self):
+        """
+        Ensure that post_save is sent for each component instantiated in bulk if another receiver is connected.
+        """
+        received = []
+
+        def receiver(instance, created, **kwargs):
+            received.append((instance, created))
+
+        post_save.connect(receiver, sender=ConsolePort)
+        try:
+            with deferred_instantiation():
+                device = Device.objects.create(
+                    site=Site.objects.first(),
+                    device_type=DeviceType.objects.first(),
+                    role=DeviceRole.objects.first(),
+                    name='Test Device 1'
+                )
+        finally:
+            post_save.disconnect(receiver, sender=ConsolePort)
+
+        self.assertEqual(received, [(ConsolePort.objects.get(device=device), True)])
+
     def test_multiple_unnamed_devices(self):
 
         device1 = Device(
@@ -651,6 +735,43 @@ class CableTestCase(TestCase):
         self.assertIsNone(interface2.cable)
         self.assertListEqual(interface2.link_peers, [])
 
+    def test_cable_termination_denormalized_fields(self):
+        """
+        When a Device is moved to a new Site, the denormalized fields of its CableTerminations must be updated.
+        """
+        site = Site.objects.create(name='Test Site 2', slug='test-site-2')
+        device = Device.objects.get(name='TestDevice1')
+        termination = CableTermination.objects.get(_device=device)
+
+        # Saving the device without modifying its site should not affect its terminations
+        CableTermination.objects.filter(pk=termination.pk).update(_site=None)
+        device.save()
+        termination.refresh_from_db()
+        self.assertIsNone(termination._site)
+
+        device.site = site
+        device.save()
+        termination.refresh_from_db()
+        self.assertEqual(termination._site, site)
+
+    def test_cable_termination_denormalized_fields_deferred(self):
+        """
+        Updates to the denormalized fields of CableTerminations made within deferred_updates() must be applied upon
+        exiting the context.
+        """
+        site = Site.objects.create(name='Test Site 2', slug='test-site-2')
+        device = Device.objects.get(name='TestDevice1')
+        termination = CableTermination.objects.get(_device=device)
+
+        with deferred_updates():
+            device.site = site
+            device.save()
+            termination.refresh_from_db()
+            self.assertNotEqual(termination._site, site)
+
+        termination.refresh_from_db()
+        self.assertEqual(termination._site, site)
+
     def test_cable_validates_same_parent_object(self):
         """
         The clean method should ensure that all terminations at either end of a Cable belong to the same parent object.
@@ -0,0 +1,522 @@
+import itertools
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+
+from circuits.models import CircuitTermination, ProviderNetwork
+from wireless.models import WirelessLink
+from .choices import LinkStatusChoices
+from .models import Cable, CablePath, CableTermination, FrontPort, RearPort, Site
+from .utils import compile_path_node, decompile_path_node
+
+__all__ = (
+    'CABLE_TRACE_BATCH_SIZE',
+    'CablePathTracer',
+)
+
+# The number of origins traced and saved per transaction
+CABLE_TRACE_BATCH_SIZE = 1000
+
+
+class CablePathTracer:
+    """
+    Trace CablePaths in bulk. Cables, cable terminations, front & rear port mappings, circuit terminations, and
+    wireless links are held in memory as adjacency maps, so that paths are traced without executing any queries per
+    hop. Paths are traced exactly as by CablePath.from_origin().
+
+    If preload is True, the complete topology is loaded from the database upon initialization. Otherwise, elements of
+    the topology are loaded in bulk as they are first encountered (or in advance, by load_paths()).
+
+    Terminations are represented internally as (ContentType ID, object ID) tuples.
+    """
+    def __init__(self, preload=True):
+        content_types = ContentType.objects.get_for_models(
+            Cable, WirelessLink, FrontPort, RearPort, CircuitTermination, ProviderNetwork, Site
+        )
+        self.cable_type = content_types[Cable].pk
+        self.wirelesslink_type = content_types[WirelessLink].pk
+        self.frontport_type = content_types[FrontPort].pk
+        self.rearport_type = content_types[RearPort].pk
+        self.circuittermination_type = content_types[CircuitTermination].pk
+        self.providernetwork_type = content_types[ProviderNetwork].pk
+        self.site_type = content_types[Site].pk
+
+        # Link (Cable & WirelessLink) statuses
+        self.link_status = {}
+
+        # Cable terminations, mapped from each terminating object and from each cable end
+        self.cable_terminations = {}
+        self.cable_ends = defaultdict(list)
+
+        # Wireless links
+        self.wireless_links = {}
+
+        # Links attached to mid-span terminations
+        self.links = {}
+
+        # Front ports, mapped from their rear port & position, and rear ports. Ports are ranked by their default
+        # ordering within each load.
+        self.front_ports = {}
+        self.front_port_rank = {}
+        self.rear_port_front_ports = defaultdict(list)
+        self.rear_port_positions = {}
+        self.rear_port_rank = {}
+
+        # Circuit terminations, mapped from their circuit & side
+        self.circuit_terminations = {}
+        self.circuit_sides = {}
+
+        self.preloaded = preload
+        self._loaded = defaultdict(set)
+        self._load_count = 0
+        self._loaders = {
+            Cable: self._load_cables,
+            WirelessLink: self._load_wireless_links,
+            FrontPort: self._load_front_ports,
+            RearPort: self._load_rear_ports,
+            CircuitTermination: self._load_circuit_terminations,
+        }
+        if preload:
+            for loader in self._loaders.values():
+                loader()
+
+    #
+    # Topology loading
+    #
+
+    def _load_cables(self, pks=None):
+        """
+        Load the specified cables (or all cables) and all of their terminations.
+        """
+        cables = Cable.objects.all()
+        cable_terminations = CableTermination.objects.order_by('pk')
+        if pks is not None:
+            cables = cables.filter(pk__in=pks)
+            cable_terminations = cable_terminations.filter(cable_id__in=pks)
+
+        for pk, status in cables.values_list('pk', 'status'):
+            self.link_status[(self.cable_type, pk)] = status
+        for cable_id, cable_end, type_id, object_id in cable_terminations.values_list(
+            'cable_id', 'cable_end', 'termination_type_id', 'termination_id'
+        ):
+            self.cable_terminations[(type_id, object_id)] = (cable_id, cable_end)
+            self.cable_ends[(cable_id, cable_end)].append((type_id, object_id))
+
+    def _load_wireless_links(self, pks=None):
+        wireless_links = WirelessLink.objects.all()
+        if pks is not None:
+            wireless_links = wireless_links.filter(pk__in=pks)
+
+        for pk, interface_a_id, interface_b_id, status in wireless_links.values_list(
+            'pk', 'interface_a_id', 'interface_b_id', 'status'
+        ):
+            self.wireless_links[pk] = (interface_a_id, interface_b_id)
+            self.link_status[(self.wirelesslink_type, pk)] = status
+
+    def _load_front_ports(self, pks=None, rear_port_ids=None):
+        front_ports = FrontPort.objects.all()
+        if pks is not None:
+            front_ports = front_ports.filter(pk__in=pks)
+        if rear_port_ids is not None:
+            front_ports = front_ports.filter(rear_port_id__in=rear_port_ids)
+
+        self._load_count += 1
+        for rank, (pk, rear_port_id, position, cable_id) in enumerate(front_ports.values_list(
+            'pk', 'rear_port_id', 'rear_port_position', 'cable_id'
+        )):
+            if pk in self.front_ports:
+                continue
+            self.front_ports[pk] = (rear_port_id, position)
+            self.front_port_rank[pk] = (self._load_count, rank)
+            self.rear_port_front_ports[(rear_port_id, position)].append(pk)
+            if cable_id:
+                self.links[(self.frontport_type, pk)] = (self.cable_type, cable_id)
+            self._loaded[FrontPort].add(pk)
+
+    def _load_rear_ports(self, pks=None):
+        """
+        Load the specified rear ports (or all rear ports) and all of their front ports.
+        """
+        rear_ports = RearPort.objects.all()
+        if pks is not None:
+            rear_ports = rear_ports.filter(pk__in=pks)
+
+        self._load_count += 1
+        for rank, (pk, positions, cable_id) in enumerate(rear_ports.values_list('pk', 'positions', 'cable_id')):
+            self.rear_port_positions[pk] = positions
+            self.rear_port_rank[pk] = (self._load_count, rank)
+            if cable_id:
+                self.links[(self.rearport_type, pk)] = (self.cable_type, cable_id)
+
+        if pks is not None:
+            self._load_front_ports(rear_port_ids=pks)
+
+    def _load_circuit_terminations(self, pks=None):
+        """
+        Load the specified circuit terminations (or all circuit terminations) and their peers.
+        """
+        circuit_terminations = CircuitTermination.objects.all()
+        if pks is not None:
+            circuit_terminations = circuit_terminations.filter(
+                circuit__in=CircuitTermination.objects.filter(pk__in=pks).values('circuit_id')
+            )
+
+        for pk, *attrs in circuit_terminations.values_list(
+            'pk', 'circuit_id', 'term_side', 'site_id', 'provider_network_id', 'cable_id'
+        ):
+            circuit_id, term_side, site_id, provider_network_id, cable_id = attrs
+            self.circuit_terminations[pk] = tuple(attrs)
+            self.circuit_sides.setdefault((circuit_id, term_side), pk)
+            if cable_id:
+                self.links[(self.circuittermination_type, pk)] = (self.cable_type, cable_id)
+            self._loaded[CircuitTermination].add(pk)
+
+    def _ensure_loaded(self, model, pks):
+        """
+        Load any of the specified objects which have not yet been loaded.
+        """
+        if self.preloaded:
+            return
+        if missing := set(pks) - self._loaded[model]:
+            self._loaders[model](missing)
+            self._loaded[model].update(missing)
+
+    def _ensure_links_loaded(self, links):
+        self._ensure_loaded(Cable, [pk for type_id, pk in links if type_id == self.cable_type])
+        self._ensure_loaded(WirelessLink, [pk for type_id, pk in links if type_id == self.wirelesslink_type])
+
+    def _ensure_terminations_loaded(self, terminations):
+        for model, type_id in (
+            (FrontPort, self.frontport_type),
+            (RearPort, self.rearport_type),
+            (CircuitTermination, self.circuittermination_type),
+        ):
+            self._ensure_loaded(model, [pk for t_type_id, pk in terminations if t_type_id == type_id])
+
+    def load_paths(self, cable_paths):
+        """
+        Load in bulk all elements of the topology traversed by the given CablePaths.
+        """
+        nodes = {decompile_path_node(node) for cp in cable_paths for node in cp._nodes}
+        self._ensure_links_loaded(nodes)
+        self._ensure_terminations_loaded(nodes)
+
+    def _sort(self, model, pks, ranks):
+        """
+        Return the given PKs in the default ordering of their model.
+        """
+        if len({ranks[pk][0] for pk in pks}) > 1:
+            # Ranks from different loads cannot be compared
+            return list(model.objects.filter(pk__in=pks).values_list('pk', flat=True))
+        return sorted(pks, key=ranks.get)
+
+    def get_origin_links(self, terminations):
+        """
+        Return a dictionary mapping each of the given terminations which exists to its attached link (if any).
+        """
+        pks_by_type = defaultdict(list)
+        for type_id, pk in terminations:
+            pks_by_type[type_id].append(pk)
+
+        origin_links = {}
+        for type_id, pks in pks_by_type.items():
+            model = ContentType.objects.get_for_id(type_id).model_class()
+            fields = ['pk', 'cable_id']
+            if hasattr(model, 'wireless_link'):
+                fields.append('wireless_link_id')
+            for pk, cable_id, *wireless_link_id in model.objects.filter(pk__in=pks).values_list(*fields):
+                if cable_id:
+                    origin_links[(type_id, pk)] = (self.cable_type, cable_id)
+                elif wireless_link_id and wireless_link_id[0]:
+                    origin_links[(type_id, pk)] = (self.wirelesslink_type, wireless_link_id[0])
+                else:
+                    origin_links[(type_id, pk)] = None
+
+        return origin_links
+
+    #
+    # Tracing
+    #
+
+    @staticmethod
+    def _node(termination):
+        return compile_path_node(*termination)
+
+    def _get_link(self, termination, origin_links):
+        if termination in origin_links:
+            return origin_links[termination]
+        return self.links.get(termination)
+
+    def _get_far_end(self, terminations, links):
+        """
+        Return the far-end terminations of the given links, ordered as CableTermination.
+        """
+        if links[0][0] == self.cable_type:
+            cable_ends = {
+                (cable_id, 'A' if cable_end == 'B' else 'B')
+                for cable_id, cable_end in filter(None, map(self.cable_terminations.get, terminations))
+            }
+            return [t for cable_end in sorted(cable_ends) for t in self.cable_ends.get(cable_end, [])]
+
+        # WirelessLink
+        remote_terminations = []
+        for _, link_id in links:
+            interface_a_id, interface_b_id = self.wireless_links[link_id]
+            peer_id = interface_b_id if interface_a_id == terminations[0][1] else interface_a_id
+            remote_terminations.append((terminations[0][0], peer_id))
+        return remote_terminations
+
+    def trace(self, terminations, origin_links=None):
+        """
+        Trace and return a new (unsaved) CablePath from the given terminations, or None if no link is attached.
+
+        Args:
+            terminations: A list of (ContentType ID, object ID) tuples identifying the originating objects
+            origin_links: A dictionary mapping each originating termination to its attached link, as a (ContentType
+                ID, object ID) tuple. Only required for terminations other than front ports, rear ports, and circuit
+                terminations.
+        """
+        origin_links = origin_links or {}
+        path = []
+        position_stack = []
+        is_complete = False
+        is_active = True
+        is_split = False
+
+        while terminations:
+            self._ensure_terminations_loaded(terminations)
+            term_links = [self._get_link(t, origin_links) for t in terminations]
+
+            # Check for a split path (e.g. rear port fanning out to multiple front ports with
+            # different cables attached)
+            if len(set(term_links)) > 1 and (position_stack and len(terminations) != len(position_stack[-1])):
+                is_split = True
+                break
+
+            # Step 1: Record the near-end termination object(s)
+            path.append([self._node(t) for t in terminations])
+
+            # Step 2: Determine the attached links (Cable or WirelessLink), if any
+            links = [link for link in term_links if link is not None]
+            if not links:
+                if len(path) == 1:
+                    return None
+                break
+            self._ensure_links_loaded(links)
+
+            # Step 3: Record asymmetric paths as split
+            if len(links) < len(term_links):
+                is_complete = False
+                is_split = True
+
+            # Step 4: Record the links, keeping cables in order to allow for SVG rendering
+            cables = []
+            for link in links:
+                if self._node(link) not in cables:
+                    cables.append(self._node(link))
+            path.append(cables)
+
+            # Step 5: Update the path status if a link is not connected
+            if any(self.link_status.get(link) != LinkStatusChoices.STATUS_CONNECTED for link in links):
+                is_active = False
+
+            # Step 6: Determine the far-end terminations
+            remote_terminations = self._get_far_end(terminations, links)
+
+            # Remote Terminations must all be of the same type, otherwise return a split path
+            remote_type = remote_terminations[0][0] if remote_terminations else None
+            if any(t[0] != remote_type for t in remote_terminations[1:]):
+                is_complete = False
+                is_split = True
+                break
+
+            # Step 7: Record the far-end termination object(s)
+            path.append([self._node(t) for t in remote_terminations])
+
+            # Step 8: Determine the "next hop" terminations, if applicable
+            if not remote_terminations:
+                break
+            self._ensure_terminations_loaded(remote_terminations)
+
+            if remote_type == self.frontport_type:
+                # Follow FrontPorts to their corresponding RearPorts
+                front_ports = [self.front_ports[pk] for _, pk in remote_terminations]
+                rear_port_ids = {rp_id for rp_id, _ in front_ports}
+                self._ensure_loaded(RearPort, rear_port_ids)
+                rear_port_ids = self._sort(RearPort, rear_port_ids, self.rear_port_rank)
+                if len(rear_port_ids) > 1 or self.rear_port_positions[rear_port_ids[0]] > 1:
+                    position_stack.append([position for _, position in front_ports])
+
+                terminations = [(self.rearport_type, pk) for pk in rear_port_ids]
+
+            elif remote_type == self.rearport_type:
+                rear_port_ids = [pk for _, pk in remote_terminations]
+                if len(rear_port_ids) == 1 and self.rear_port_positions[rear_port_ids[0]] == 1:
+                    keys = [(rear_port_ids[0], 1)]
+                # Obtain the individual front ports based on the termination and all positions
+                elif len(rear_port_ids) > 1 and position_stack:
+                    positions = position_stack.pop()
+
+                    # Ensure we have a number of positions equal to the amount of remote terminations
+                    assert len(rear_port_ids) == len(positions)
+
+                    keys = zip(rear_port_ids, reversed(positions))
+                # Obtain the individual front ports based on the termination and position
+                elif position_stack:
+                    keys = [(rear_port_ids[0], position) for position in position_stack.pop()]
+                else:
+                    # No position indicated: path has split, so we stop at the RearPorts
+                    is_split = True
+                    break
+
+                front_port_ids = {pk for key in keys for pk in self.rear_port_front_ports.get(key, [])}
+                terminations = [
+                    (self.frontport_type, pk) for pk in self._sort(FrontPort, front_port_ids, self.front_port_rank)
+                ]
+
+            elif remote_type == self.circuittermination_type:
+                # Follow a CircuitTermination to its corresponding CircuitTermination (A to Z or vice versa)
+                if len(remote_terminations) > 1:
+                    is_split = True
+                    break
+                circuit_id, term_side = self.circuit_terminations[remote_terminations[0][1]][:2]
+                peer_id = self.circuit_sides.get((circuit_id, 'Z' if term_side == 'A' else 'A'))
+                if peer_id is None:
+                    break
+                peer = (self.circuittermination_type, peer_id)
+                _, _, site_id, provider_network_id, cable_id = self.circuit_terminations[peer_id]
+                if provider_network_id:
+                    # Circuit terminates to a ProviderNetwork
+                    path.extend([
+                        [self._node(peer)],
+                        [self._node((self.providernetwork_type, provider_network_id))],
+                    ])
+                    is_complete = True
+                    break
+                elif site_id and not cable_id:
+                    # Circuit terminates to a Site
+                    path.extend([
+                        [self._node(peer)],
+                        [self._node((self.site_type, site_id))],
+                    ])
+                    break
+
+                terminations = [peer]
+
+            else:
+                # The path terminates at a set of endpoints of the same type
+                is_complete = True
+                break
+
+        return CablePath(
+            path=path,
+            is_complete=is_complete,
+            is_active=is_active,
+            is_split=is_split
+        )
+
+    def trace_origins(self, model, pks, batch_size=CABLE_TRACE_BATCH_SIZE):
+        """
+        Trace and save a new CablePath from each of the specified objects, and record it on the originating object.
+        Paths are created in batches (each within its own transaction) using bulk queries. Returns the number of
+        CablePaths created.
+
+        Args:
+            model: The model of the originating objects (a PathEndpoint subclass)
+            pks: An iterable of PKs of the originating objects
+            batch_size: The number of origins to trace and save per batch
+        """
+        type_id = ContentType.objects.get_for_model(model).pk
+
+        count = 0
+        pks = iter(pks)
+        while batch := list(itertools.islice(pks, batch_size)):
+            origins = self.get_origin_links([(type_id, pk) for pk in batch])
+
+            cable_paths = []
+            for origin in origins:
+                cp = self.trace([origin], origin_links=origins)
+                if cp is not None:
+                    cp._nodes = list(itertools.chain(*cp.path))
+                    cable_paths.append((origin[1], cp))
+
+            with transaction.atomic():
+                CablePath.objects.bulk_create([cp for _, cp in cable_paths])
+                model.objects.bulk_update(
+                    [model(pk=pk, _path_id=cp.pk) for pk, cp in cable_paths],
+                    ['_path']
+                )
+            count += len(cable_paths)
+
+        return count
+
+    def retrace(self, cable_paths, exclude=None):
+        """
+        Retrace the given CablePaths in bulk from their originating objects, as by CablePath.retrace(). Any paths which
+        no longer originate from a linked object are deleted. Returns the number of CablePaths retraced (including
+        those deleted).
+
+        Args:
+            cable_paths: An iterable of CablePaths
+            exclude: An iterable of (ContentType ID, object ID) tuples to be removed from the paths' origins
+        """
+        cable_paths = list(cable_paths)
+        if not cable_paths:
+            return 0
+        exclude = set(exclude or ())
+
+        # Load the current topology surrounding the paths and their origins
+        if not self.preloaded:
+            self.load_paths(cable_paths)
+        origins = {
+            cp.pk: [t for t in map(decompile_path_node, cp.path[0] if cp.path else []) if t not in exclude]
+            for cp in cable_paths
+        }
+        origin_links = self.get_origin_links(set(itertools.chain(*origins.values())))
+
+        to_update = []
+        to_delete = []
+        origin_paths = defaultdict(list)
+        for cp in cable_paths:
+            # Ignore any origins which have been deleted
+            terminations = [t for t in origins[cp.pk] if t in origin_links]
+            new_cp = self.trace(terminations, origin_links=origin_links) if terminations else None
+            if new_cp is None:
+                to_delete.append(cp.pk)
+                continue
+            cp.path = new_cp.path
+            cp.is_complete = new_cp.is_complete
+            cp.is_active = new_cp.is_active
+            cp.is_split = new_cp.is_split
+            cp._nodes = list(itertools.chain(*cp.path))
+            to_update.append(cp)
+            for type_id, pk in terminations:
+                origin_paths[type_id].append((pk, cp.pk))
+
+        with transaction.atomic():
+            if to_delete:
+                CablePath.objects.filter(pk__in=to_delete).delete()
+            CablePath.objects.bulk_update(to_update, ['path', 'is_complete', 'is_active', 'is_split', '_nodes'])
+
+            # Record each CablePath on its originating object(s)
+            for type_id, paths in origin_paths.items():
+                model = ContentType.objects.get_for_id(type_id).model_class()
+                model.objects.bulk_update([model(pk=pk, _path_id=cp_pk) for pk, cp_pk in paths], ['_path'])
+
+        return len(cable_paths)
+    retrace.alters_data = True
+
+    def get_origins(self, model, missing_only=False):
+        """
+        Return the PKs of all objects of the given model from which a CablePath may originate. If missing_only is True,
+        only objects which have no CablePath recorded are returned.
+        """
+        params = Q(cable__isnull=False)
+        if hasattr(model, 'wireless_link'):
+            params |= Q(wireless_link__isnull=False)
+        origins = model.objects.filter(params)
+        if missing_only:
+            origins = origins.filter(_path__isnull=True)
+        return list(origins.order_by('pk').values_list('pk', flat=True))
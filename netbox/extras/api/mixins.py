@@ -2,8 +2,11 @@ from jinja2.exceptions import TemplateError
 from rest_framework.decorators import action
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from rest_framework.status import HTTP_400_BAD_REQUEST
+from rest_framework.status import HTTP_202_ACCEPTED, HTTP_400_BAD_REQUEST
 
+from core.api.serializers import JobSerializer
+from extras.jobs import enqueue_config_render
+from extras.models import ConfigTemplate
 from netbox.api.renderers import TextRenderer
 from .serializers import ConfigTemplateSerializer
 
@@ -83,3 +86,38 @@ class RenderConfigMixin(ConfigTemplateRenderMixin):
         context_data.update({object_type: instance})
 
         return self.render_configtemplate(request, configtemplate, context_data)
+
+    @action(detail=False, methods=['post'], url_path='render-configs')
+    def render_configs(self, request):
+        """
+        Render the configs of all objects matching the specified filters in the background, using the ConfigTemplate
+        specified by ID (if any) or otherwise the ConfigTemplate assigned to each object. Returns the enqueued Jobs,
+        each of which produces an archive of rendered configs.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        object_type = queryset.model._meta.model_name
+
+        configtemplate = None
+        if configtemplate_id := request.data.get('config_template'):
+            try:
+                configtemplate = ConfigTemplate.objects.restrict(request.user, 'view').get(pk=configtemplate_id)
+            except (ConfigTemplate.DoesNotExist, TypeError, ValueError):
+                return Response({
+                    'error': f'Invalid config template: {configtemplate_id}'
+                }, status=HTTP_400_BAD_REQUEST)
+
+        context = request.data.get('context') or {}
+        if type(context) is not dict:
+            return Response({
+                'error': 'Context data must be in object form.'
+            }, status=HTTP_400_BAD_REQUEST)
+
+        if not queryset.exists():
+            return Response({
+                'error': f'No {object_type} matches the specified filters.'
+            }, status=HTTP_400_BAD_REQUEST)
+
+        jobs = enqueue_config_render(request.user, queryset, config_template=configtemplate, context=context)
+        serializer = JobSerializer(jobs, many=True, context={'request': request})
+
+        return Response(serializer.data, status=HTTP_202_ACCEPTED)
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import logging
+
+from django.apps import apps
+from django.db import transaction
+from mptt.models import MPTTModel
+
+from core.choices import JobStatusChoices
+from core.models import Job, ObjectType
+from utilities.data import deepmerge
+
+__all__ = (
+    'CONFIG_CONTEXT_BATCH_SIZE',
+    'enqueue_config_context_refresh',
+    'get_config_context_hash',
+    'get_config_context_models',
+    'get_config_context_objects',
+    'has_changed',
+    'invalidate_config_contexts',
+    'invalidate_related_config_contexts',
+    'merge_config_contexts',
+    'refresh_config_contexts',
+    'update_materialized_config_context',
+)
+
+logger = logging.getLogger('netbox.extras.configcontexts')
+
+# The number of objects for which config contexts are materialized per transaction
+CONFIG_CONTEXT_BATCH_SIZE = 1000
+
+# The fields of a Device or VirtualMachine which determine the ConfigContexts applicable to it
+CONFIG_CONTEXT_OBJECT_FIELDS = {
+    'dcim.device': ('site', 'location', 'device_type', 'role', 'platform', 'cluster', 'tenant'),
+    'virtualization.virtualmachine': ('site', 'role', 'platform', 'cluster', 'tenant'),
+}
+
+# The fields of related objects which determine the ConfigContexts applicable to a Device or VirtualMachine, and the
+# lookup relating each Device or VirtualMachine to the object. For hierarchical models, all descendants are included.
+CONFIG_CONTEXT_RELATED_FIELDS = {
+    'dcim.region': (('parent',), 'site__region'),
+    'dcim.site': (('region', 'group'), 'site'),
+    'dcim.sitegroup': (('parent',), 'site__group'),
+    'tenancy.tenant': (('group',), 'tenant'),
+    'virtualization.cluster': (('type', 'group'), 'cluster'),
+}
+
+# Each ConfigContext assignment field, the lookup relating a Device or VirtualMachine to the assigned objects, and
+# whether the assigned objects' descendants are also matched
+CONFIG_CONTEXT_ASSIGNMENTS = (
+    ('regions', 'site__region', True),
+    ('site_groups', 'site__group', True),
+    ('sites', 'site', False),
+    ('locations', 'location', False),
+    ('device_types', 'device_type', False),
+    ('roles', 'role', False),
+    ('platforms', 'platform', False),
+    ('cluster_types', 'cluster__type', False),
+    ('cluster_groups', 'cluster__group', False),
+    ('clusters', 'cluster', False),
+    ('tenant_groups', 'tenant__group', False),
+    ('tenants', 'tenant', False),
+    ('tags', 'tags', False),
+)
+
+
+def get_config_context_models():
+    """
+    Return the models for which config contexts are rendered.
+    """
+    return [apps.get_model(label) for label in CONFIG_CONTEXT_OBJECT_FIELDS]
+
+
+def merge_config_contexts(contexts):
+    """
+    Merge the data of a list of ConfigContexts (ordered by weight), overwriting lower-weight values with higher-weight
+    values where a collision occurs.
+    """
+    data = {}
+    for context in contexts or []:
+        data = deepmerge(data, context)
+    return data
+
+
+def get_config_context_hash(data):
+    """
+    Return a hash of rendered config context data.
+    """
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def has_changed(instance, fields):
+    """
+    Return True if the instance has not yet been saved, or if any of the given fields differ from their values in the
+    database.
+    """
+    if instance._state.adding:
+        return True
+    attnames = [instance._meta.get_field(field).attname for field in fields]
+    saved = instance._meta.model.objects.filter(pk=instance.pk).values_list(*attnames).first()
+    return saved != tuple(getattr(instance, attname) for attname in attnames)
+
+
+def get_config_context_objects(model, config_context):
+    """
+    Return a QuerySet of all objects of the given model to which the ConfigContext is assigned (regardless of whether
+    it is active).
+    """
+    if model._meta.model_name == 'virtualmachine' and config_context.device_types.exists():
+        return model.objects.none()
+
+    queryset = model.objects.all()
+    for field_name, lookup, include_descendants in CONFIG_CONTEXT_ASSIGNMENTS:
+        field = config_context._meta.get_field(field_name)
+        if not hasattr(model, lookup.split('__')[0]):
+            continue
+        assigned = getattr(config_context, field_name).all()
+        if not assigned.exists():
+            continue
+        if include_descendants:
+            assigned = field.related_model.objects.get_queryset_descendants(assigned, include_self=True)
+        queryset = queryset.filter(**{f'{lookup}__in': assigned})
+
+    return model.objects.filter(pk__in=queryset.values('pk'))
+
+
+def invalidate_config_contexts(*querysets):
+    """
+    Discard the materialized config contexts of all objects in the given QuerySets, and enqueue a job to render them
+    again.
+    """
+    total = 0
+    for queryset in querysets:
+        count = queryset.exclude(_config_context_hash__isnull=True).update(
+            _config_context=None,
+            _config_context_hash=None
+        )
+        logger.debug(f'Invalidated {count} {queryset.model._meta.verbose_name_plural} config contexts')
+        total += count
+    if total:
+        enqueue_config_context_refresh()
+
+
+def update_materialized_config_context(instance):
+    """
+    Prepare the materialized config context of a Device or VirtualMachine to be saved: discard it if the instance is
+    new or if any of the fields which determine its applicable ConfigContexts have changed. Otherwise, retain the value
+    currently saved in the database, which may have been invalidated or rendered since the instance was retrieved.
+    """
+    attnames = [
+        instance._meta.get_field(field).attname for field in CONFIG_CONTEXT_OBJECT_FIELDS[instance._meta.label_lower]
+    ]
+    saved = None
+    if not instance._state.adding:
+        saved = instance._meta.model.objects.filter(pk=instance.pk).values_list(
+            *attnames, '_config_context', '_config_context_hash'
+        ).first()
+
+    if saved is None or saved[:-2] != tuple(getattr(instance, attname) for attname in attnames):
+        instance._config_context = None
+        instance._config_context_hash = None
+    else:
+        instance._config_context, instance._config_context_hash = saved[-2:]
+
+    if instance._config_context_hash is None:
+        enqueue_config_context_refresh()
+
+
+def invalidate_related_config_contexts(instance):
+    """
+    Invalidate the config contexts of all objects related to the given instance (see CONFIG_CONTEXT_RELATED_FIELDS).
+    """
+    fields, lookup = CONFIG_CONTEXT_RELATED_FIELDS[instance._meta.label_lower]
+    if isinstance(instance, MPTTModel):
+        params = {f'{lookup}__in': instance.get_descendants(include_self=True)}
+    else:
+        params = {lookup: instance}
+    invalidate_config_contexts(*[
+        model.objects.filter(**params) for model in get_config_context_models()
+    ])
+
+
+def enqueue_config_context_refresh():
+    """
+    Enqueue a job to materialize all invalidated config contexts once the current transaction has been committed,
+    unless such a job is already pending.
+    """
+    def enqueue():
+        from extras.models import ConfigContext
+
+        object_type = ObjectType.objects.get_for_model(ConfigContext)
+        pending_jobs = Job.objects.filter(
+            object_type=object_type,
+            object_id__isnull=True,
+            name=refresh_config_contexts.__name__,
+            status=JobStatusChoices.STATUS_PENDING
+        )
+        if not pending_jobs.exists():
+            Job.enqueue(refresh_config_contexts, instance=ConfigContext, name=refresh_config_contexts.__name__)
+
+    transaction.on_commit(enqueue)
+
+
+def refresh_config_contexts(job=None, batch_size=CONFIG_CONTEXT_BATCH_SIZE, *args, **kwargs):
+    """
+    Render and save the config context of every object for which it has not been materialized (or has been
+    invalidated). Objects are locked while their config contexts are rendered, so that any concurrent invalidation
+    takes effect only once they have been saved. Returns the number of objects updated.
+    """
+    if job:
+        job.start()
+
+    count = 0
+    try:
+        for model in get_config_context_models():
+            while True:
+                with transaction.atomic():
+                    pks = list(
+                        model.objects.filter(_config_context_hash__isnull=True).order_by('pk').select_for_update(
+                            skip_locked=True
+                        ).values_list('pk', flat=True)[:batch_size]
+                    )
+                    if not pks:
+                        break
+
+                    objects = []
+                    for pk, contexts in model.objects.filter(pk__in=pks).annotate_config_context_data(
+                        materialized=False
+                    ).values_list('pk', 'config_context_data'):
+                        data = merge_config_contexts(contexts)
+                        objects.append(
+                            model(pk=pk, _config_context=data, _config_context_hash=get_config_context_hash(data))
+                        )
+                    model.objects.bulk_update(objects, ['_config_context', '_config_context_hash'])
+                    count += len(objects)
+
+    except Exception as e:
+        if job:
+            job.terminate(status=JobStatusChoices.STATUS_ERRORED, error=repr(e))
+        raise e
+
+    logger.info(f'Materialized {count} config contexts')
+    if job:
+        job.data = {'count': count}
+        job.terminate()
+
+    return count
@@ -1,6 +1,12 @@
 from contextlib import contextmanager
 
-from netbox.context import current_request, events_queue
+from ipam.utils import update_prefix_hierarchy
+from netbox import denormalized
+from netbox.context import (
+    current_request, denormalized_queue, events_queue, prefix_hierarchy_queue, search_cache_queue,
+)
+from netbox.search.backends import search_backend
+from utilities.counters import deferred_counters
 from .events import flush_events
 
 
@@ -8,19 +14,61 @@ from .events import flush_events
 def event_tracking(request):
     """
     Queue interesting events in memory while processing a request, then flush that queue for processing by the
-    events pipline before returning the response.
+    events pipline before returning the response. Updates to the search cache are likewise deferred and applied in
+    bulk once the request has been processed.
 
     :param request: WSGIRequest object with a unique `id` set
     """
     current_request.set(request)
     events_queue.set({})
+    search_cache_queue.set({})
 
-    yield
+    try:
+        yield
 
-    # Flush queued webhooks to RQ
-    if events := list(events_queue.get().values()):
-        flush_events(events)
+        # Update the search cache for any created or modified objects
+        if queue := search_cache_queue.get():
+            search_backend.flush(queue)
 
-    # Clear context vars
-    current_request.set(None)
-    events_queue.set({})
+        # Flush queued webhooks to RQ
+        if events := list(events_queue.get().values()):
+            flush_events(events)
+
+    finally:
+        # Clear context vars
+        current_request.set(None)
+        events_queue.set({})
+        search_cache_queue.set(None)
+
+
+@contextmanager
+def deferred_updates():
+    """
+    Defer updates to counter fields, denormalized fields, and the prefix hierarchy made within the context, applying
+    them in bulk upon exit. This should be employed within a transaction, so that the deferred updates are committed
+    (or rolled back) along with the changes which prompted them. Queued changes are discarded if an exception is
+    raised. Nested contexts defer to the outermost context.
+    """
+    if prefix_hierarchy_queue.get() is not None:
+        with deferred_counters():
+            yield
+        return
+
+    denormalized_token = denormalized_queue.set({})
+    prefix_hierarchy_token = prefix_hierarchy_queue.set({})
+    try:
+        with deferred_counters():
+            yield
+        denormalized_updates = denormalized_queue.get()
+        prefix_hierarchy_updates = prefix_hierarchy_queue.get()
+    finally:
+        denormalized_queue.reset(denormalized_token)
+        prefix_hierarchy_queue.reset(prefix_hierarchy_token)
+
+    # Propagate changes to any denormalized fields
+    if denormalized_updates:
+        denormalized.flush_updates(denormalized_updates)
+
+    # Update the depth & children counts of any affected prefixes
+    if prefix_hierarchy_updates:
+        update_prefix_hierarchy(prefix_hierarchy_updates)
@@ -1,16 +1,25 @@
+import logging
+import threading
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 from django.utils.module_loading import import_string
 from django.utils.translation import gettext as _
 from django_rq import get_queue
+from rq import Retry
 
 from core.models import Job
 from netbox.config import get_config
 from netbox.constants import RQ_QUEUE_DEFAULT
 from netbox.registry import registry
-from utilities.api import get_serializer_for_model
+from utilities.api import get_prefetches_for_serializer, get_serializer_for_model
 from utilities.rqworker import get_rq_retry
 from utilities.serialization import serialize_object
 from .choices import *
@@ -18,6 +27,93 @@ from .models import EventRule
 
 logger = logging.getLogger('netbox.events_processor')
 
+DEFAULT_EVENTS_PIPELINE = ('extras.events.process_event_queue',)
+EVENT_RULES_VERSION_CACHE_KEY = 'event_rules_version'
+EVENT_RULE_ACTION_FLAGS = ('type_create', 'type_update', 'type_delete', 'type_job_start', 'type_job_end')
+EVENT_ACTION_FLAGS = {
+    ObjectChangeActionChoices.ACTION_CREATE: 'type_create',
+    ObjectChangeActionChoices.ACTION_UPDATE: 'type_update',
+    ObjectChangeActionChoices.ACTION_DELETE: 'type_delete',
+}
+
+
+class EventRuleIndex:
+    """
+    A process-wide index of all enabled EventRules, keyed by object type and action flag (e.g. "type_create"). The
+    conditions of each rule are compiled once, when the index is built. A version identifier shared among all
+    processes via the cache is checked before the index is used, and the index is rebuilt whenever it has changed
+    (see invalidate()).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._rules = {}
+
+    def invalidate(self):
+        """
+        Force the index to be rebuilt by this process, and assign a new version identifier to force all other
+        processes to do the same. If called within a transaction, the new version is assigned once the transaction
+        has been committed.
+        """
+        self._version = None
+        transaction.on_commit(lambda: cache.set(EVENT_RULES_VERSION_CACHE_KEY, uuid.uuid4().hex, None))
+
+    def _build(self):
+        rules = defaultdict(list)
+        for event_rule in EventRule.objects.filter(enabled=True).prefetch_related('object_types'):
+            try:
+                condition_set = event_rule.get_condition_set()
+            except ValueError as e:
+                logger.error(f"Skipping event rule {event_rule} due to invalid conditions: {e}")
+                continue
+            for object_type in event_rule.object_types.all():
+                for action_flag in EVENT_RULE_ACTION_FLAGS:
+                    if getattr(event_rule, action_flag):
+                        rules[(object_type.pk, action_flag)].append((event_rule.pk, condition_set))
+        return dict(rules)
+
+    def refresh(self):
+        """
+        Rebuild the index if its version has changed.
+        """
+        version = cache.get(EVENT_RULES_VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(EVENT_RULES_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+            version = cache.get(EVENT_RULES_VERSION_CACHE_KEY)
+        if version is None or version != self._version:
+            with self._lock:
+                self._rules = self._build()
+                self._version = version
+
+    def has_rules(self, object_type, action):
+        """
+        Return True if any enabled event rules exist for the given object type and action (e.g. "create").
+        """
+        return (object_type.pk, EVENT_ACTION_FLAGS[action]) in self._rules
+
+    def match(self, events):
+        """
+        Evaluate the given queued events against the index. Return a list of two-tuples, each comprising an event
+        and the PKs of all event rules which apply to it. Events for which no rules apply are omitted.
+        """
+        self.refresh()
+        rules = self._rules
+
+        matches = []
+        for event in events:
+            action_flag = EVENT_ACTION_FLAGS[event['event']]
+            event_rule_pks = [
+                pk for pk, condition_set in rules.get((event['content_type'].pk, action_flag), [])
+                if condition_set is None or condition_set.eval(event['data'])
+            ]
+            if event_rule_pks:
+                matches.append((event, event_rule_pks))
+
+        return matches
+
+
+event_rule_index = EventRuleIndex()
+
 
 def serialize_for_event(instance):
     """
@@ -47,10 +143,21 @@ def get_snapshots(instance, action):
     return snapshots
 
 
+def is_event_required(object_type, action):
+    """
+    Return True if an event for the given object type and action (e.g. "create") may need to be processed. When only
+    the default events pipeline is in use, this is the case only if one or more enabled event rules exist for it.
+    """
+    if tuple(settings.EVENTS_PIPELINE) != DEFAULT_EVENTS_PIPELINE:
+        return True
+    return event_rule_index.has_rules(object_type, action)
+
+
 def enqueue_object(queue, instance, user, request_id, action):
     """
-    Enqueue a serialized representation of a created/updated/deleted object for the processing of
-    events once the request has completed.
+    Enqueue a created/updated/deleted object for the processing of events once the request has completed. Serialization
+    of created and updated objects is deferred until the queue is flushed (see serialize_events()); deleted objects
+    are serialized immediately, if an event may need to be processed for them.
     """
     # Determine whether this type of object supports event rules
     app_label = instance._meta.app_label
@@ -60,120 +167,206 @@ def enqueue_object(queue, instance, user, request_id, action):
 
     assert instance.pk is not None
     key = f'{app_label}.{model_name}:{instance.pk}'
-    if key in queue:
-        queue[key]['data'] = serialize_for_event(instance)
-        queue[key]['snapshots']['postchange'] = get_snapshots(instance, action)['postchange']
-    else:
+    if key not in queue:
         queue[key] = {
             'content_type': ContentType.objects.get_for_model(instance),
             'object_id': instance.pk,
             'event': action,
-            'data': serialize_for_event(instance),
-            'snapshots': get_snapshots(instance, action),
+            'data': None,
+            'snapshots': {
+                'prechange': getattr(instance, '_prechange_snapshot', None),
+                'postchange': None,
+            },
             'username': user.username,
             'request_id': request_id
         }
 
+    # Deleted objects cannot be retrieved later, so must be serialized now
+    if action == ObjectChangeActionChoices.ACTION_DELETE:
+        event_rule_index.refresh()
+        if is_event_required(queue[key]['content_type'], queue[key]['event']):
+            queue[key]['data'] = serialize_for_event(instance)
+        queue[key]['snapshots']['postchange'] = None
+    else:
+        queue[key]['data'] = None
+
+
+def serialize_events(events):
+    """
+    Populate the serialized data and post-change snapshot of any queued events for which serialization has been
+    deferred, and return the list of events to be processed. Events which do not need to be processed (see
+    is_event_required()) are discarded without being serialized. Objects of each model are retrieved from the database
+    with a single query, prefetching any related objects required by the model's serializer.
+    """
+    if not events:
+        return []
+    event_rule_index.refresh()
+
+    ret = []
+    pending_events = defaultdict(list)
+    for event in events:
+        if not is_event_required(event['content_type'], event['event']):
+            continue
+        if event['data'] is None:
+            pending_events[event['content_type'].model_class()].append(event)
+        ret.append(event)
+
+    # Serialize objects in bulk, discarding events for any objects which no longer exist
+    discarded = set()
+    for model, model_events in pending_events.items():
+        prefetches = get_prefetches_for_serializer(get_serializer_for_model(model))
+        instances = model.objects.filter(
+            pk__in=[event['object_id'] for event in model_events]
+        ).prefetch_related(*prefetches).in_bulk()
+        for event in model_events:
+            if instance := instances.get(event['object_id']):
+                event['data'] = serialize_for_event(instance)
+                event['snapshots']['postchange'] = get_snapshots(instance, event['event'])['postchange']
+            else:
+                discarded.add(id(event))
+
+    return [event for event in ret if id(event) not in discarded]
+
+
+def enqueue_event_rule_action(event_rule, model_name, event, data, username=None, snapshots=None, request_id=None):
+    """
+    Enqueue the action of an EventRule for background processing.
+    """
+    # Webhooks
+    if event_rule.action_type == EventRuleActionChoices.WEBHOOK:
+
+        # Select the appropriate RQ queue
+        queue_name = get_config().QUEUE_MAPPINGS.get('webhook', RQ_QUEUE_DEFAULT)
+        rq_queue = get_queue(queue_name)
+
+        # Compile the task parameters
+        params = {
+            "event_rule": event_rule,
+            "model_name": model_name,
+            "event": event,
+            "data": data,
+            "snapshots": snapshots,
+            "timestamp": timezone.now().isoformat(),
+            "username": username,
+            "retry": get_rq_retry()
+        }
+        if snapshots:
+            params["snapshots"] = snapshots
+        if request_id:
+            params["request_id"] = request_id
+
+        # Enqueue the task
+        rq_queue.enqueue(
+            "extras.webhooks.send_webhook",
+            **params
+        )
+
+    # Scripts
+    elif event_rule.action_type == EventRuleActionChoices.SCRIPT:
+        # Resolve the script from action parameters
+        script = event_rule.action_object.python_class()
+        user = get_user_model().objects.get(username=username) if username else None
+
+        # Enqueue a Job to record the script's execution
+        Job.enqueue(
+            "extras.scripts.run_script",
+            instance=event_rule.action_object,
+            name=script.name,
+            user=user,
+            data=data
+        )
 
-def process_event_rules(event_rules, model_name, event, data, username=None, snapshots=None, request_id=None):
-    if username:
-        user = get_user_model().objects.get(username=username)
     else:
-        user = None
+        raise ValueError(_("Unknown action type for an event rule: {action_type}").format(
+            action_type=event_rule.action_type
+        ))
 
+
+def enqueue_webhook_dispatch(webhook_events, delay=None, retries_left=None):
+    """
+    Enqueue a single job to deliver all events for each webhook using the webhook dispatcher.
+
+    Args:
+        webhook_events: A dictionary mapping each Webhook to a list of events
+        delay: The number of seconds by which to delay the jobs (optional)
+        retries_left: The number of times the jobs may be retried, if fewer than RQ_RETRY_MAX (optional)
+    """
+    queue_name = get_config().QUEUE_MAPPINGS.get('webhook', RQ_QUEUE_DEFAULT)
+    rq_queue = get_queue(queue_name)
+
+    retry = get_rq_retry()
+    if retry and retries_left is not None:
+        retry = Retry(max=retries_left, interval=retry.intervals) if retries_left > 0 else None
+
+    for webhook, events in webhook_events.items():
+        kwargs = {
+            'webhook': webhook,
+            'events': events,
+            'retry': retry,
+        }
+        if delay:
+            rq_queue.enqueue_in(timedelta(seconds=delay), "extras.webhooks.dispatch_webhooks", **kwargs)
+        else:
+            rq_queue.enqueue("extras.webhooks.dispatch_webhooks", **kwargs)
+
+
+def process_event_rules(event_rules, model_name, event, data, username=None, snapshots=None, request_id=None):
     for event_rule in event_rules:
 
         # Evaluate event rule conditions (if any)
         if not event_rule.eval_conditions(data):
             continue
 
-        # Webhooks
-        if event_rule.action_type == EventRuleActionChoices.WEBHOOK:
-
-            # Select the appropriate RQ queue
-            queue_name = get_config().QUEUE_MAPPINGS.get('webhook', RQ_QUEUE_DEFAULT)
-            rq_queue = get_queue(queue_name)
-
-            # Compile the task parameters
-            params = {
-                "event_rule": event_rule,
-                "model_name": model_name,
-                "event": event,
-                "data": data,
-                "snapshots": snapshots,
-                "timestamp": timezone.now().isoformat(),
-                "username": username,
-                "retry": get_rq_retry()
-            }
-            if snapshots:
-                params["snapshots"] = snapshots
-            if request_id:
-                params["request_id"] = request_id
-
-            # Enqueue the task
-            rq_queue.enqueue(
-                "extras.webhooks.send_webhook",
-                **params
-            )
-
-        # Scripts
-        elif event_rule.action_type == EventRuleActionChoices.SCRIPT:
-            # Resolve the script from action parameters
-            script = event_rule.action_object.python_class()
-
-            # Enqueue a Job to record the script's execution
-            Job.enqueue(
-                "extras.scripts.run_script",
-                instance=event_rule.action_object,
-                name=script.name,
-                user=user,
-                data=data
-            )
-
-        else:
-            raise ValueError(_("Unknown action type for an event rule: {action_type}").format(
-                action_type=event_rule.action_type
-            ))
+        enqueue_event_rule_action(event_rule, model_name, event, data, username, snapshots, request_id)
 
 
 def process_event_queue(events):
     """
     Flush a list of object representation to RQ for EventRule processing.
     """
-    events_cache = {
-        'type_create': {},
-        'type_update': {},
-        'type_delete': {},
-    }
+    # Evaluate all events against the compiled event rule index
+    matches = event_rule_index.match(events)
+    if not matches:
+        return
 
-    for data in events:
-        action_flag = {
-            ObjectChangeActionChoices.ACTION_CREATE: 'type_create',
-            ObjectChangeActionChoices.ACTION_UPDATE: 'type_update',
-            ObjectChangeActionChoices.ACTION_DELETE: 'type_delete',
-        }[data['event']]
-        content_type = data['content_type']
-
-        # Cache applicable Event Rules
-        if content_type not in events_cache[action_flag]:
-            events_cache[action_flag][content_type] = EventRule.objects.filter(
-                **{action_flag: True},
-                object_types=content_type,
-                enabled=True
-            )
-        event_rules = events_cache[action_flag][content_type]
-
-        process_event_rules(
-            event_rules, content_type.model, data['event'], data['data'], data['username'],
-            snapshots=data['snapshots'], request_id=data['request_id']
-        )
+    # Retrieve all matched event rules with a single query
+    event_rule_pks = {pk for _, pks in matches for pk in pks}
+    event_rules = EventRule.objects.filter(
+        pk__in=event_rule_pks,
+        enabled=True
+    ).prefetch_related('action_object').in_bulk()
+
+    # If the webhook dispatcher is enabled, collect all events for each webhook to be delivered by a single job
+    webhook_events = defaultdict(list) if settings.WEBHOOK_DISPATCHER_ENABLED else None
+
+    for data, pks in matches:
+        for pk in pks:
+            if event_rule := event_rules.get(pk):
+                if webhook_events is not None and event_rule.action_type == EventRuleActionChoices.WEBHOOK:
+                    webhook_events[event_rule.action_object].append({
+                        'model_name': data['content_type'].model,
+                        'event': data['event'],
+                        'data': data['data'],
+                        'timestamp': timezone.now().isoformat(),
+                        'username': data['username'],
+                        'request_id': data['request_id'],
+                        'snapshots': data['snapshots'],
+                    })
+                    continue
+                enqueue_event_rule_action(
+                    event_rule, data['content_type'].model, data['event'], data['data'], data['username'],
+                    snapshots=data['snapshots'], request_id=data['request_id']
+                )
+
+    if webhook_events:
+        enqueue_webhook_dispatch(webhook_events)
 
 
 def flush_events(events):
     """
     Flush a list of object representations to RQ for event processing.
     """
-    if events:
+    if events := serialize_events(events):
         for name in settings.EVENTS_PIPELINE:
             try:
                 func = import_string(name)
@@ -0,0 +1,166 @@
+import io
+import logging
+import tarfile
+import tempfile
+import time
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils.text import get_valid_filename
+from jinja2.exceptions import TemplateError
+
+from core.choices import JobStatusChoices
+from core.models import Job
+
+__all__ = (
+    'CONFIG_RENDER_BATCH_SIZE',
+    'enqueue_config_render',
+    'iter_rendered_configs',
+    'render_configs',
+)
+
+logger = logging.getLogger('netbox.extras.jobs')
+
+# The maximum number of objects for which configs are rendered by a single job
+CONFIG_RENDER_BATCH_SIZE = 1000
+
+# The number of objects retrieved from the database at a time when rendering configs
+CONFIG_RENDER_CHUNK_SIZE = 200
+
+CONFIG_RENDER_ARTIFACT_PATH = 'configs/{job_id}/{filename}'
+
+
+def iter_rendered_configs(queryset, config_template=None, context=None):
+    """
+    Render the config of each object in a QuerySet of devices or virtual machines, and yield a three-tuple of the
+    object, the rendered output, and an error message (if rendering failed). Config context data is retrieved in bulk,
+    and each ConfigTemplate is compiled only once.
+
+    Args:
+        queryset: The objects for which configs are rendered
+        config_template: The ConfigTemplate to render. If not specified, the template assigned to each object is used.
+        context: A dictionary of additional context data, as for the render-config API endpoint
+    """
+    object_type = queryset.model._meta.model_name
+    queryset = queryset.annotate_config_context_data().select_related(
+        'config_template', 'role__config_template', 'platform__config_template'
+    )
+    templates = {}
+
+    for instance in queryset.iterator(chunk_size=CONFIG_RENDER_CHUNK_SIZE):
+        configtemplate = config_template or instance.get_config_template()
+        if configtemplate is None:
+            yield instance, None, f'No config template found for this {object_type}.'
+            continue
+
+        context_data = instance.get_config_context()
+        context_data.update(context or {})
+        context_data.update({object_type: instance})
+
+        try:
+            if configtemplate.pk not in templates:
+                templates[configtemplate.pk] = configtemplate.get_template()
+            output = configtemplate.render(context=context_data, template=templates[configtemplate.pk])
+        except TemplateError as e:
+            yield instance, None, f"An error occurred while rendering the template (line {e.lineno}): {e}"
+            continue
+
+        yield instance, output, None
+
+
+def get_config_filename(instance):
+    """
+    Return the name of the file to which the rendered config of an object is written.
+    """
+    if getattr(instance, 'name', None):
+        return f'{instance.pk}-{get_valid_filename(instance.name)}.txt'
+    return f'{instance.pk}.txt'
+
+
+def render_configs(job, model, pks, filename, config_template=None, context=None, *args, **kwargs):
+    """
+    Render the configs of the specified devices or virtual machines to a gzip-compressed tar archive artifact,
+    containing one file per object. Any rendering errors are recorded in the Job's data.
+
+    Args:
+        job: The Job tracking the rendering
+        model: The model of the objects to render (Device or VirtualMachine)
+        pks: The primary keys of the objects to render
+        filename: The name of the archive
+        config_template: The ConfigTemplate to render. If not specified, the template assigned to each object is used.
+        context: A dictionary of additional context data
+    """
+    try:
+        job.start()
+
+        count = 0
+        errors = {}
+        timestamp = time.time()
+        queryset = model.objects.filter(pk__in=pks).order_by('pk')
+
+        # Write the archive to a temporary file, then save it to the configured storage backend
+        with tempfile.TemporaryFile() as f:
+            with tarfile.open(fileobj=f, mode='w:gz') as archive:
+                for instance, output, error in iter_rendered_configs(queryset, config_template, context):
+                    if error:
+                        errors[instance.pk] = error
+                        continue
+                    content = output.encode('utf-8')
+                    info = tarfile.TarInfo(name=get_config_filename(instance))
+                    info.size = len(content)
+                    info.mtime = timestamp
+                    archive.addfile(info, io.BytesIO(content))
+                    count += 1
+            size = f.tell()
+            f.seek(0)
+            path = CONFIG_RENDER_ARTIFACT_PATH.format(job_id=job.job_id, filename=filename)
+            path = default_storage.save(path, File(f))
+
+        logger.info(f"Rendered {count} configs ({len(errors)} errors)")
+        job.data = {
+            'artifact': {
+                'path': path,
+                'filename': filename,
+                'content_type': 'application/gzip',
+                'size': size,
+            },
+            'rendered': count,
+            'errors': errors,
+        }
+        job.terminate()
+
+    except Exception as e:
+        job.terminate(status=JobStatusChoices.STATUS_ERRORED, error=repr(e))
+        raise e
+
+
+def enqueue_config_render(user, queryset, config_template=None, context=None, batch_size=CONFIG_RENDER_BATCH_SIZE):
+    """
+    Enqueue Jobs to render the configs of all objects in the given QuerySet in the background (see render_configs()).
+    The objects are divided into batches, each rendered by a separate Job, such that the work can be distributed among
+    multiple background workers.
+
+    Returns a list of the enqueued Jobs.
+    """
+    model = queryset.model
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+    basename = model._meta.verbose_name_plural.replace(' ', '_')
+    batches = [pks[i:i + batch_size] for i in range(0, len(pks), batch_size)]
+
+    jobs = []
+    for i, batch in enumerate(batches, start=1):
+        suffix = f'_{i}' if len(batches) > 1 else ''
+        filename = f'netbox_{basename}_configs{suffix}.tar.gz'
+        jobs.append(Job.enqueue(
+            render_configs,
+            instance=config_template or model,
+            name=filename,
+            user=user if user and user.is_authenticated else None,
+            model=model,
+            pks=batch,
+            filename=filename,
+            config_template=config_template,
+            context=context
+        ))
+
+    return jobs
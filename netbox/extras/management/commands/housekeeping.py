@@ -12,6 +12,7 @@ from packaging import version
 from core.models import Job
 from extras.models import ObjectChange
 from netbox.config import Config
+from utilities.counters import get_counted_models, reconcile_counts
 
 
 class Command(BaseCommand):
@@ -81,6 +82,8 @@ class Command(BaseCommand):
                         ending=""
                     )
                     self.stdout.flush()
+                for job in Job.objects.filter(created__lt=cutoff, data__has_key='artifact'):
+                    job.delete_artifact()
                 Job.objects.filter(created__lt=cutoff).delete()
                 if options['verbosity']:
                     self.stdout.write("Done.", self.style.SUCCESS)
@@ -91,6 +94,19 @@ class Command(BaseCommand):
                 f"\tSkipping: No retention period specified (JOB_RETENTION = {config.JOB_RETENTION})"
             )
 
+        # Correct any cached counters which have drifted from the actual counts
+        if options['verbosity']:
+            self.stdout.write("[*] Reconciling cached counters")
+        corrected_count = 0
+        for model, mappings in get_counted_models().items():
+            for field_name, related_query in mappings.items():
+                count = reconcile_counts(model, field_name, related_query)
+                if count and options['verbosity'] >= 2:
+                    self.stdout.write(f"\tCorrected {model._meta.label}.{field_name} on {count} objects")
+                corrected_count += count
+        if options['verbosity']:
+            self.stdout.write(f"\tCorrected {corrected_count} counters.", self.style.SUCCESS)
+
         # Check for new releases (if enabled)
         if options['verbosity']:
             self.stdout.write("[*] Checking for latest release")
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from extras.configcontexts import CONFIG_CONTEXT_BATCH_SIZE, get_config_context_models, refresh_config_contexts
+
+
+class Command(BaseCommand):
+    help = "Render and save the config contexts of all devices and virtual machines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help="Discard all materialized config contexts and render them again"
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=CONFIG_CONTEXT_BATCH_SIZE,
+            help=f"The number of objects to process per transaction (default: {CONFIG_CONTEXT_BATCH_SIZE})"
+        )
+
+    def handle(self, *args, **options):
+        if not settings.MATERIALIZE_CONFIG_CONTEXTS:
+            self.stdout.write(self.style.WARNING(
+                "MATERIALIZE_CONFIG_CONTEXTS is not enabled; materialized config contexts will not be used."
+            ))
+
+        if options['force']:
+            self.stdout.write("Discarding materialized config contexts...")
+            for model in get_config_context_models():
+                model.objects.update(_config_context=None, _config_context_hash=None)
+
+        self.stdout.write("Rendering config contexts...")
+        start = time.monotonic()
+        count = refresh_config_contexts(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - start
+        self.stdout.write(f"{count} config contexts rendered in {elapsed:.1f}s.")
+
+        self.stdout.write(self.style.SUCCESS("Finished."))
@@ -1,10 +1,137 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Min
 from django.utils.translation import gettext as _
 
+from extras.models import CachedValue
 from netbox.registry import registry
 from netbox.search.backends import search_backend
 
+DEFAULT_CHUNK_SIZE = 1000
+CHECKPOINT_CACHE_KEY = 'reindex.checkpoint.{}'
+COMPLETED_CACHE_KEY = 'reindex.completed.{}'
+
+
+def get_stale_objects(model, objects):
+    """
+    Return only those objects which have no cached entries, or which have been modified since they were cached.
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    cached_timestamps = dict(
+        CachedValue.objects.filter(
+            object_type=content_type,
+            object_id__in=[obj.pk for obj in objects]
+        ).values_list('object_id').annotate(timestamp=Min('timestamp'))
+    )
+    has_last_updated = hasattr(model, 'last_updated')
+
+    stale = []
+    for obj in objects:
+        cached_timestamp = cached_timestamps.get(obj.pk)
+        if cached_timestamp is None:
+            stale.append(obj)
+        elif has_last_updated and obj.last_updated and obj.last_updated > cached_timestamp:
+            stale.append(obj)
+
+    return stale
+
+
+def remove_deleted_objects(model):
+    """
+    Delete any cached entries belonging to objects of the specified model which no longer exist. Returns the number of
+    entries deleted.
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    deleted_count, _ = CachedValue.objects.filter(
+        object_type=content_type
+    ).exclude(
+        object_id__in=model.objects.values('pk')
+    ).delete()
+
+    return deleted_count
+
+
+def clear_checkpoints(*model_labels):
+    """
+    Discard the checkpoints and completion markers recorded for the specified models.
+    """
+    cache.delete_many([
+        key.format(model_label)
+        for model_label in model_labels for key in (CHECKPOINT_CACHE_KEY, COMPLETED_CACHE_KEY)
+    ])
+
+
+def reindex_model(model_label, chunk_size=DEFAULT_CHUNK_SIZE, incremental=False, resume=False, progress=None):
+    """
+    Cache all objects of the specified model, processing them in chunks ordered by primary key. The primary key of
+    the last object in each completed chunk is recorded as a checkpoint, from which an interrupted run can be resumed.
+    Once all objects have been cached, the model is marked as completed, such that it is skipped if the run is resumed.
+    Checkpoints are retained until they are discarded by clear_checkpoints().
+
+    The existing entries of the model are assumed to have been cleared beforehand unless reindexing incrementally or
+    resuming an earlier run. In that case, the entries of each object are replaced, and any entries belonging to
+    deleted objects are removed.
+
+    Returns a three-tuple of the model label, the number of entries cached, and the number of seconds elapsed.
+    """
+    idx = registry['search'][model_label]
+    model = idx.model
+    checkpoint_key = CHECKPOINT_CACHE_KEY.format(model_label)
+    completed_key = COMPLETED_CACHE_KEY.format(model_label)
+    start_time = time.monotonic()
+
+    if resume and cache.get(completed_key):
+        return model_label, 0, time.monotonic() - start_time
+
+    queryset = model.objects.order_by('pk')
+    last_pk = cache.get(checkpoint_key) if resume else None
+
+    # When resuming, any object may have been cached by the earlier run (even those following the checkpoint)
+    remove_existing = incremental or resume
+
+    count = 0
+    while True:
+        chunk = queryset.filter(pk__gt=last_pk) if last_pk is not None else queryset
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            break
+
+        if incremental:
+            # Re-cache only new or modified objects
+            if stale_objects := get_stale_objects(model, chunk):
+                count += search_backend.cache(stale_objects, indexer=idx, remove_existing=True)
+        else:
+            count += search_backend.cache(chunk, indexer=idx, remove_existing=remove_existing)
+
+        # Record a checkpoint
+        last_pk = chunk[-1].pk
+        cache.set(checkpoint_key, last_pk, timeout=None)
+        if progress:
+            progress(model_label, len(chunk), count)
+
+    if remove_existing:
+        remove_deleted_objects(model)
+
+    cache.set(completed_key, True, timeout=None)
+
+    return model_label, count, time.monotonic() - start_time
+
+
+def _reindex_model_worker(*args, **kwargs):
+    """
+    Entry point for worker processes. Each worker establishes its own database connection.
+    """
+    try:
+        return reindex_model(*args, **kwargs)
+    finally:
+        connections.close_all()
+
 
 class Command(BaseCommand):
     help = 'Reindex objects for search'
@@ -21,6 +148,28 @@ class Command(BaseCommand):
             action='store_true',
             help="For each model, reindex objects only if no cache entries already exist"
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help="Reindex only objects which are not yet cached or have been modified since they were cached"
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help="Resume an interrupted reindex from the last recorded checkpoint for each model"
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="The number of worker processes among which to distribute models (default: 1)"
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"The number of objects to process per chunk (default: {DEFAULT_CHUNK_SIZE})"
+        )
 
     def _get_indexers(self, *model_names):
         indexers = {}
@@ -58,7 +207,22 @@ class Command(BaseCommand):
 
         return indexers
 
+    def _write_result(self, count, elapsed):
+        if count:
+            rate = count / elapsed if elapsed else count
+            self.stdout.write(f'{count} entries cached in {elapsed:.1f}s ({rate:.0f} entries/s).')
+        else:
+            self.stdout.write('No objects cached.')
+
+    def _write_progress(self, model_label, object_count, cached_count):
+        self.stdout.write('.', ending='')
+        self.stdout.flush()
+
     def handle(self, *model_labels, **kwargs):
+        if kwargs['workers'] < 1:
+            raise CommandError(_("The number of workers must be at least 1."))
+        if kwargs['chunk_size'] < 1:
+            raise CommandError(_("The chunk size must be at least 1."))
 
         # Determine which models to reindex
         indexers = self._get_indexers(*model_labels)
@@ -66,8 +230,8 @@ class Command(BaseCommand):
             raise CommandError(_("No indexers found!"))
         self.stdout.write(f'Reindexing {len(indexers)} models.')
 
-        # Clear cached values for the specified models (if not being lazy)
-        if not kwargs['lazy']:
+        # Clear cached values for the specified models (unless being lazy or resuming from an earlier run)
+        if not any((kwargs['lazy'], kwargs['incremental'], kwargs['resume'])):
             if model_labels:
                 content_types = [ContentType.objects.get_for_model(model) for model in indexers.keys()]
             else:
@@ -78,27 +242,61 @@ class Command(BaseCommand):
             deleted_count = search_backend.clear(object_types=content_types)
             self.stdout.write(f'{deleted_count} entries deleted.')
 
-        # Index models
-        self.stdout.write('Indexing models')
+        # Determine which models need to be indexed
+        model_labels = []
         for model, idx in indexers.items():
-            app_label = model._meta.app_label
-            model_name = model._meta.model_name
-            self.stdout.write(f'  {app_label}.{model_name}... ', ending='')
-            self.stdout.flush()
-
+            model_label = f'{model._meta.app_label}.{model._meta.model_name}'
             if kwargs['lazy']:
                 content_type = ContentType.objects.get_for_model(model)
                 if cached_count := search_backend.count(object_types=[content_type]):
-                    self.stdout.write(f'Skipping (found {cached_count} existing).')
+                    self.stdout.write(f'  {model_label}... Skipping (found {cached_count} existing).')
                     continue
+            model_labels.append(model_label)
 
-            i = search_backend.cache(model.objects.iterator(), remove_existing=False)
-            if i:
-                self.stdout.write(f'{i} entries cached.')
-            else:
-                self.stdout.write(f'No objects found.')
+        # Discard any checkpoints left by an earlier interrupted run, unless resuming it
+        if not kwargs['resume']:
+            clear_checkpoints(*model_labels)
+
+        reindex_kwargs = {
+            'chunk_size': kwargs['chunk_size'],
+            'incremental': kwargs['incremental'],
+            'resume': kwargs['resume'],
+        }
+        start_time = time.monotonic()
+
+        # Index models
+        self.stdout.write('Indexing models')
+        if kwargs['workers'] > 1:
+            # Close any open database connections prior to forking worker processes
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=kwargs['workers'],
+                mp_context=multiprocessing.get_context('fork')
+            ) as executor:
+                futures = [
+                    executor.submit(_reindex_model_worker, model_label, **reindex_kwargs)
+                    for model_label in model_labels
+                ]
+                for future in as_completed(futures):
+                    model_label, count, elapsed = future.result()
+                    self.stdout.write(f'  {model_label}... ', ending='')
+                    self._write_result(count, elapsed)
+        else:
+            for model_label in model_labels:
+                self.stdout.write(f'  {model_label}', ending='')
+                self.stdout.flush()
+                model_label, count, elapsed = reindex_model(
+                    model_label,
+                    progress=self._write_progress,
+                    **reindex_kwargs
+                )
+                self.stdout.write(' ', ending='')
+                self._write_result(count, elapsed)
+
+        # All models have been indexed, so the checkpoints of this run are no longer needed
+        clear_checkpoints(*model_labels)
 
-        msg = f'Completed.'
+        msg = f'Completed in {time.monotonic() - start_time:.1f}s.'
         if total_count := search_backend.size:
             msg += f' Total entries: {total_count}'
         self.stdout.write(msg, self.style.SUCCESS)
@@ -1,3 +1,5 @@
+from functools import cache
+
 from django.apps import apps
 from django.conf import settings
 from django.core.validators import ValidationError
@@ -7,18 +9,20 @@ from django.utils.translation import gettext_lazy as _
 from jinja2.loaders import BaseLoader
 from jinja2.sandbox import SandboxedEnvironment
 
+from extras.configcontexts import merge_config_contexts
 from extras.querysets import ConfigContextQuerySet
 from netbox.config import get_config
 from netbox.models import ChangeLoggedModel
 from netbox.models.features import CloningMixin, CustomLinksMixin, ExportTemplatesMixin, SyncedDataMixin, TagsMixin
 from netbox.registry import registry
 from utilities.data import deepmerge
-from utilities.jinja2 import DataFileLoader
+from utilities.jinja2 import DataFileLoader, get_jinja2_template
 
 __all__ = (
     'ConfigContext',
     'ConfigContextModel',
     'ConfigTemplate',
+    'MaterializedConfigContextModel',
 )
 
 
@@ -178,17 +182,15 @@ class ConfigContextModel(models.Model):
         Compile all config data, overwriting lower-weight values with higher-weight values where a collision occurs.
         Return the rendered configuration context for a device or VM.
         """
-        data = {}
-
-        if not hasattr(self, 'config_context_data'):
+        if settings.MATERIALIZE_CONFIG_CONTEXTS and getattr(self, '_config_context_hash', None) is not None:
+            # Use the materialized config context
+            data = self._config_context
+        elif not hasattr(self, 'config_context_data'):
             # The annotation is not available, so we fall back to manually querying for the config context objects
-            config_context_data = ConfigContext.objects.get_for_object(self, aggregate_data=True) or []
+            data = merge_config_contexts(ConfigContext.objects.get_for_object(self, aggregate_data=True))
         else:
             # The attribute may exist, but the annotated value could be None if there is no config context data
-            config_context_data = self.config_context_data or []
-
-        for context in config_context_data:
-            data = deepmerge(data, context)
+            data = merge_config_contexts(self.config_context_data)
 
         # If the object has local config context data defined, merge it last
         if self.local_context_data:
@@ -206,10 +208,58 @@ class ConfigContextModel(models.Model):
             )
 
 
+class MaterializedConfigContextModel(ConfigContextModel):
+    """
+    A ConfigContextModel whose rendered config context (excluding local data) can be saved to the database, rather than
+    being computed each time it is requested. This is maintained only if MATERIALIZE_CONFIG_CONTEXTS is enabled.
+    """
+    _config_context = models.JSONField(
+        blank=True,
+        null=True,
+        editable=False
+    )
+    _config_context_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def serialize_object(self, exclude=None):
+        exclude = [*(exclude or []), '_config_context', '_config_context_hash']
+        return super().serialize_object(exclude=exclude)
+
+
 #
 # Config templates
 #
 
+def get_model_context():
+    """
+    Return the default template context for ConfigTemplates: all NetBox model classes, namespaced by app.
+    """
+    return {
+        app: dict(app_models) for app, app_models in _get_registered_models().items()
+    }
+
+
+@cache
+def _get_registered_models():
+    registered_models = {}
+    for app, model_names in registry['models'].items():
+        registered_models.setdefault(app, {})
+        for model_name in model_names:
+            try:
+                model = apps.get_registered_model(app, model_name)
+                registered_models[app][model.__name__] = model
+            except LookupError:
+                pass
+    return registered_models
+
+
 class ConfigTemplate(SyncedDataMixin, CustomLinksMixin, ExportTemplatesMixin, TagsMixin, ChangeLoggedModel):
     name = models.CharField(
         verbose_name=_('name'),
@@ -253,37 +303,36 @@ class ConfigTemplate(SyncedDataMixin, CustomLinksMixin, ExportTemplatesMixin, Ta
         self.template_code = self.data_file.data_as_string
     sync_data.alters_data = True
 
-    def render(self, context=None):
+    def render(self, context=None, template=None):
         """
         Render the contents of the template.
+
+        Args:
+            context: A dictionary of context data
+            template: The compiled Template to render (see get_template()). If not specified, it will be retrieved.
         """
-        _context = dict()
-
-        # Populate the default template context with NetBox model classes, namespaced by app
-        for app, model_names in registry['models'].items():
-            _context.setdefault(app, {})
-            for model_name in model_names:
-                try:
-                    model = apps.get_registered_model(app, model_name)
-                    _context[app][model.__name__] = model
-                except LookupError:
-                    pass
+        _context = get_model_context()
 
         # Add the provided context data, if any
         if context is not None:
             _context.update(context)
 
-        # Initialize the Jinja2 environment and instantiate the Template
-        environment = self._get_environment()
-        if self.data_file:
-            template = environment.get_template(self.data_file.path)
-        else:
-            template = environment.from_string(self.template_code)
+        if template is None:
+            template = self.get_template()
         output = template.render(**_context)
 
         # Replace CRLF-style line terminators
         return output.replace('\r\n', '\n')
 
+    def get_template(self):
+        """
+        Initialize the Jinja2 environment and return the compiled Template. Templates which may reference other
+        DataFiles require a dedicated loader; all others are compiled once and cached.
+        """
+        if self.data_file:
+            return self._get_environment().get_template(self.data_file.path)
+        return get_jinja2_template(self.template_code, self.environment_params)
+
     def _get_environment(self):
         """
         Instantiate and return a Jinja2 environment suitable for rendering the ConfigTemplate.
@@ -1,11 +1,13 @@
 import json
 import urllib.parse
+from copy import deepcopy
+from itertools import chain
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.core.validators import ValidationError
 from django.db import models
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.formats import date_format
@@ -20,12 +22,13 @@ from extras.utils import image_upload
 from netbox.config import get_config
 from netbox.models import ChangeLoggedModel
 from netbox.models.features import (
-    CloningMixin, CustomFieldsMixin, CustomLinksMixin, ExportTemplatesMixin, SyncedDataMixin, TagsMixin,
+    CloningMixin, CustomFieldsMixin, CustomLinksMixin, ExportTemplatesMixin, JobsMixin, SyncedDataMixin, TagsMixin,
 )
+from utilities.export import ChunkedQuerySet, iter_buffered
 from utilities.html import clean_html
 from utilities.querydict import dict_to_querydict
 from utilities.querysets import RestrictedQuerySet
-from utilities.jinja2 import render_jinja2
+from utilities.jinja2 import get_jinja2_template, render_jinja2
 
 __all__ = (
     'Bookmark',
@@ -160,6 +163,18 @@ class EventRule(CustomFieldsMixin, ExportTemplatesMixin, TagsMixin, ChangeLogged
             except ValueError as e:
                 raise ValidationError({'conditions': e})
 
+    def get_condition_set(self):
+        """
+        Return the compiled ConditionSet for the rule's conditions (or None if no conditions are defined). The
+        ConditionSet is cached on the instance until the conditions are modified.
+        """
+        if not self.conditions:
+            return None
+        if getattr(self, '_condition_set_source', None) != self.conditions:
+            self._condition_set = ConditionSet(self.conditions)
+            self._condition_set_source = deepcopy(self.conditions)
+        return self._condition_set
+
     def eval_conditions(self, data):
         """
         Test whether the given data meets the conditions of the event rule (if any). Return True
@@ -168,7 +183,7 @@ class EventRule(CustomFieldsMixin, ExportTemplatesMixin, TagsMixin, ChangeLogged
         if not self.conditions:
             return True
 
-        return ConditionSet(self.conditions).eval(data)
+        return self.get_condition_set().eval(data)
 
 
 class Webhook(CustomFieldsMixin, ExportTemplatesMixin, TagsMixin, ChangeLoggedModel):
@@ -410,7 +425,7 @@ class CustomLink(CloningMixin, ExportTemplatesMixin, ChangeLoggedModel):
         }
 
 
-class ExportTemplate(SyncedDataMixin, CloningMixin, ExportTemplatesMixin, ChangeLoggedModel):
+class ExportTemplate(SyncedDataMixin, CloningMixin, ExportTemplatesMixin, JobsMixin, ChangeLoggedModel):
     object_types = models.ManyToManyField(
         to='core.ObjectType',
         related_name='export_templates',
@@ -497,21 +512,56 @@ class ExportTemplate(SyncedDataMixin, CloningMixin, ExportTemplatesMixin, Change
 
         return output
 
-    def render_to_response(self, queryset):
+    def get_filename(self, model):
         """
-        Render the template to an HTTP response, delivered as a named file attachment
+        Return the name of the file produced by rendering the template for the given model.
+        """
+        basename = model._meta.verbose_name_plural.replace(' ', '_')
+        extension = f'.{self.file_extension}' if self.file_extension else ''
+        return f'netbox_{basename}{extension}'
+
+    def iter_render(self, queryset):
+        """
+        Render the contents of the template incrementally, retrieving the objects in the queryset from the database in
+        chunks. Yields the rendered output in pieces.
+        """
+        context = {
+            'queryset': ChunkedQuerySet(queryset)
+        }
+        carry = ''
+        for chunk in get_jinja2_template(self.template_code).generate(**context):
+            chunk = carry + chunk
+
+            # Hold back a trailing CR in case the following chunk begins with LF
+            carry = '\r' if chunk.endswith('\r') else ''
+            if carry:
+                chunk = chunk[:-1]
+
+            # Replace CRLF-style line terminators
+            yield chunk.replace('\r\n', '\n')
+
+        if carry:
+            yield carry
+
+    def render_to_response(self, queryset, stream=False):
+        """
+        Render the template to an HTTP response, delivered as a named file attachment. If stream is True, the output
+        is streamed to the client as it is rendered.
         """
-        output = self.render(queryset)
         mime_type = 'text/plain; charset=utf-8' if not self.mime_type else self.mime_type
 
         # Build the response
-        response = HttpResponse(output, content_type=mime_type)
+        if stream:
+            # Render the first chunk of output before the response is returned, such that any error in the template
+            # is raised to the caller (rather than truncating the response once it has begun)
+            chunks = iter_buffered(self.iter_render(queryset))
+            first_chunk = next(chunks, '')
+            response = StreamingHttpResponse(chain((first_chunk,), chunks), content_type=mime_type)
+        else:
+            response = HttpResponse(self.render(queryset), content_type=mime_type)
 
         if self.as_attachment:
-            basename = queryset.model._meta.verbose_name_plural.replace(' ', '_')
-            extension = f'.{self.file_extension}' if self.file_extension else ''
-            filename = f'netbox_{basename}{extension}'
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            response['Content-Disposition'] = f'attachment; filename="{self.get_filename(queryset.model)}"'
 
         return response
 
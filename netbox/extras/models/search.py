@@ -1,6 +1,8 @@
 import uuid
 
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
 from netbox.search.utils import get_indexer
@@ -57,6 +59,7 @@ class CachedValue(models.Model):
         verbose_name_plural = _('cached values')
         indexes = (
             models.Index(fields=('object_type', 'object_id'), name='extras_cachedvalue_object'),
+            GinIndex(OpClass(Upper('value'), name='gin_trgm_ops'), name='extras_cachedvalue_value_trgm'),
         )
 
     def __str__(self):
@@ -1,7 +1,8 @@
 from django.apps import apps
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.aggregates import JSONBAgg
-from django.db.models import OuterRef, Subquery, Q
+from django.db.models import Case, JSONField, OuterRef, Q, Subquery, When
 from django.db.utils import ProgrammingError
 
 from extras.models.tags import TaggedItem
@@ -75,19 +76,35 @@ class ConfigContextModelQuerySet(RestrictedQuerySet):
     This offers a substantial performance gain over ConfigContextQuerySet.get_for_object() when dealing with
     multiple objects. This allows the annotation to be entirely optional.
     """
-    def annotate_config_context_data(self):
+    def annotate_config_context_data(self, materialized=None):
         """
         Attach the subquery annotation to the base queryset
+
+        Args:
+            materialized: If True, the subquery is evaluated only for objects which have no materialized config
+                context. Defaults to the MATERIALIZE_CONFIG_CONTEXTS setting.
         """
         from extras.models import ConfigContext
-        return self.annotate(
-            config_context_data=Subquery(
-                ConfigContext.objects.filter(
-                    self._get_config_context_filters()
-                ).annotate(
-                    _data=EmptyGroupByJSONBAgg('data', ordering=['weight', 'name'])
-                ).values("_data").order_by()
+
+        if materialized is None:
+            materialized = settings.MATERIALIZE_CONFIG_CONTEXTS
+
+        config_context_data = Subquery(
+            ConfigContext.objects.filter(
+                self._get_config_context_filters()
+            ).annotate(
+                _data=EmptyGroupByJSONBAgg('data', ordering=['weight', 'name'])
+            ).values("_data").order_by()
+        )
+        if materialized:
+            config_context_data = Case(
+                When(_config_context_hash__isnull=True, then=config_context_data),
+                default=None,
+                output_field=JSONField()
             )
+
+        return self.annotate(
+            config_context_data=config_context_data
         ).distinct()
 
     def _get_config_context_filters(self):
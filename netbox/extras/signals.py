@@ -1,24 +1,40 @@
 import importlib
 import logging
+from collections import Counter
+from itertools import chain
 
+from django.apps import apps
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import models
 from django.db.models.fields.reverse_related import ManyToManyRel
-from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver, Signal
 from django.utils.translation import gettext_lazy as _
 from django_prometheus.models import model_deletes, model_inserts, model_updates
 
 from core.models import ObjectType
 from core.signals import job_end, job_start
+from extras.configcontexts import (
+    CONFIG_CONTEXT_ASSIGNMENTS, CONFIG_CONTEXT_OBJECT_FIELDS, CONFIG_CONTEXT_RELATED_FIELDS, get_config_context_models,
+    get_config_context_objects, has_changed, invalidate_config_contexts, invalidate_related_config_contexts,
+    update_materialized_config_context,
+)
 from extras.constants import EVENT_JOB_END, EVENT_JOB_START
-from extras.events import process_event_rules
-from extras.models import EventRule
+from extras.events import event_rule_index, process_event_rules
+from extras.models import ConfigContext, EventRule
 from netbox.config import get_config
-from netbox.context import current_request, events_queue
+from netbox.context import current_request, events_queue, search_cache_queue
+from netbox.denormalized import update_denormalized_fields
 from netbox.models.features import ChangeLoggingMixin
+from netbox.search import get_indexer
+from netbox.search.backends import search_backend
 from netbox.signals import post_clean
+from utilities.counters import get_counters_for_model, post_save_receiver, update_counter
 from utilities.exceptions import AbortRequest
+from utilities.tracking import TrackingModelMixin
 from .choices import ObjectChangeActionChoices
 from .events import enqueue_object, get_snapshots, serialize_for_event
 from .models import CustomField, ObjectChange, TaggedItem
@@ -116,6 +132,114 @@ def handle_changed_object(sender, instance, **kwargs):
         model_updates.labels(instance._meta.model_name).inc()
 
 
+def supports_bulk_save(model):
+    """
+    Return True if instances of the given model can be saved in bulk (using bulk_create() or bulk_update()), with the
+    effects of the post_save signal replicated by handle_bulk_save(). This requires that the model implement no custom
+    save() logic, and that no receivers other than those replicated are connected to its pre_save or post_save
+    signals.
+    """
+    if model._meta.parents:
+        return False
+    if any('save' in vars(cls) for cls in model.__mro__ if cls not in (models.Model, TrackingModelMixin)):
+        return False
+    if pre_save.has_listeners(model):
+        return False
+
+    # Receivers whose effects are replicated by handle_bulk_save()
+    replicated_receivers = (
+        handle_changed_object,
+        post_save_receiver,
+        search_backend.caching_handler,
+        update_denormalized_fields,
+    )
+    return all(
+        receiver in replicated_receivers for receiver in chain(*post_save._live_receivers(model))
+    )
+
+
+def handle_bulk_save(model, instances, created, batch_size=None):
+    """
+    Replicate the effects of the post_save signal for objects of the given model which have been saved in bulk (see
+    supports_bulk_save()). Counters on related objects are updated, the search cache is updated, and (if processing a
+    request) changes are recorded and events enqueued for all objects together.
+
+    Args:
+        model: The model of the saved objects
+        instances: The saved objects
+        created: True if the objects were newly created; False if existing objects were updated
+        batch_size: The number of ObjectChanges to create per query
+    """
+    instances = list(instances)
+    if not instances:
+        return
+
+    # Update counters on related objects
+    if created:
+        for field_name, counter_name in get_counters_for_model(model):
+            parent_model = model._meta.get_field(field_name).related_model
+            for pk, count in Counter(getattr(obj, field_name) for obj in instances).items():
+                if pk is not None:
+                    update_counter(parent_model, pk, counter_name, count)
+    else:
+        for obj in instances:
+            post_save_receiver(model, obj, created=False)
+            update_denormalized_fields(model, obj, created=False, raw=False)
+
+    # Clear any tracked fields now that changes have been saved
+    if issubclass(model, TrackingModelMixin):
+        for obj in instances:
+            obj.tracker.clear()
+
+    # Update the search cache
+    try:
+        indexer = get_indexer(model)
+    except KeyError:
+        indexer = None
+    if indexer is not None and (queue := search_cache_queue.get()) is not None:
+        queue.setdefault(model, set()).update(obj.pk for obj in instances)
+    elif indexer is not None:
+        search_backend.cache(instances, indexer=indexer, remove_existing=not created)
+
+    # Get the current request, or bail if not set
+    request = current_request.get()
+    if request is None or not hasattr(model, 'to_objectchange'):
+        return
+
+    if created:
+        action = ObjectChangeActionChoices.ACTION_CREATE
+    else:
+        action = ObjectChangeActionChoices.ACTION_UPDATE
+
+    # Record the changes to all objects
+    objectchanges = []
+    for obj in instances:
+        if created:
+            # New objects have no many-to-many assignments, so avoid querying for them when serializing
+            obj._prefetched_objects_cache = {
+                field.name: field.related_model.objects.none() for field in model._meta.many_to_many
+            }
+        objectchange = obj.to_objectchange(action)
+        if objectchange and objectchange.has_changes:
+            objectchange.user = request.user
+            objectchange.user_name = request.user.username
+            objectchange.request_id = request.id
+            objectchanges.append(objectchange)
+    ObjectChange.objects.bulk_create(objectchanges, batch_size=batch_size)
+
+    # Enqueue the objects for event processing
+    queue = events_queue.get()
+    for obj in instances:
+        enqueue_object(queue, obj, request.user, request.id, action)
+    events_queue.set(queue)
+
+    # Increment metric counters
+    if created:
+        model_inserts.labels(model._meta.model_name).inc(len(instances))
+    else:
+        model_updates.labels(model._meta.model_name).inc(len(instances))
+
+
 @receiver(pre_delete)
 def handle_deleted_object(sender, instance, **kwargs):
     """
@@ -259,10 +383,115 @@ def validate_assigned_tags(sender, instance, action, model, pk_set, **kwargs):
             raise AbortRequest(f"Tag {tag} cannot be assigned to {ct.model} objects.")
 
 
+#
+# Config contexts
+#
+
+def invalidate_config_context(config_context):
+    """
+    Invalidate the materialized config contexts of all objects to which a ConfigContext is assigned.
+    """
+    invalidate_config_contexts(*[
+        get_config_context_objects(model, config_context) for model in get_config_context_models()
+    ])
+
+
+@receiver((post_save, pre_delete), sender=ConfigContext)
+def handle_config_context_changed(sender, instance, **kwargs):
+    """
+    Invalidate materialized config contexts when a ConfigContext is created, modified, or deleted.
+    """
+    if settings.MATERIALIZE_CONFIG_CONTEXTS:
+        invalidate_config_context(instance)
+
+
+def handle_config_context_assignment_changed(sender, instance, action, **kwargs):
+    """
+    Invalidate materialized config contexts both before and after the assignment of a ConfigContext is modified.
+    """
+    if settings.MATERIALIZE_CONFIG_CONTEXTS and isinstance(instance, ConfigContext):
+        invalidate_config_context(instance)
+
+
+def handle_config_context_assignee_deleted(sender, instance, **kwargs):
+    """
+    Invalidate materialized config contexts when an object to which a ConfigContext is assigned is deleted.
+    """
+    if not settings.MATERIALIZE_CONFIG_CONTEXTS:
+        return
+    query = Q()
+    for field_name, lookup, include_descendants in CONFIG_CONTEXT_ASSIGNMENTS:
+        if ConfigContext._meta.get_field(field_name).related_model is sender:
+            query |= Q(**{field_name: instance})
+    for config_context in ConfigContext.objects.filter(query).distinct():
+        invalidate_config_context(config_context)
+
+
+def handle_config_context_object_saved(sender, instance, **kwargs):
+    """
+    Invalidate the materialized config context of a Device or VirtualMachine if any of the fields which determine its
+    applicable ConfigContexts have changed.
+    """
+    if settings.MATERIALIZE_CONFIG_CONTEXTS:
+        update_materialized_config_context(instance)
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def handle_config_context_object_tagged(sender, instance, action, **kwargs):
+    """
+    Invalidate the materialized config context of a Device or VirtualMachine when its tags are modified.
+    """
+    if not settings.MATERIALIZE_CONFIG_CONTEXTS or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if instance._meta.label_lower in CONFIG_CONTEXT_OBJECT_FIELDS:
+        invalidate_config_contexts(instance._meta.model.objects.filter(pk=instance.pk))
+
+
+def handle_config_context_related_object_saved(sender, instance, **kwargs):
+    """
+    Invalidate the materialized config contexts of all objects related to a Region, Site, SiteGroup, Tenant, or Cluster
+    when any of its fields which determine the applicable ConfigContexts have changed.
+    """
+    if not settings.MATERIALIZE_CONFIG_CONTEXTS or instance._state.adding:
+        return
+    fields, lookup = CONFIG_CONTEXT_RELATED_FIELDS[instance._meta.label_lower]
+    if has_changed(instance, fields):
+        invalidate_related_config_contexts(instance)
+
+
+def handle_config_context_related_object_deleted(sender, instance, **kwargs):
+    """
+    Invalidate the materialized config contexts of all objects related to a Region, Site, SiteGroup, Tenant, or Cluster
+    when it is deleted.
+    """
+    if settings.MATERIALIZE_CONFIG_CONTEXTS:
+        invalidate_related_config_contexts(instance)
+
+
+for _field_name, _lookup, _include_descendants in CONFIG_CONTEXT_ASSIGNMENTS:
+    _field = ConfigContext._meta.get_field(_field_name)
+    m2m_changed.connect(handle_config_context_assignment_changed, sender=_field.remote_field.through)
+    pre_delete.connect(handle_config_context_assignee_deleted, sender=_field.related_model)
+for _label in CONFIG_CONTEXT_OBJECT_FIELDS:
+    pre_save.connect(handle_config_context_object_saved, sender=apps.get_model(_label))
+for _label in CONFIG_CONTEXT_RELATED_FIELDS:
+    pre_save.connect(handle_config_context_related_object_saved, sender=apps.get_model(_label))
+    pre_delete.connect(handle_config_context_related_object_deleted, sender=apps.get_model(_label))
+
+
 #
 # Event rules
 #
 
+@receiver((post_save, post_delete), sender=EventRule)
+@receiver(m2m_changed, sender=EventRule.object_types.through)
+def invalidate_event_rule_index(sender, **kwargs):
+    """
+    Invalidate the compiled event rule index whenever an EventRule is modified.
+    """
+    event_rule_index.invalidate()
+
+
 @receiver(job_start)
 def process_job_start_event_rules(sender, **kwargs):
     """
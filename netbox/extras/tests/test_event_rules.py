@@ -3,10 +3,12 @@ import uuid
 from unittest.mock import patch
 
 import django_rq
+from django.contrib.contenttypes.models import ContentType
 from django.http import HttpResponse
-from django.test import RequestFactory
+from django.test import RequestFactory, override_settings
 from django.urls import reverse
 from requests import Session
+from requests.exceptions import RequestException
 from rest_framework import status
 
 from core.models import ObjectType
@@ -14,9 +16,9 @@ from dcim.choices import SiteStatusChoices
 from dcim.models import Site
 from extras.choices import EventRuleActionChoices, ObjectChangeActionChoices
 from extras.context_managers import event_tracking
-from extras.events import enqueue_object, flush_events, serialize_for_event
+from extras.events import enqueue_object, event_rule_index, flush_events, serialize_events, serialize_for_event
 from extras.models import EventRule, Tag, Webhook
-from extras.webhooks import generate_signature, send_webhook
+from extras.webhooks import dispatch_webhooks, generate_signature, send_webhook
 from utilities.testing import APITestCase
 
 
@@ -107,6 +109,52 @@ class EventRuleTest(APITestCase):
         # Evaluate the conditions (status='active')
         self.assertTrue(event_rule.eval_conditions(data))
 
+    def test_event_rule_index(self):
+        """
+        Check that the compiled event rule index reflects changes to EventRules.
+        """
+        site = Site.objects.create(name='Site 1', slug='site-1')
+        event = {
+            'content_type': ContentType.objects.get_for_model(Site),
+            'event': ObjectChangeActionChoices.ACTION_CREATE,
+            'data': serialize_for_event(site),
+        }
+        event_rule = EventRule.objects.get(type_create=True)
+
+        matches = event_rule_index.match([event])
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0][1], [event_rule.pk])
+
+        # Add a condition which the event does not meet
+        event_rule.conditions = {'attr': 'status.value', 'value': 'planned'}
+        event_rule.save()
+        self.assertEqual(event_rule_index.match([event]), [])
+
+        # Disable the rule
+        event_rule.conditions = None
+        event_rule.enabled = False
+        event_rule.save()
+        self.assertEqual(event_rule_index.match([event]), [])
+
+    def test_serialize_events(self):
+        """
+        Check that queued events are serialized only when flushed, and only if applicable event rules exist.
+        """
+        queue = {}
+        request_id = uuid.uuid4()
+        site = Site.objects.create(name='Site 1', slug='site-1')
+        tag = Tag.objects.first()
+        for instance in (site, tag):
+            enqueue_object(queue, instance, self.user, request_id, ObjectChangeActionChoices.ACTION_CREATE)
+        for event in queue.values():
+            self.assertIsNone(event['data'])
+
+        events = serialize_events(list(queue.values()))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['object_id'], site.pk)
+        self.assertEqual(events[0]['data']['name'], 'Site 1')
+        self.assertEqual(events[0]['snapshots']['postchange']['name'], 'Site 1')
+
     def test_single_create_process_eventrule(self):
         """
         Check that creating an object with an applicable EventRule queues a background task for the rule's action.
@@ -380,6 +428,95 @@ class EventRuleTest(APITestCase):
         with patch.object(Session, 'send', dummy_send) as mock_send:
             send_webhook(**job.kwargs)
 
+    @override_settings(WEBHOOK_DISPATCHER_ENABLED=True, WEBHOOK_BATCH_SIZE=2)
+    def test_dispatch_webhooks(self):
+        request_id = uuid.uuid4()
+        requests_sent = []
+
+        def dummy_send(_, request, **kwargs):
+            """
+            A dummy implementation of Session.send() which records each request.
+            """
+            requests_sent.append(request)
+            return HttpResponse()
+
+        # Enqueue three webhook events for processing
+        webhooks_queue = {}
+        for i in range(1, 4):
+            site = Site.objects.create(name=f'Site {i}', slug=f'site-{i}')
+            enqueue_object(
+                webhooks_queue,
+                instance=site,
+                user=self.user,
+                request_id=request_id,
+                action=ObjectChangeActionChoices.ACTION_CREATE
+            )
+        flush_events(list(webhooks_queue.values()))
+
+        # A single job should have been enqueued for the webhook
+        self.assertEqual(self.queue.count, 1)
+        job = self.queue.jobs[0]
+        self.assertEqual(job.kwargs['webhook'], EventRule.objects.get(type_create=True).action_object)
+        self.assertEqual(len(job.kwargs['events']), 3)
+
+        with patch.object(Session, 'send', dummy_send):
+            dispatch_webhooks(**job.kwargs)
+
+        # Events should have been delivered in two batches
+        self.assertEqual(len(requests_sent), 2)
+        sites = []
+        for request in requests_sent:
+            webhook = job.kwargs['webhook']
+            self.assertEqual(request.headers['X-Hook-Signature'], generate_signature(request.body, webhook.secret))
+            self.assertEqual(request.headers['X-Foo'], 'Bar')
+            body = json.loads(request.body)
+            self.assertIsInstance(body, list)
+            sites.extend(event['data']['name'] for event in body)
+        self.assertEqual(sorted(sites), ['Site 1', 'Site 2', 'Site 3'])
+
+    @override_settings(WEBHOOK_DISPATCHER_ENABLED=True, WEBHOOK_BATCH_SIZE=2, RQ_RETRY_MAX=2, RQ_RETRY_INTERVAL=0)
+    def test_dispatch_webhooks_partial_failure(self):
+        requests_sent = []
+
+        def dummy_send(_, request, **kwargs):
+            """
+            A dummy implementation of Session.send() which fails any request including Site 3.
+            """
+            requests_sent.append(request)
+            sites = [event['data']['name'] for event in json.loads(request.body)]
+            return HttpResponse(status=500 if 'Site 3' in sites else 200)
+
+        # Enqueue three webhook events for processing
+        webhooks_queue = {}
+        for i in range(1, 4):
+            site = Site.objects.create(name=f'Site {i}', slug=f'site-{i}')
+            enqueue_object(
+                webhooks_queue,
+                instance=site,
+                user=self.user,
+                request_id=uuid.uuid4(),
+                action=ObjectChangeActionChoices.ACTION_CREATE
+            )
+        flush_events(list(webhooks_queue.values()))
+        job = self.queue.jobs[0]
+
+        with patch.object(Session, 'send', dummy_send), patch('extras.webhooks.get_current_job', return_value=job):
+            dispatch_webhooks(**job.kwargs)
+        self.assertEqual(len(requests_sent), 2)
+
+        # Only the event of the failed request should have been enqueued for retry, consuming one retry
+        self.assertEqual(self.queue.count, 2)
+        retry_job = self.queue.jobs[1]
+        self.assertEqual(retry_job.kwargs['webhook'], job.kwargs['webhook'])
+        self.assertEqual([event['data']['name'] for event in retry_job.kwargs['events']], ['Site 3'])
+        self.assertEqual(retry_job.retries_left, 1)
+
+        # If all requests fail, the job fails (and is retried as usual)
+        with patch.object(Session, 'send', dummy_send), self.assertRaises(RequestException):
+            with patch('extras.webhooks.get_current_job', return_value=retry_job):
+                dispatch_webhooks(**retry_job.kwargs)
+        self.assertEqual(self.queue.count, 2)
+
     def test_duplicate_triggers(self):
         """
         Test for erroneous duplicate event triggers resulting from saving an object multiple times
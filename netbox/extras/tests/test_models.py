@@ -1,8 +1,19 @@
-from django.test import TestCase
-
-from core.models import ObjectType
-from dcim.models import Device, DeviceRole, DeviceType, Location, Manufacturer, Platform, Region, Site, SiteGroup
-from extras.models import ConfigContext, Tag
+import tarfile
+import tempfile
+import uuid
+
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from jinja2.exceptions import UndefinedError
+
+from core.choices import JobStatusChoices
+from core.models import Job, ObjectType
+from dcim.models import (
+    Device, DeviceRole, DeviceType, Location, Manufacturer, Platform, Rack, Region, Site, SiteGroup,
+)
+from extras.configcontexts import get_config_context_hash, get_config_context_objects, refresh_config_contexts
+from extras.jobs import iter_rendered_configs, render_configs
+from extras.models import ConfigContext, ConfigTemplate, ExportTemplate, Tag
 from tenancy.models import Tenant, TenantGroup
 from utilities.exceptions import AbortRequest
 from virtualization.models import Cluster, ClusterGroup, ClusterType, VirtualMachine
@@ -33,6 +44,39 @@ class TagTest(TestCase):
             sitegroup.tags.add(tag)
 
 
+class ExportTemplateTest(TestCase):
+
+    def test_iter_render(self):
+        for i in range(1, 4):
+            Site.objects.create(name=f'Site {i}', slug=f'site-{i}')
+        export_template = ExportTemplate(
+            name='Export Template 1',
+            template_code='{% for site in queryset %}{{ site.name }}\r\n{% endfor %}{{ queryset|length }}'
+        )
+        queryset = Site.objects.order_by('name')
+
+        output = ''.join(export_template.iter_render(queryset))
+        self.assertEqual(output, 'Site 1\nSite 2\nSite 3\n3')
+        self.assertEqual(output, export_template.render(queryset))
+
+    def test_render_to_response_stream(self):
+        for i in range(1, 4):
+            Site.objects.create(name=f'Site {i}', slug=f'site-{i}')
+        queryset = Site.objects.order_by('name')
+
+        export_template = ExportTemplate(
+            name='Export Template 1',
+            template_code='{% for site in queryset %}{{ site.name }}\n{% endfor %}'
+        )
+        response = export_template.render_to_response(queryset, stream=True)
+        self.assertEqual(b''.join(response.streaming_content), b'Site 1\nSite 2\nSite 3\n')
+
+        # Errors in the template should be raised before the response is returned
+        export_template.template_code = '{% for site in queryset %}{{ site.name.foo() }}\n{% endfor %}'
+        with self.assertRaises(UndefinedError):
+            export_template.render_to_response(queryset, stream=True)
+
+
 class ConfigContextTest(TestCase):
     """
     These test cases deal with the weighting, ordering, and deep merge logic of config context data.
@@ -478,3 +522,159 @@ class ConfigContextTest(TestCase):
         annotated_queryset = Device.objects.filter(name=device.name).annotate_config_context_data()
         self.assertEqual(ConfigContext.objects.get_for_object(device).count(), 2)
         self.assertEqual(device.get_config_context(), annotated_queryset[0].get_config_context())
+
+    @override_settings(MATERIALIZE_CONFIG_CONTEXTS=True)
+    def test_materialized_config_context(self):
+        site = Site.objects.first()
+        ConfigContext.objects.create(name="context 1", weight=101, data={"a": 123, "b": 456})
+        context2 = ConfigContext.objects.create(name="context 2", weight=100, data={"b": 789, "c": 777})
+        context2.sites.add(site)
+        device = Device.objects.first()
+        device.local_context_data = {"d": 1}
+        device.save()
+        expected_data = {"a": 123, "b": 456, "c": 777, "d": 1}
+
+        # Config context has not yet been materialized
+        self.assertIsNone(Device.objects.get(pk=device.pk)._config_context_hash)
+        self.assertEqual(Device.objects.get(pk=device.pk).get_config_context(), expected_data)
+
+        self.assertEqual(refresh_config_contexts(), 1)
+        device = Device.objects.get(pk=device.pk)
+        self.assertEqual(device._config_context, {"a": 123, "b": 456, "c": 777})
+        self.assertEqual(device._config_context_hash, get_config_context_hash(device._config_context))
+        self.assertEqual(device.get_config_context(), expected_data)
+        self.assertEqual(
+            Device.objects.annotate_config_context_data().get(pk=device.pk).get_config_context(),
+            expected_data
+        )
+
+        # Modifying a ConfigContext invalidates the materialized config contexts of its objects
+        context2.data = {"b": 789, "c": 888}
+        context2.save()
+        self.assertIsNone(Device.objects.get(pk=device.pk)._config_context_hash)
+        self.assertEqual(refresh_config_contexts(), 1)
+        self.assertEqual(Device.objects.get(pk=device.pk).get_config_context()["c"], 888)
+
+        # Modifying an assignment invalidates the materialized config contexts of its objects
+        context2.sites.set([Site.objects.create(name='Site 2', slug='site-2')])
+        self.assertIsNone(Device.objects.get(pk=device.pk)._config_context_hash)
+        self.assertEqual(refresh_config_contexts(), 1)
+        self.assertEqual(Device.objects.get(pk=device.pk).get_config_context(), {"a": 123, "b": 456, "d": 1})
+
+    @override_settings(MATERIALIZE_CONFIG_CONTEXTS=True)
+    def test_materialized_config_context_moved(self):
+        site1 = Site.objects.first()
+        site2 = Site.objects.create(name='Site 2', slug='site-2')
+        context = ConfigContext.objects.create(name="context 1", data={"a": 1})
+        context.sites.add(site2)
+        device = Device.objects.first()
+        refresh_config_contexts()
+        self.assertEqual(Device.objects.get(pk=device.pk).get_config_context(), {})
+
+        # Moving a Location to another Site invalidates the materialized config contexts of its Devices
+        location = Location.objects.first()
+        location.site = site2
+        location.save()
+        device = Device.objects.get(pk=device.pk)
+        self.assertEqual(device.site, site2)
+        self.assertIsNone(device._config_context_hash)
+        self.assertEqual(refresh_config_contexts(), 1)
+        self.assertEqual(Device.objects.get(pk=device.pk).get_config_context(), {"a": 1})
+
+        # Moving a Rack to another Site invalidates the materialized config contexts of its Devices
+        rack = Rack.objects.create(name='Rack 1', site=site2, location=location)
+        device.rack = rack
+        device.save()
+        refresh_config_contexts()
+        rack.site = site1
+        rack.location = None
+        rack.save()
+        device = Device.objects.get(pk=device.pk)
+        self.assertEqual(device.site, site1)
+        self.assertIsNone(device._config_context_hash)
+        self.assertEqual(refresh_config_contexts(), 1)
+        self.assertEqual(Device.objects.get(pk=device.pk).get_config_context(), {})
+
+    def test_get_config_context_objects(self):
+        region = Region.objects.first()
+        child_region = Region.objects.create(name='Child Region', slug='child-region', parent=region)
+        site = Site.objects.create(name='Site 2', slug='site-2', region=child_region)
+        device = Device.objects.create(
+            name='Device 2',
+            site=site,
+            role=DeviceRole.objects.first(),
+            device_type=DeviceType.objects.first()
+        )
+        context = ConfigContext.objects.create(name="context 1", data={"a": 1})
+        self.assertEqual(get_config_context_objects(Device, context).count(), Device.objects.count())
+
+        # Objects assigned to descendants of an assigned region are included
+        context.regions.add(region)
+        self.assertEqual(get_config_context_objects(Device, context).count(), 2)
+        context.sites.add(site)
+        self.assertEqual(list(get_config_context_objects(Device, context)), [device])
+
+        # ConfigContexts assigned to device types do not apply to virtual machines
+        context.device_types.add(DeviceType.objects.first())
+        self.assertFalse(get_config_context_objects(VirtualMachine, context).exists())
+
+
+class ConfigTemplateTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        manufacturer = Manufacturer.objects.create(name='Manufacturer 1', slug='manufacturer-1')
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model='Device Type 1', slug='device-type-1')
+        role = DeviceRole.objects.create(name='Device Role 1', slug='device-role-1')
+        site = Site.objects.create(name='Site 1', slug='site-1')
+        config_template = ConfigTemplate.objects.create(
+            name='Config Template 1',
+            template_code='hostname {{ device.name }}\nfoo {{ foo }}'
+        )
+        Device.objects.bulk_create([
+            Device(name='Device 1', device_type=devicetype, role=role, site=site, config_template=config_template),
+            Device(name='Device 2', device_type=devicetype, role=role, site=site, config_template=config_template),
+            Device(name='Device 3', device_type=devicetype, role=role, site=site),
+        ])
+        ConfigContext.objects.create(name='Config Context 1', data={'foo': 'bar'})
+
+    def test_iter_rendered_configs(self):
+        results = {
+            device.name: (output, error) for device, output, error in iter_rendered_configs(Device.objects.all())
+        }
+        self.assertEqual(results['Device 1'], ('hostname Device 1\nfoo bar', None))
+        self.assertEqual(results['Device 2'], ('hostname Device 2\nfoo bar', None))
+        self.assertIsNone(results['Device 3'][0])
+        self.assertIsNotNone(results['Device 3'][1])
+
+        # Render a specific template with additional context data
+        config_template = ConfigTemplate.objects.first()
+        results = list(iter_rendered_configs(Device.objects.all(), config_template, context={'foo': 'baz'}))
+        self.assertEqual(len(results), 3)
+        for device, output, error in results:
+            self.assertEqual(output, f'hostname {device.name}\nfoo baz')
+
+    def test_render_configs(self):
+        devices = Device.objects.order_by('pk')
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            job = Job.objects.create(
+                object_type=ObjectType.objects.get_for_model(Device),
+                name='netbox_devices_configs.tar.gz',
+                job_id=uuid.uuid4()
+            )
+            render_configs(
+                job,
+                model=Device,
+                pks=[device.pk for device in devices],
+                filename='netbox_devices_configs.tar.gz'
+            )
+            job.refresh_from_db()
+            self.assertEqual(job.status, JobStatusChoices.STATUS_COMPLETED)
+            self.assertEqual(job.data['rendered'], 2)
+            self.assertEqual(list(job.data['errors']), [str(devices[2].pk)])
+
+            # Validate the contents of the archive
+            with default_storage.open(job.artifact['path']) as f, tarfile.open(fileobj=f, mode='r:gz') as archive:
+                self.assertEqual(archive.getnames(), [f'{devices[0].pk}-Device_1.txt', f'{devices[1].pk}-Device_2.txt'])
+                content = archive.extractfile(archive.getmember(f'{devices[0].pk}-Device_1.txt')).read()
+            self.assertEqual(content.decode(), 'hostname Device 1\nfoo bar')
@@ -1,12 +1,21 @@
 import hashlib
 import hmac
+import json
 import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
 import requests
 from django.conf import settings
 from django_rq import job
 from jinja2.exceptions import TemplateError
+from requests.adapters import HTTPAdapter
+from rest_framework.utils.encoders import JSONEncoder
+from rq import get_current_job
 
+from netbox.metrics import webhook_delivery_latency, webhook_events_total, webhook_requests_total
 from .constants import WEBHOOK_EVENT_TYPES
 
 logger = logging.getLogger('netbox.webhooks')
@@ -24,14 +33,10 @@ def generate_signature(request_body, secret):
     return hmac_prep.hexdigest()
 
 
-@job('default')
-def send_webhook(event_rule, model_name, event, data, timestamp, username, request_id=None, snapshots=None):
+def get_webhook_context(model_name, event, data, timestamp, username, request_id=None, snapshots=None):
     """
-    Make a POST request to the defined Webhook
+    Return the context data for rendering a webhook request.
     """
-    webhook = event_rule.action_object
-
-    # Prepare context data for headers & body templates
     context = {
         'event': WEBHOOK_EVENT_TYPES[event],
         'timestamp': timestamp,
@@ -45,6 +50,13 @@ def send_webhook(event_rule, model_name, event, data, timestamp, username, reque
             'snapshots': snapshots
         })
 
+    return context
+
+
+def render_webhook_request(webhook, context):
+    """
+    Return the URL and headers of a webhook request rendered from the given context.
+    """
     # Build the headers for the HTTP request
     headers = {
         'Content-Type': webhook.http_content_type,
@@ -55,23 +67,19 @@ def send_webhook(event_rule, model_name, event, data, timestamp, username, reque
         logger.error(f"Error parsing HTTP headers for webhook {webhook}: {e}")
         raise e
 
-    # Render the request body
-    try:
-        body = webhook.render_body(context)
-    except TemplateError as e:
-        logger.error(f"Error rendering request body for webhook {webhook}: {e}")
-        raise e
+    return webhook.render_payload_url(context), headers
 
-    # Prepare the HTTP request
+
+def prepare_webhook_request(webhook, url, headers, body):
+    """
+    Prepare an HTTP request for the given webhook, and sign it if a secret key has been defined.
+    """
     params = {
         'method': webhook.http_method,
-        'url': webhook.render_payload_url(context),
+        'url': url,
         'headers': headers,
         'data': body.encode('utf8'),
     }
-    logger.info(
-        f"Sending {params['method']} request to {params['url']} ({context['model']} {context['event']})"
-    )
     logger.debug(params)
     try:
         prepared_request = requests.Request(**params).prepare()
@@ -83,18 +91,177 @@ def send_webhook(event_rule, model_name, event, data, timestamp, username, reque
     if webhook.secret != '':
         prepared_request.headers['X-Hook-Signature'] = generate_signature(prepared_request.body, webhook.secret)
 
-    # Send the request
-    with requests.Session() as session:
-        session.verify = webhook.ssl_verification
-        if webhook.ca_file_path:
-            session.verify = webhook.ca_file_path
+    return prepared_request
+
+
+def get_webhook_session(webhook, pool_size=None):
+    """
+    Return a new HTTP session configured for the given webhook. If pool_size is specified, the session will retain up
+    to this many keep-alive connections per host.
+    """
+    session = requests.Session()
+    session.verify = webhook.ssl_verification
+    if webhook.ca_file_path:
+        session.verify = webhook.ca_file_path
+    if pool_size:
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+    return session
+
+
+def get_endpoint(url):
+    """
+    Return the endpoint (scheme and network location) of a URL, for use as a metrics label.
+    """
+    url = urlsplit(url)
+    return f'{url.scheme}://{url.netloc}'
+
+
+def deliver_webhook_request(session, prepared_request, event_count=1):
+    """
+    Send a prepared webhook request using the given session, and record its outcome. Raises RequestException if the
+    request fails or does not return a 2XX status code.
+    """
+    endpoint = get_endpoint(prepared_request.url)
+    start = time.monotonic()
+    try:
         response = session.send(prepared_request, proxies=settings.HTTP_PROXIES)
+    except requests.exceptions.RequestException:
+        webhook_requests_total.labels(endpoint, 'error').inc()
+        raise
+    finally:
+        webhook_delivery_latency.labels(endpoint).observe(time.monotonic() - start)
 
     if 200 <= response.status_code <= 299:
         logger.info(f"Request succeeded; response status {response.status_code}")
-        return f"Status {response.status_code} returned, webhook successfully processed."
+        webhook_requests_total.labels(endpoint, 'success').inc()
+        webhook_events_total.labels(endpoint).inc(event_count)
+        return response
     else:
         logger.warning(f"Request failed; response status {response.status_code}: {response.content}")
+        webhook_requests_total.labels(endpoint, 'failure').inc()
         raise requests.exceptions.RequestException(
             f"Status {response.status_code} returned with content '{response.content}', webhook FAILED to process."
         )
+
+
+@job('default')
+def send_webhook(event_rule, model_name, event, data, timestamp, username, request_id=None, snapshots=None):
+    """
+    Make a POST request to the defined Webhook
+    """
+    webhook = event_rule.action_object
+
+    # Prepare context data for headers & body templates
+    context = get_webhook_context(model_name, event, data, timestamp, username, request_id, snapshots)
+    url, headers = render_webhook_request(webhook, context)
+
+    # Render the request body
+    try:
+        body = webhook.render_body(context)
+    except TemplateError as e:
+        logger.error(f"Error rendering request body for webhook {webhook}: {e}")
+        raise e
+
+    # Prepare the HTTP request
+    logger.info(
+        f"Sending {webhook.http_method} request to {url} ({context['model']} {context['event']})"
+    )
+    prepared_request = prepare_webhook_request(webhook, url, headers, body)
+
+    # Send the request
+    with get_webhook_session(webhook) as session:
+        response = deliver_webhook_request(session, prepared_request)
+
+    return f"Status {response.status_code} returned, webhook successfully processed."
+
+
+@job('default')
+def dispatch_webhooks(webhook, events):
+    """
+    Deliver a set of events to the given Webhook. Requests to each endpoint share a pool of keep-alive connections
+    and are sent concurrently, up to WEBHOOK_MAX_CONNECTIONS at a time. If WEBHOOK_BATCH_SIZE is greater than one and
+    the webhook does not define a body template, events destined for the same URL with the same headers are sent
+    together as a JSON array of up to WEBHOOK_BATCH_SIZE objects.
+
+    If only some requests fail and the job has retries remaining (per RQ_RETRY_MAX), a new job is enqueued to deliver
+    only the events of the failed requests, such that events already delivered are not sent again. The new job
+    consumes one retry and inherits the rest, such that all events are attempted no more than RQ_RETRY_MAX + 1 times
+    in total. If all requests fail (or no retries remain), the job fails, and is retried as usual.
+
+    Args:
+        webhook: The Webhook to be sent
+        events: A list of dictionaries of keyword arguments accepted by get_webhook_context()
+    """
+    from extras.events import enqueue_webhook_dispatch
+
+    batch_size = settings.WEBHOOK_BATCH_SIZE if not webhook.body_template else 1
+    max_connections = settings.WEBHOOK_MAX_CONNECTIONS
+
+    # Render all requests, grouping the events by endpoint and by identical URL & headers
+    endpoints = defaultdict(lambda: defaultdict(list))
+    for event in events:
+        context = get_webhook_context(**event)
+        url, headers = render_webhook_request(webhook, context)
+        endpoints[get_endpoint(url)][(url, tuple(headers.items()))].append((event, context))
+
+    # Compile the requests for each endpoint, along with the events delivered by each
+    requests_by_endpoint = defaultdict(list)
+    for endpoint, batches in endpoints.items():
+        for (url, headers), items in batches.items():
+            for i in range(0, len(items), batch_size):
+                batch = items[i:i + batch_size]
+                contexts = [context for event, context in batch]
+                try:
+                    if batch_size > 1:
+                        body = json.dumps(contexts, cls=JSONEncoder)
+                    else:
+                        body = webhook.render_body(contexts[0])
+                except TemplateError as e:
+                    logger.error(f"Error rendering request body for webhook {webhook}: {e}")
+                    raise e
+                prepared_request = prepare_webhook_request(webhook, url, dict(headers), body)
+                requests_by_endpoint[endpoint].append((prepared_request, [event for event, context in batch]))
+
+    # Send the requests for each endpoint concurrently, using a pooled session per endpoint
+    failed = 0
+    failed_events = []
+    for endpoint, prepared_requests in requests_by_endpoint.items():
+        logger.info(
+            f"Sending {len(prepared_requests)} {webhook.http_method} request(s) to {endpoint} ({len(events)} events)"
+        )
+        with get_webhook_session(webhook, pool_size=max_connections) as session:
+            with ThreadPoolExecutor(max_workers=max_connections) as executor:
+                futures = [
+                    (
+                        executor.submit(deliver_webhook_request, session, prepared_request, len(batch_events)),
+                        batch_events
+                    )
+                    for prepared_request, batch_events in prepared_requests
+                ]
+            for future, batch_events in futures:
+                if e := future.exception():
+                    logger.error(f"Error sending webhook {webhook}: {e}")
+                    failed += 1
+                    failed_events.extend(batch_events)
+
+    total = sum(len(prepared_requests) for prepared_requests in requests_by_endpoint.values())
+    if failed:
+        message = f"{failed} of {total} requests FAILED to process for webhook {webhook}."
+
+        # Retry delivery of only the failed events, passing on the remaining retries of the current job
+        current_job = get_current_job()
+        if failed < total and current_job and current_job.should_retry:
+            enqueue_webhook_dispatch(
+                {webhook: failed_events},
+                delay=current_job.get_retry_interval(),
+                retries_left=current_job.retries_left - 1
+            )
+            logger.warning(f"{message} Retrying {len(failed_events)} events.")
+            return f"{message} {len(failed_events)} events enqueued for retry."
+
+        raise requests.exceptions.RequestException(message)
+
+    return f"{total} requests ({len(events)} events) successfully processed."
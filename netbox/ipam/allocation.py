@@ -0,0 +1,140 @@
+import heapq
+from itertools import islice
+
+import netaddr
+
+__all__ = (
+    'PrefixAllocator',
+    'get_free_ranges',
+    'get_range_size',
+    'iter_addresses',
+    'iter_cidrs',
+    'merge_ranges',
+)
+
+
+#
+# Address space is represented as sorted sequences of (first, last) tuples of integer addresses (inclusive), so that
+# available space can be computed in a single pass over the allocated objects, without materializing any sets.
+#
+
+def merge_ranges(*ranges):
+    """
+    Merge one or more iterables of (first, last) tuples, each sorted by its first address, and yield the union as
+    sorted, non-overlapping and non-adjacent (first, last) tuples. Input is consumed lazily.
+    """
+    current = None
+    for first, last in heapq.merge(*ranges):
+        if current is None:
+            current = [first, last]
+        elif first <= current[1] + 1:
+            current[1] = max(current[1], last)
+        else:
+            yield tuple(current)
+            current = [first, last]
+    if current is not None:
+        yield tuple(current)
+
+
+def get_free_ranges(first, last, *used_ranges):
+    """
+    Yield the (first, last) tuples of all space between first and last (inclusive) not covered by any of the given
+    used ranges. Each iterable of used ranges must be sorted by first address. Iteration of the used ranges stops as
+    soon as the end of the space has been reached.
+    """
+    cursor = first
+    for start, end in merge_ranges(*used_ranges):
+        if end < cursor:
+            continue
+        if start > last:
+            break
+        if start > cursor:
+            yield cursor, start - 1
+        cursor = end + 1
+        if cursor > last:
+            return
+    if cursor <= last:
+        yield cursor, last
+
+
+def get_range_size(ranges, first=None, last=None):
+    """
+    Return the total number of addresses within the given (first, last) tuples, which must not overlap. If first
+    and/or last are specified, only addresses between these bounds are counted.
+    """
+    size = 0
+    for start, end in ranges:
+        if first is not None:
+            start = max(start, first)
+        if last is not None:
+            end = min(end, last)
+        if end >= start:
+            size += end - start + 1
+    return size
+
+
+def iter_addresses(ranges, version, limit=None):
+    """
+    Yield each address within the given (first, last) tuples as an IPAddress, up to an optional limit.
+    """
+    addresses = (
+        netaddr.IPAddress(value, version) for first, last in ranges for value in range(first, last + 1)
+    )
+    return islice(addresses, limit)
+
+
+def iter_cidrs(ranges, version):
+    """
+    Yield the minimal list of IPNetworks covering each of the given (first, last) tuples, in order.
+    """
+    for first, last in ranges:
+        yield from netaddr.iprange_to_cidrs(netaddr.IPAddress(first, version), netaddr.IPAddress(last, version))
+
+
+class PrefixAllocator:
+    """
+    Allocate child prefixes of arbitrary sizes from a compact, sorted list of free (first, last) ranges. Each prefix is
+    allocated at the lowest available address aligned to its size.
+    """
+    def __init__(self, free_ranges, version):
+        self.version = version
+        self.bits = 32 if version == 4 else 128
+        self.free_ranges = list(free_ranges)
+
+    @classmethod
+    def from_cidrs(cls, cidrs):
+        """
+        Initialize an allocator from a list of available IPNetworks (which must all belong to the same family).
+        """
+        cidrs = sorted(netaddr.IPNetwork(cidr) for cidr in cidrs)
+        version = cidrs[0].version if cidrs else 4
+        return cls(merge_ranges([(cidr.first, cidr.last) for cidr in cidrs]), version)
+
+    def find(self, prefix_length):
+        """
+        Return the index of the free range containing the first available prefix of the given length, and the first
+        address of that prefix, or (None, None) if no such prefix is available.
+        """
+        size = 2 ** (self.bits - prefix_length)
+        for i, (first, last) in enumerate(self.free_ranges):
+            start = -(-first // size) * size
+            if start + size - 1 <= last:
+                return i, start
+        return None, None
+
+    def allocate(self, prefix_length):
+        """
+        Allocate and return the first available prefix of the given length as an IPNetwork, or None if no space is
+        available.
+        """
+        i, start = self.find(prefix_length)
+        if i is None:
+            return None
+
+        # Split the free range around the allocated prefix
+        first, last = self.free_ranges[i]
+        end = start + 2 ** (self.bits - prefix_length) - 1
+        remaining = [(a, b) for a, b in ((first, start - 1), (end + 1, last)) if a <= b]
+        self.free_ranges[i:i + 1] = remaining
+
+        return netaddr.IPNetwork((start, prefix_length), version=self.version)
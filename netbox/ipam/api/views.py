@@ -6,7 +6,6 @@ from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext as _
 from django_pglocks import advisory_lock
 from drf_spectacular.utils import extend_schema
-from netaddr import IPSet
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
@@ -14,8 +13,8 @@ from rest_framework.routers import APIRootView
 from rest_framework.views import APIView
 
 from ipam import filtersets
+from ipam.allocation import PrefixAllocator, iter_cidrs
 from ipam.models import *
-from ipam.utils import get_next_available_prefix
 from netbox.api.viewsets import NetBoxModelViewSet
 from netbox.api.viewsets.mixins import ObjectValidationMixin
 from netbox.config import get_config
@@ -329,12 +328,12 @@ class AvailablePrefixesView(AvailableObjectsView):
         return get_object_or_404(Prefix.objects.restrict(request.user), pk=pk)
 
     def get_available_objects(self, parent, limit=None):
-        return parent.get_available_prefixes().iter_cidrs()
+        return list(iter_cidrs(parent.get_free_ranges(), parent.family))
 
     def check_sufficient_available(self, requested_objects, available_objects):
-        available_prefixes = IPSet(available_objects)
+        allocator = PrefixAllocator.from_cidrs(available_objects)
         for requested_object in requested_objects:
-            if not get_next_available_prefix(available_prefixes, requested_object['prefix_length']):
+            if not allocator.allocate(requested_object['prefix_length']):
                 return False
         return True
 
@@ -345,13 +344,13 @@ class AvailablePrefixesView(AvailableObjectsView):
         }
 
     def prep_object_data(self, requested_objects, available_objects, parent):
-        available_prefixes = IPSet(available_objects)
+        allocator = PrefixAllocator.from_cidrs(available_objects)
         for i, request_data in enumerate(requested_objects):
 
-            # Find the first available prefix equal to or larger than the requested size
-            if allocated_prefix := get_next_available_prefix(available_prefixes, request_data['prefix_length']):
+            # Find the first available prefix of the requested size
+            if allocated_prefix := allocator.allocate(request_data['prefix_length']):
                 request_data.update({
-                    'prefix': allocated_prefix,
+                    'prefix': str(allocated_prefix),
                     'vrf': parent.vrf.pk if parent.vrf else None,
                 })
             else:
@@ -379,13 +378,8 @@ class AvailableIPAddressesView(AvailableObjectsView):
     advisory_lock_key = 'available-ips'
 
     def get_available_objects(self, parent, limit=None):
-        # Calculate available IPs within the parent
-        ip_list = []
-        for index, ip in enumerate(parent.get_available_ips(), start=1):
-            ip_list.append(ip)
-            if index == limit:
-                break
-        return ip_list
+        # Calculate available IPs within the parent (reading child IPs only as far as necessary)
+        return list(parent.iter_available_ips(limit))
 
     def get_extra_context(self, parent):
         return {
@@ -1,27 +1,76 @@
-from django.core.management.base import BaseCommand
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.translation import gettext as _
 
 from ipam.models import Prefix, VRF
-from ipam.utils import rebuild_prefixes
+from ipam.utils import PREFIX_HIERARCHY_BATCH_SIZE, rebuild_prefixes
+
+
+def _rebuild_prefixes_worker(vrf, batch_size):
+    """
+    Entry point for worker processes. Each worker establishes its own database connection.
+    """
+    start_time = time.monotonic()
+    try:
+        return vrf, rebuild_prefixes(vrf, batch_size=batch_size), time.monotonic() - start_time
+    finally:
+        connections.close_all()
 
 
 class Command(BaseCommand):
     help = "Rebuild the prefix hierarchy (depth and children counts)"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="The number of worker processes among which to distribute VRFs (default: 1)"
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PREFIX_HIERARCHY_BATCH_SIZE,
+            help=f"The number of prefixes to update per query (default: {PREFIX_HIERARCHY_BATCH_SIZE})"
+        )
+
     def handle(self, *model_names, **options):
-        self.stdout.write(f'Rebuilding {Prefix.objects.count()} prefixes...')
+        if options['workers'] < 1:
+            raise CommandError(_("The number of workers must be at least 1."))
+        if options['batch_size'] < 1:
+            raise CommandError(_("The batch size must be at least 1."))
 
-        # Reset existing counts
-        Prefix.objects.update(_depth=0, _children=0)
+        self.stdout.write(f'Rebuilding {Prefix.objects.count()} prefixes...')
+        start_time = time.monotonic()
 
-        # Rebuild the global table
-        global_count = Prefix.objects.filter(vrf__isnull=True).count()
-        self.stdout.write(f'Global: {global_count} prefixes...')
-        rebuild_prefixes(None)
+        # Rebuild the global table and each VRF
+        vrf_names = {None: 'Global', **{vrf.pk: f'VRF {vrf}' for vrf in VRF.objects.all()}}
 
-        # Rebuild each VRF
-        for vrf in VRF.objects.all():
-            vrf_count = Prefix.objects.filter(vrf=vrf).count()
-            self.stdout.write(f'VRF {vrf}: {vrf_count} prefixes...')
-            rebuild_prefixes(vrf.pk)
+        if options['workers'] > 1:
+            # Close any open database connections prior to forking worker processes
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options['workers'],
+                mp_context=multiprocessing.get_context('fork')
+            ) as executor:
+                futures = [
+                    executor.submit(_rebuild_prefixes_worker, vrf, options['batch_size'])
+                    for vrf in vrf_names
+                ]
+                for future in as_completed(futures):
+                    vrf, count, elapsed = future.result()
+                    self.stdout.write(f'{vrf_names[vrf]}: {count} prefixes updated in {elapsed:.1f}s')
+        else:
+            for vrf, name in vrf_names.items():
+                vrf_count = Prefix.objects.filter(vrf=vrf).count()
+                self.stdout.write(f'{name}: {vrf_count} prefixes...', ending='')
+                self.stdout.flush()
+                vrf_start_time = time.monotonic()
+                count = rebuild_prefixes(vrf, batch_size=options['batch_size'])
+                self.stdout.write(f' {count} updated in {time.monotonic() - vrf_start_time:.1f}s')
 
-        self.stdout.write(self.style.SUCCESS('Finished.'))
+        self.stdout.write(self.style.SUCCESS(f'Finished in {time.monotonic() - start_time:.1f}s.'))
@@ -9,6 +9,9 @@ from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from core.models import ObjectType
+from ipam.allocation import (
+    PrefixAllocator, get_free_ranges, get_range_size, iter_addresses, iter_cidrs, merge_ranges,
+)
 from ipam.choices import *
 from ipam.constants import *
 from ipam.fields import IPNetworkField, IPAddressField
@@ -32,9 +35,10 @@ __all__ = (
 
 class GetAvailablePrefixesMixin:
 
-    def get_available_prefixes(self):
+    def get_free_ranges(self):
         """
-        Return all available prefixes within this Aggregate or Prefix as an IPSet.
+        Yield the (first, last) integer ranges of all space within this Aggregate or Prefix not allocated to a child
+        prefix. Child prefixes are read in order, and only as far as necessary.
         """
         params = {
             'prefix__net_contained': str(self.prefix)
@@ -42,17 +46,27 @@ class GetAvailablePrefixesMixin:
         if hasattr(self, 'vrf'):
             params['vrf'] = self.vrf
 
-        child_prefixes = Prefix.objects.filter(**params).values_list('prefix', flat=True)
-        return netaddr.IPSet(self.prefix) - netaddr.IPSet(child_prefixes)
+        child_prefixes = Prefix.objects.filter(**params).order_by('prefix').values_list('prefix', flat=True)
+        return get_free_ranges(
+            self.prefix.first,
+            self.prefix.last,
+            ((prefix.first, prefix.last) for prefix in child_prefixes.iterator())
+        )
+
+    def get_available_prefixes(self):
+        """
+        Return all available prefixes within this Aggregate or Prefix as an IPSet.
+        """
+        return netaddr.IPSet(iter_cidrs(self.get_free_ranges(), self.prefix.version))
 
-    def get_first_available_prefix(self):
+    def get_first_available_prefix(self, prefix_length=None):
         """
-        Return the first available child prefix within the prefix (or None).
+        Return the first available child prefix within the prefix (or None). If a prefix length is specified, return
+        the first available prefix of that size.
         """
-        available_prefixes = self.get_available_prefixes()
-        if not available_prefixes:
-            return None
-        return available_prefixes.iter_cidrs()[0]
+        if prefix_length is not None:
+            return PrefixAllocator(self.get_free_ranges(), self.prefix.version).allocate(prefix_length)
+        return next(iter_cidrs(self.get_free_ranges(), self.prefix.version), None)
 
 
 class RIR(OrganizationalModel):
@@ -178,9 +192,13 @@ class Aggregate(ContactsMixin, GetAvailablePrefixesMixin, PrimaryModel):
         """
         Determine the prefix utilization of the aggregate and return it as a percentage.
         """
-        queryset = Prefix.objects.filter(prefix__net_contained_or_equal=str(self.prefix))
-        child_prefixes = netaddr.IPSet([p.prefix for p in queryset])
-        utilization = float(child_prefixes.size) / self.prefix.size * 100
+        child_prefixes = Prefix.objects.filter(
+            prefix__net_contained_or_equal=str(self.prefix)
+        ).order_by('prefix').values_list('prefix', flat=True)
+        child_size = get_range_size(merge_ranges(
+            (prefix.first, prefix.last) for prefix in child_prefixes.iterator()
+        ))
+        utilization = float(child_size) / self.prefix.size * 100
 
         return min(utilization, 100)
 
@@ -419,44 +437,64 @@ class Prefix(ContactsMixin, GetAvailablePrefixesMixin, PrimaryModel):
         else:
             return IPAddress.objects.filter(address__net_host_contained=str(self.prefix), vrf=self.vrf)
 
-    def get_available_ips(self):
+    def _get_used_ip_ranges(self):
         """
-        Return all available IPs within this prefix as an IPSet.
+        Return iterables of the (first, last) integer ranges occupied by child IPAddresses and IPRanges, each sorted
+        by first address. IP addresses are streamed from the database in host order.
+        """
+        child_ips = self.get_child_ips().values_list('address', flat=True)
+        child_ranges = sorted(
+            (start.ip.value, end.ip.value)
+            for start, end in self.get_child_ranges().values_list('start_address', 'end_address')
+        )
+        return (
+            ((address.ip.value, address.ip.value) for address in child_ips.iterator()),
+            child_ranges,
+        )
+
+    def get_free_ip_ranges(self):
+        """
+        Yield the (first, last) integer ranges of all unallocated, usable IP addresses within this prefix.
         """
         if self.mark_utilized:
-            return netaddr.IPSet()
+            return
 
-        prefix = netaddr.IPSet(self.prefix)
-        child_ips = netaddr.IPSet([ip.address.ip for ip in self.get_child_ips()])
-        child_ranges = []
-        for iprange in self.get_child_ranges():
-            child_ranges.append(iprange.range)
-        available_ips = prefix - child_ips - netaddr.IPSet(child_ranges)
+        first, last = self.prefix.first, self.prefix.last
 
         # IPv6 /127's, pool, or IPv4 /31-/32 sets are fully usable
         if (self.family == 6 and self.prefix.prefixlen >= 127) or self.is_pool or (self.family == 4 and self.prefix.prefixlen >= 31):
-            return available_ips
-
-        if self.family == 4:
+            pass
+        elif self.family == 4:
             # For "normal" IPv4 prefixes, omit first and last addresses
-            available_ips -= netaddr.IPSet([
-                netaddr.IPAddress(self.prefix.first),
-                netaddr.IPAddress(self.prefix.last),
-            ])
+            first, last = first + 1, last - 1
         else:
             # For IPv6 prefixes, omit the Subnet-Router anycast address
             # per RFC 4291
-            available_ips -= netaddr.IPSet([netaddr.IPAddress(self.prefix.first)])
-        return available_ips
+            first += 1
+
+        yield from get_free_ranges(first, last, *self._get_used_ip_ranges())
+
+    def iter_available_ips(self, limit=None):
+        """
+        Yield available IPs within this prefix in order, up to an optional limit. Child IPs are read from the database
+        only as far as necessary.
+        """
+        return iter_addresses(self.get_free_ip_ranges(), self.family, limit)
+
+    def get_available_ips(self):
+        """
+        Return all available IPs within this prefix as an IPSet.
+        """
+        return netaddr.IPSet(iter_cidrs(self.get_free_ip_ranges(), self.family))
 
     def get_first_available_ip(self):
         """
         Return the first available IP within the prefix (or None).
         """
-        available_ips = self.get_available_ips()
-        if not available_ips:
+        ip = next(self.iter_available_ips(limit=1), None)
+        if ip is None:
             return None
-        return '{}/{}'.format(next(available_ips.__iter__()), self.prefix.prefixlen)
+        return '{}/{}'.format(ip, self.prefix.prefixlen)
 
     def get_utilization(self):
         """
@@ -467,22 +505,22 @@ class Prefix(ContactsMixin, GetAvailablePrefixesMixin, PrimaryModel):
             return 100
 
         if self.status == PrefixStatusChoices.STATUS_CONTAINER:
-            queryset = Prefix.objects.filter(
+            child_prefixes = Prefix.objects.filter(
                 prefix__net_contained=str(self.prefix),
                 vrf=self.vrf
-            )
-            child_prefixes = netaddr.IPSet([p.prefix for p in queryset])
-            utilization = float(child_prefixes.size) / self.prefix.size * 100
+            ).order_by('prefix').values_list('prefix', flat=True)
+            child_size = get_range_size(merge_ranges(
+                (prefix.first, prefix.last) for prefix in child_prefixes.iterator()
+            ))
+            utilization = float(child_size) / self.prefix.size * 100
         else:
-            # Compile an IPSet to avoid counting duplicate IPs
-            child_ips = netaddr.IPSet(
-                [_.range for _ in self.get_child_ranges()] + [_.address.ip for _ in self.get_child_ips()]
-            )
+            # Merge overlapping ranges to avoid counting duplicate IPs
+            child_size = get_range_size(merge_ranges(*self._get_used_ip_ranges()))
 
             prefix_size = self.prefix.size
             if self.prefix.version == 4 and self.prefix.prefixlen < 31 and not self.is_pool:
                 prefix_size -= 2
-            utilization = float(child_ips.size) / prefix_size * 100
+            utilization = float(child_size) / prefix_size * 100
 
         return min(utilization, 100)
 
@@ -660,25 +698,39 @@ class IPRange(ContactsMixin, PrimaryModel):
             vrf=self.vrf
         )
 
+    def get_free_ip_ranges(self):
+        """
+        Yield the (first, last) integer ranges of all unallocated IP addresses within this range.
+        """
+        child_ips = self.get_child_ips().values_list('address', flat=True)
+        return get_free_ranges(
+            self.start_address.ip.value,
+            self.end_address.ip.value,
+            ((address.ip.value, address.ip.value) for address in child_ips.iterator())
+        )
+
+    def iter_available_ips(self, limit=None):
+        """
+        Yield available IPs within this range in order, up to an optional limit.
+        """
+        return iter_addresses(self.get_free_ip_ranges(), self.family, limit)
+
     def get_available_ips(self):
         """
         Return all available IPs within this range as an IPSet.
         """
-        range = netaddr.IPRange(self.start_address.ip, self.end_address.ip)
-        child_ips = netaddr.IPSet([ip.address.ip for ip in self.get_child_ips()])
-
-        return netaddr.IPSet(range) - child_ips
+        return netaddr.IPSet(iter_cidrs(self.get_free_ip_ranges(), self.family))
 
     @cached_property
     def first_available_ip(self):
         """
         Return the first available IP within the range (or None).
         """
-        available_ips = self.get_available_ips()
-        if not available_ips:
+        ip = next(self.iter_available_ips(limit=1), None)
+        if ip is None:
             return None
 
-        return '{}/{}'.format(next(available_ips.__iter__()), self.start_address.prefixlen)
+        return '{}/{}'.format(ip, self.start_address.prefixlen)
 
     @cached_property
     def utilization(self):
@@ -688,10 +740,11 @@ class IPRange(ContactsMixin, PrimaryModel):
         if self.mark_utilized:
             return 100
 
-        # Compile an IPSet to avoid counting duplicate IPs
-        child_count = netaddr.IPSet([
-            ip.address.ip for ip in self.get_child_ips()
-        ]).size
+        # Merge duplicate IPs to avoid counting them more than once
+        child_ips = self.get_child_ips().values_list('address', flat=True)
+        child_count = get_range_size(merge_ranges(
+            (address.ip.value, address.ip.value) for address in child_ips.iterator()
+        ))
 
         return min(float(child_count) / self.size * 100, 100)
 
@@ -1,29 +1,32 @@
+import netaddr
 from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
 from dcim.models import Device
+from netbox.context import prefix_hierarchy_queue
 from virtualization.models import VirtualMachine
 from .models import IPAddress, Prefix
+from .utils import update_prefix_hierarchy
 
 
-def update_parents_children(prefix):
+def get_original_state(prefix):
     """
-    Update depth on prefix & containing prefixes
+    Return the (vrf_id, prefix) tuple of a Prefix as it was last saved.
     """
-    parents = prefix.get_parents(include_self=True).annotate_hierarchy()
-    for parent in parents:
-        parent._children = parent.hierarchy_children
-    Prefix.objects.bulk_update(parents, ['_children'], batch_size=100)
+    return prefix._vrf_id, netaddr.IPNetwork(prefix._prefix).cidr
 
 
-def update_children_depth(prefix):
+def queue_hierarchy_update(prefix, original):
     """
-    Update children count on prefix & contained prefixes
+    Record a change to the Prefix hierarchy. If hierarchy updates are being deferred (e.g. within a bulk operation),
+    the change is queued and coalesced with any others made to the same prefix. Otherwise, the depth and child counts
+    of affected prefixes are updated immediately.
     """
-    children = prefix.get_children(include_self=True).annotate_hierarchy()
-    for child in children:
-        child._depth = child.hierarchy_depth
-    Prefix.objects.bulk_update(children, ['_depth'], batch_size=100)
+    queue = prefix_hierarchy_queue.get()
+    if queue is not None:
+        queue.setdefault(prefix.pk, original)
+    else:
+        update_prefix_hierarchy({prefix.pk: original})
 
 
 @receiver(post_save, sender=Prefix)
@@ -31,22 +34,17 @@ def handle_prefix_saved(instance, created, **kwargs):
 
     # Prefix has changed (or new instance has been created)
     if created or instance.vrf_id != instance._vrf_id or instance.prefix != instance._prefix:
+        queue_hierarchy_update(instance, None if created else get_original_state(instance))
 
-        update_parents_children(instance)
-        update_children_depth(instance)
-
-        # If this is not a new prefix, clean up parent/children of previous prefix
-        if not created:
-            old_prefix = Prefix(vrf_id=instance._vrf_id, prefix=instance._prefix)
-            update_parents_children(old_prefix)
-            update_children_depth(old_prefix)
+        # Record the saved state of the prefix to detect any subsequent changes
+        instance._prefix = instance.prefix
+        instance._vrf_id = instance.vrf_id
 
 
 @receiver(post_delete, sender=Prefix)
 def handle_prefix_deleted(instance, **kwargs):
 
-    update_parents_children(instance)
-    update_children_depth(instance)
+    queue_hierarchy_update(instance, get_original_state(instance))
 
 
 @receiver(pre_delete, sender=IPAddress)
@@ -2,8 +2,11 @@ from django.core.exceptions import ValidationError
 from django.test import TestCase, override_settings
 from netaddr import IPNetwork, IPSet
 
+from extras.context_managers import deferred_updates
 from ipam.choices import *
 from ipam.models import *
+from ipam.utils import rebuild_prefixes, update_prefix_hierarchy
+from netbox.context import prefix_hierarchy_queue
 
 
 class TestAggregate(TestCase):
@@ -172,6 +175,37 @@ class TestPrefix(TestCase):
         Prefix.objects.create(prefix=IPNetwork('10.0.3.0/24'))
         self.assertEqual(prefixes[0].get_first_available_prefix(), IPNetwork('10.0.4.0/22'))
 
+    def test_get_first_available_prefix_length(self):
+
+        prefixes = Prefix.objects.bulk_create((
+            Prefix(prefix=IPNetwork('10.0.0.0/16')),  # Parent prefix
+            Prefix(prefix=IPNetwork('10.0.0.0/24')),
+            Prefix(prefix=IPNetwork('10.0.2.0/24')),
+            Prefix(prefix=IPNetwork('10.0.5.0/24')),
+        ))
+        self.assertEqual(prefixes[0].get_first_available_prefix(24), IPNetwork('10.0.1.0/24'))
+        self.assertEqual(prefixes[0].get_first_available_prefix(23), IPNetwork('10.0.6.0/23'))
+        self.assertEqual(prefixes[0].get_first_available_prefix(22), IPNetwork('10.0.8.0/22'))
+        self.assertIsNone(prefixes[0].get_first_available_prefix(15))
+
+    def test_iter_available_ips(self):
+
+        parent_prefix = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24'))
+        IPAddress.objects.bulk_create((
+            IPAddress(address=IPNetwork('10.0.0.1/24')),
+            IPAddress(address=IPNetwork('10.0.0.2/24')),
+            IPAddress(address=IPNetwork('10.0.0.4/24')),
+        ))
+        IPRange.objects.create(
+            start_address=IPNetwork('10.0.0.6/24'),
+            end_address=IPNetwork('10.0.0.9/24')
+        )
+        self.assertEqual(
+            [str(ip) for ip in parent_prefix.iter_available_ips(limit=4)],
+            ['10.0.0.3', '10.0.0.5', '10.0.0.10', '10.0.0.11']
+        )
+        self.assertEqual(len(list(parent_prefix.iter_available_ips())), 254 - 7)
+
     def test_get_first_available_ip(self):
 
         parent_prefix = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24'))
@@ -447,6 +481,59 @@ class TestPrefixHierarchy(TestCase):
         self.assertEqual(prefixes[3]._depth, 2)
         self.assertEqual(prefixes[3]._children, 0)
 
+    def test_deferred_updates(self):
+        queue = {}
+        token = prefix_hierarchy_queue.set(queue)
+        try:
+            # Create 10.0.0.0/12 and 10.0.1.0/24, and delete 10.0.0.0/24
+            Prefix(prefix='10.0.0.0/12').save()
+            Prefix(prefix='10.0.1.0/24').save()
+            Prefix.objects.get(prefix='10.0.0.0/24').delete()
+        finally:
+            prefix_hierarchy_queue.reset(token)
+
+        # Updates are applied only once the queue has been flushed
+        self.assertEqual(Prefix.objects.get(prefix='10.0.0.0/8')._children, 2)
+        update_prefix_hierarchy(queue)
+
+        prefixes = Prefix.objects.filter(prefix__family=4)
+        self.assertEqual(prefixes[0].prefix, IPNetwork('10.0.0.0/8'))
+        self.assertEqual(prefixes[0]._depth, 0)
+        self.assertEqual(prefixes[0]._children, 3)
+        self.assertEqual(prefixes[1].prefix, IPNetwork('10.0.0.0/12'))
+        self.assertEqual(prefixes[1]._depth, 1)
+        self.assertEqual(prefixes[1]._children, 2)
+        self.assertEqual(prefixes[2].prefix, IPNetwork('10.0.0.0/16'))
+        self.assertEqual(prefixes[2]._depth, 2)
+        self.assertEqual(prefixes[2]._children, 1)
+        self.assertEqual(prefixes[3].prefix, IPNetwork('10.0.1.0/24'))
+        self.assertEqual(prefixes[3]._depth, 3)
+        self.assertEqual(prefixes[3]._children, 0)
+
+    def test_deferred_updates_context(self):
+        with deferred_updates():
+            Prefix(prefix='10.0.0.0/12').save()
+            self.assertEqual(Prefix.objects.get(prefix='10.0.0.0/8')._children, 2)
+
+        # Queued updates are applied upon exiting the context
+        self.assertEqual(Prefix.objects.get(prefix='10.0.0.0/8')._children, 3)
+        self.assertEqual(Prefix.objects.get(prefix='10.0.0.0/12')._depth, 1)
+        self.assertIsNone(prefix_hierarchy_queue.get())
+
+    def test_rebuild_prefixes(self):
+        Prefix(prefix='10.0.0.0/16').save()
+        Prefix.objects.update(_depth=0, _children=0)
+        rebuild_prefixes(None)
+
+        prefixes = Prefix.objects.filter(prefix__family=4)
+        self.assertEqual(prefixes[0]._depth, 0)
+        self.assertEqual(prefixes[0]._children, 3)
+        for prefix in prefixes[1:3]:
+            self.assertEqual(prefix._depth, 1)
+            self.assertEqual(prefix._children, 1)
+        self.assertEqual(prefixes[3]._depth, 2)
+        self.assertEqual(prefixes[3]._children, 0)
+
 
 class TestIPAddress(TestCase):
 
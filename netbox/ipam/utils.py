@@ -1,5 +1,13 @@
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from itertools import accumulate
+
 import netaddr
+from django.db import connection, transaction
+from django.db.models import Q
 
+from netbox.constants import ADVISORY_LOCK_KEYS
+from .allocation import iter_cidrs, merge_ranges
 from .constants import *
 from .models import Prefix, VLAN
 
@@ -8,9 +16,13 @@ __all__ = (
     'add_available_vlans',
     'add_requested_prefixes',
     'get_next_available_prefix',
+    'get_prefix_hierarchy',
     'rebuild_prefixes',
+    'update_prefix_hierarchy',
 )
 
+PREFIX_HIERARCHY_BATCH_SIZE = 1000
+
 
 def add_requested_prefixes(parent, prefix_list, show_available=True, show_assigned=True):
     """
@@ -134,64 +146,199 @@ def add_available_vlans(vlans, vlan_group=None):
     return vlans
 
 
-def rebuild_prefixes(vrf):
+def get_prefix_hierarchy(prefixes):
     """
-    Rebuild the prefix hierarchy for all prefixes in the specified VRF (or global table).
+    Given an iterable of (pk, prefix) tuples ordered by prefix, yield a (pk, depth, children) tuple for each prefix.
+    Depth is the number of distinct prefixes containing the prefix; children is the number of prefixes it contains.
     """
     def contains(parent, child):
-        return child in parent and child != parent
+        return (
+            parent.version == child.version and parent.first <= child.first and child.last <= parent.last and
+            child != parent
+        )
 
-    def push_to_stack(prefix):
-        # Increment child count on parent nodes
-        for n in stack:
-            n['children'] += 1
-        stack.append({
-            'pk': [prefix['pk']],
-            'prefix': prefix['prefix'],
-            'children': 0,
-        })
+    def pop_from_stack():
+        node = stack.pop()
+        for pk in node['pk']:
+            yield pk, len(stack), node['children']
 
     stack = []
-    update_queue = []
-    prefixes = Prefix.objects.filter(vrf=vrf).values('pk', 'prefix')
-
-    # Iterate through all Prefixes in the VRF, growing and shrinking the stack as we go
-    for i, p in enumerate(prefixes):
-
-        # Grow the stack if this is a child of the most recent prefix
-        if not stack or contains(stack[-1]['prefix'], p['prefix']):
-            push_to_stack(p)
 
-        # Handle duplicate prefixes
-        elif stack[-1]['prefix'] == p['prefix']:
-            stack[-1]['pk'].append(p['pk'])
+    # Iterate through all Prefixes, growing and shrinking the stack as we go
+    for pk, prefix in prefixes:
 
         # If this is a sibling or parent of the most recent prefix, pop nodes from the
         # stack until we reach a parent prefix (or the root)
+        while stack and stack[-1]['prefix'] != prefix and not contains(stack[-1]['prefix'], prefix):
+            yield from pop_from_stack()
+
+        # Increment child count on parent nodes
+        for node in stack:
+            if node['prefix'] != prefix:
+                node['children'] += 1
+
+        # Handle duplicate prefixes
+        if stack and stack[-1]['prefix'] == prefix:
+            stack[-1]['pk'].append(pk)
         else:
-            while stack and not contains(stack[-1]['prefix'], p['prefix']):
-                node = stack.pop()
-                for pk in node['pk']:
-                    update_queue.append(
-                        Prefix(pk=pk, _depth=len(stack), _children=node['children'])
-                    )
-            push_to_stack(p)
-
-        # Flush the update queue once it reaches 100 Prefixes
-        if len(update_queue) >= 100:
-            Prefix.objects.bulk_update(update_queue, ['_depth', '_children'])
-            update_queue = []
+            stack.append({
+                'pk': [pk],
+                'prefix': prefix,
+                'children': 0,
+            })
 
     # Clear out any prefixes remaining in the stack
     while stack:
-        node = stack.pop()
-        for pk in node['pk']:
+        yield from pop_from_stack()
+
+
+def rebuild_prefixes(vrf, batch_size=PREFIX_HIERARCHY_BATCH_SIZE):
+    """
+    Rebuild the prefix hierarchy for all prefixes in the specified VRF (or global table). Only prefixes whose depth or
+    child count has changed are updated. Returns the number of prefixes updated.
+    """
+    prefixes = Prefix.objects.filter(vrf=vrf).values_list('pk', 'prefix', '_depth', '_children')
+    current = {}
+
+    def iter_prefixes():
+        for pk, prefix, depth, children in prefixes.iterator(chunk_size=batch_size):
+            current[pk] = (depth, children)
+            yield pk, prefix
+
+    count = 0
+    update_queue = []
+    for pk, depth, children in get_prefix_hierarchy(iter_prefixes()):
+        if current.pop(pk) != (depth, children):
             update_queue.append(
-                Prefix(pk=pk, _depth=len(stack), _children=node['children'])
+                Prefix(pk=pk, _depth=depth, _children=children)
             )
 
+        # Flush the update queue once it reaches the batch size
+        if len(update_queue) >= batch_size:
+            Prefix.objects.bulk_update(update_queue, ['_depth', '_children'])
+            count += len(update_queue)
+            update_queue = []
+
     # Final flush of any remaining Prefixes
     Prefix.objects.bulk_update(update_queue, ['_depth', '_children'])
+    count += len(update_queue)
+
+    return count
+
+
+def _update_vrf_prefix_hierarchy(vrf_id, added, removed):
+    """
+    Update the hierarchy of all prefixes in a VRF affected by the addition and removal of the given prefixes.
+
+    Prefixes within a changed prefix have their depth and child counts recalculated, as all of their parents and
+    children are affected. Prefixes which only contain changed prefixes have their depth recalculated and their
+    child counts adjusted by the net number of prefixes added within them, so that their (possibly numerous) other
+    children need not be retrieved.
+
+    Must be called within a transaction. Updates to the same VRF are serialized by a transaction-level advisory lock,
+    such that the affected prefixes are read only once any concurrent changes to the VRF have been committed. This
+    prevents concurrent updates from overwriting one another's adjustments.
+
+    Args:
+        vrf_id: The PK of the VRF (or None for the global table)
+        added: A Counter of prefixes added to the VRF (all of the same address family)
+        removed: A Counter of prefixes removed from the VRF (all of the same address family)
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_advisory_xact_lock(%s, %s)', [ADVISORY_LOCK_KEYS['prefix-hierarchy'], vrf_id or 0]
+        )
+
+    changed = sorted(set(added) | set(removed))
+    version = changed[0].version
+
+    # Compile the minimal set of CIDRs covering all changed prefixes
+    cover = list(iter_cidrs(merge_ranges([(prefix.first, prefix.last) for prefix in changed]), version))
+
+    # Retrieve all prefixes within or containing the covered space
+    affected = {}
+    for i in range(0, len(cover), 100):
+        query = Q()
+        for cidr in cover[i:i + 100]:
+            query |= Q(prefix__net_contained_or_equal=cidr) | Q(prefix__net_contains=cidr)
+        for pk, prefix, depth, children in Prefix.objects.filter(query, vrf_id=vrf_id).values_list(
+            'pk', 'prefix', '_depth', '_children'
+        ):
+            affected[pk] = (prefix, depth, children)
+    if not affected:
+        return
+
+    # Determine which affected prefixes fall within a changed prefix (the outermost changed prefixes are disjoint)
+    roots = []
+    for prefix in changed:
+        if not roots or prefix.first > roots[-1].last:
+            roots.append(prefix)
+    root_firsts = [root.first for root in roots]
+
+    def is_within_changed(prefix):
+        i = bisect_right(root_firsts, prefix.first) - 1
+        return i >= 0 and prefix.last <= roots[i].last
+
+    # Index the net change in the number of prefixes by first address
+    deltas = sorted(
+        (prefix.first, added[prefix] - removed[prefix]) for prefix in changed
+    )
+    delta_firsts = [first for first, _ in deltas]
+    delta_sums = [0, *accumulate(delta for _, delta in deltas)]
+
+    def get_children_delta(prefix):
+        return delta_sums[bisect_right(delta_firsts, prefix.last)] - delta_sums[bisect_left(delta_firsts, prefix.first)]
+
+    # Recalculate the hierarchy among affected prefixes
+    update_queue = []
+    hierarchy = get_prefix_hierarchy(
+        sorted(((pk, prefix) for pk, (prefix, _, _) in affected.items()), key=lambda p: (p[1], p[0]))
+    )
+    for pk, depth, children in hierarchy:
+        prefix, old_depth, old_children = affected[pk]
+        if not is_within_changed(prefix):
+            children = old_children + get_children_delta(prefix)
+        if (depth, children) != (old_depth, old_children):
+            update_queue.append(
+                Prefix(pk=pk, _depth=depth, _children=children)
+            )
+
+    Prefix.objects.bulk_update(update_queue, ['_depth', '_children'], batch_size=PREFIX_HIERARCHY_BATCH_SIZE)
+
+
+def update_prefix_hierarchy(changes):
+    """
+    Update the depth and child counts of all prefixes affected by the creation, modification, or deletion of the
+    specified prefixes. The current state of each prefix is retrieved from the database and compared with its
+    original state, so that multiple changes to the same prefix are coalesced.
+
+    Args:
+        changes: A dictionary mapping the PK of each changed Prefix to its original (vrf_id, prefix) tuple, or None
+            if the Prefix was created
+    """
+    current = {
+        pk: (vrf_id, prefix)
+        for pk, vrf_id, prefix in Prefix.objects.filter(pk__in=changes).values_list('pk', 'vrf_id', 'prefix')
+    }
+
+    # Tally the prefixes added to and removed from each VRF (by address family)
+    added = defaultdict(Counter)
+    removed = defaultdict(Counter)
+    for pk, original in changes.items():
+        new = current.get(pk)
+        if original == new:
+            continue
+        if original is not None:
+            vrf_id, prefix = original
+            removed[(vrf_id, prefix.version)][prefix] += 1
+        if new is not None:
+            vrf_id, prefix = new
+            added[(vrf_id, prefix.version)][prefix] += 1
+
+    # Acquire VRF locks in a consistent order to avoid deadlocks
+    with transaction.atomic():
+        for vrf_id, family in sorted({*added, *removed}, key=lambda key: (key[0] or 0, key[1])):
+            _update_vrf_prefix_hierarchy(vrf_id, added[(vrf_id, family)], removed[(vrf_id, family)])
 
 
 def get_next_available_prefix(ipset, prefix_size):
@@ -1,6 +1,11 @@
+import atexit
+import hashlib
 import logging
+import threading
+import time
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from rest_framework import authentication, exceptions
 from rest_framework.permissions import BasePermission, DjangoObjectPermissions, SAFE_METHODS
@@ -9,6 +14,98 @@ from netbox.config import get_config
 from users.models import Token
 from utilities.request import get_client_ip
 
+TOKEN_CACHE_KEY = 'api_token.{}'
+
+# The Token fields which are cached. The token's key and its user are never cached.
+TOKEN_CACHE_FIELDS = ('id', 'user_id', 'expires', 'last_used', 'write_enabled', 'allowed_ips')
+
+# The minimum interval (in seconds) between updates to a token's last_used time
+TOKEN_LAST_USED_INTERVAL = 60
+
+# Tokens' last_used times are recorded in memory and written to the database in batches
+# (see record_token_use() and flush_token_last_used())
+_token_last_used = {}
+_pending_last_used = set()
+_last_used_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def get_token_cache_key(key):
+    """
+    Return the cache key under which the token with the given key is cached. The key is hashed to avoid exposing it
+    within the cache.
+    """
+    return TOKEN_CACHE_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+def invalidate_cached_tokens(*keys):
+    """
+    Discard the cached tokens (if any) with the given keys.
+    """
+    cache.delete_many([get_token_cache_key(key) for key in keys])
+
+
+def record_token_use(token):
+    """
+    Record the use of a token. Its last_used time is updated no more than once per TOKEN_LAST_USED_INTERVAL, and
+    pending updates are written to the database together by flush_token_last_used() (see
+    flush_token_last_used_if_due()).
+    """
+    now = timezone.now()
+    with _last_used_lock:
+        last_used = max(filter(None, (token.last_used, _token_last_used.get(token.pk))), default=None)
+        if not last_used or (now - last_used).total_seconds() > TOKEN_LAST_USED_INTERVAL:
+            _token_last_used[token.pk] = now
+            _pending_last_used.add(token.pk)
+
+
+def flush_token_last_used_if_due():
+    """
+    Write all pending last_used times to the database if they have not been written within the last
+    TOKEN_LAST_USED_INTERVAL. This is called at the end of each request. Returns the number of tokens updated.
+    """
+    with _last_used_lock:
+        if not _pending_last_used or time.monotonic() - _last_flush <= TOKEN_LAST_USED_INTERVAL:
+            return 0
+
+    return flush_token_last_used()
+
+
+def flush_token_last_used():
+    """
+    Write all pending last_used times to the database using a single query. Returns the number of tokens updated.
+    """
+    global _last_flush
+
+    with _last_used_lock:
+        _last_flush = time.monotonic()
+        pending = [Token(pk=pk, last_used=_token_last_used[pk]) for pk in _pending_last_used]
+        _pending_last_used.clear()
+
+    if not pending:
+        return 0
+
+    # If maintenance mode is enabled, assume the database is read-only, and disable updating tokens' last used
+    # timestamps.
+    if get_config().MAINTENANCE_MODE:
+        logger = logging.getLogger('netbox.auth.login')
+        logger.debug("Maintenance mode enabled: Disabling update of token's last used timestamp")
+        return 0
+
+    return Token.objects.bulk_update(pending, ['last_used'])
+
+
+@atexit.register
+def flush_token_last_used_on_exit():
+    """
+    Write any pending last_used times to the database when the process exits.
+    """
+    try:
+        flush_token_last_used()
+    except Exception as e:
+        logger = logging.getLogger('netbox.auth.login')
+        logger.warning(f"Failed to record the last used times of API tokens: {e}")
+
 
 class TokenAuthentication(authentication.TokenAuthentication):
     """
@@ -37,22 +134,37 @@ class TokenAuthentication(authentication.TokenAuthentication):
 
         return result
 
-    def authenticate_credentials(self, key):
+    def get_token(self, key):
+        """
+        Return the token identified by the given key. Tokens are cached for up to API_TOKEN_CACHE_TIMEOUT seconds;
+        cached tokens are invalidated whenever the token or its user is modified. Only the fields needed to
+        authenticate a request are cached (see TOKEN_CACHE_FIELDS): the token's user is always retrieved from the
+        database.
+        """
         model = self.get_model()
+        timeout = settings.API_TOKEN_CACHE_TIMEOUT
+        cache_key = get_token_cache_key(key)
+
+        if timeout and (data := cache.get(cache_key)) is not None:
+            data['key'] = key
+            attnames = [field.attname for field in model._meta.concrete_fields if field.attname in data]
+            return model.from_db(None, attnames, [data[attname] for attname in attnames])
+
         try:
-            token = model.objects.prefetch_related('user').get(key=key)
+            token = model.objects.select_related('user').get(key=key)
         except model.DoesNotExist:
             raise exceptions.AuthenticationFailed("Invalid token")
 
+        if timeout:
+            cache.set(cache_key, {field: getattr(token, field) for field in TOKEN_CACHE_FIELDS}, timeout)
+
+        return token
+
+    def authenticate_credentials(self, key):
+        token = self.get_token(key)
+
         # Update last used, but only once per minute at most. This reduces write load on the database
-        if not token.last_used or (timezone.now() - token.last_used).total_seconds() > 60:
-            # If maintenance mode is enabled, assume the database is read-only, and disable updating the token's
-            # last_used time upon authentication.
-            if get_config().MAINTENANCE_MODE:
-                logger = logging.getLogger('netbox.auth.login')
-                logger.debug("Maintenance mode enabled: Disabling update of token's last used timestamp")
-            else:
-                Token.objects.filter(pk=token.pk).update(last_used=timezone.now())
+        record_token_use(token)
 
         # Enforce the Token's expiration time, if one has been set.
         if token.is_expired:
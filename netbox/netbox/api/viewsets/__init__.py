@@ -7,10 +7,12 @@ from django.db.models import ProtectedError, RestrictedError
 from django_pglocks import advisory_lock
 from netbox.constants import ADVISORY_LOCK_KEYS
 from rest_framework import mixins as drf_mixins
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from utilities.api import get_annotations_for_serializer, get_prefetches_for_serializer
+from extras.context_managers import deferred_updates
+from utilities.api import get_queryset_relation_fields, get_serializer_plan
 from utilities.exceptions import AbortRequest
 from . import mixins
 
@@ -55,13 +57,21 @@ class BaseViewSet(GenericViewSet):
         qs = super().get_queryset()
         serializer_class = self.get_serializer_class()
 
-        # Dynamically resolve prefetches for included serializer fields and attach them to the queryset
-        if prefetch := get_prefetches_for_serializer(serializer_class, fields_to_include=self.requested_fields):
-            qs = qs.prefetch_related(*prefetch)
-
-        # Dynamically resolve annotations for RelatedObjectCountFields on the serializer and attach them to the queryset
-        if annotations := get_annotations_for_serializer(serializer_class, fields_to_include=self.requested_fields):
-            qs = qs.annotate(**annotations)
+        # Retrieve the (cached) plan for the included serializer fields, and attach the related objects and annotations
+        # it requires to the queryset
+        plan = get_serializer_plan(serializer_class, fields_to_include=self.requested_fields)
+        if plan.select_related:
+            qs = qs.select_related(*plan.select_related)
+        if plan.prefetch_related:
+            qs = qs.prefetch_related(*plan.prefetch_related)
+        if plan.annotations:
+            qs = qs.annotate(**plan.annotations)
+
+        # If the model fields represented by all included serializer fields are known, retrieve only those fields
+        # (along with any needed to retrieve related objects). This is limited to read-only requests, as objects being
+        # modified must be retrieved in full.
+        if plan.only is not None and self.request.method in SAFE_METHODS:
+            qs = qs.only(*plan.only, *get_queryset_relation_fields(qs))
 
         return qs
 
@@ -165,7 +175,7 @@ class NetBoxModelViewSet(
 
         # Enforce object-level permissions on save()
         try:
-            with transaction.atomic():
+            with transaction.atomic(), deferred_updates():
                 instance = serializer.save()
                 self._validate_objects(instance)
         except ObjectDoesNotExist:
@@ -185,7 +195,7 @@ class NetBoxModelViewSet(
 
         # Enforce object-level permissions on save()
         try:
-            with transaction.atomic():
+            with transaction.atomic(), deferred_updates():
                 instance = serializer.save()
                 self._validate_objects(instance)
         except ObjectDoesNotExist:
@@ -4,9 +4,13 @@ from django.http import Http404
 from rest_framework import status
 from rest_framework.response import Response
 
+from core.api.serializers import JobSerializer
+from core.jobs import enqueue_export
 from core.models import ObjectType
+from extras.context_managers import deferred_updates
 from extras.models import ExportTemplate
 from netbox.api.serializers import BulkOperationSerializer
+from utilities.export import stream_export
 
 __all__ = (
     'BulkDestroyModelMixin',
@@ -45,7 +49,20 @@ class ExportTemplatesMixin:
             if et is None:
                 raise Http404
             queryset = self.filter_queryset(self.get_queryset())
-            return et.render_to_response(queryset)
+
+            # Render the ExportTemplate in the background
+            if request.GET.get('background'):
+                job, created = enqueue_export(
+                    request.user,
+                    queryset,
+                    filename=et.get_filename(queryset.model),
+                    content_type=et.mime_type or 'text/plain; charset=utf-8',
+                    template=et
+                )
+                serializer = JobSerializer(job, context={'request': request})
+                return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+            return et.render_to_response(queryset, stream=stream_export(queryset))
 
         return super().list(request, *args, **kwargs)
 
@@ -63,11 +80,12 @@ class SequentialBulkCreatesMixin:
             return super().create(request, *args, **kwargs)
 
         return_data = []
-        for data in request.data:
-            serializer = self.get_serializer(data=data)
-            serializer.is_valid(raise_exception=True)
-            self.perform_create(serializer)
-            return_data.append(serializer.data)
+        with deferred_updates():
+            for data in request.data:
+                serializer = self.get_serializer(data=data)
+                serializer.is_valid(raise_exception=True)
+                self.perform_create(serializer)
+                return_data.append(serializer.data)
 
         headers = self.get_success_headers(serializer.data)
 
@@ -113,7 +131,7 @@ class BulkUpdateModelMixin:
         return Response(data, status=status.HTTP_200_OK)
 
     def perform_bulk_update(self, objects, update_data, partial):
-        with transaction.atomic():
+        with transaction.atomic(), deferred_updates():
             data_list = []
             for obj in objects:
                 data = update_data.get(obj.id)
@@ -157,7 +175,7 @@ class BulkDestroyModelMixin:
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def perform_bulk_destroy(self, objects):
-        with transaction.atomic():
+        with transaction.atomic(), deferred_updates():
             for obj in objects:
                 if hasattr(obj, 'snapshot'):
                     obj.snapshot()
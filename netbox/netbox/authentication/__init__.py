@@ -1,3 +1,4 @@
+import hashlib
 import logging
 from collections import defaultdict
 
@@ -5,6 +6,7 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend, RemoteUserBackend as _RemoteUserBackend
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
@@ -12,12 +14,16 @@ from django.utils.translation import gettext_lazy as _
 from users.constants import CONSTRAINT_TOKEN_USER
 from users.models import Group, ObjectPermission
 from utilities.permissions import (
-    permission_is_exempt, qs_filter_from_constraints, resolve_permission, resolve_permission_type,
+    get_permissions_version, get_user_permission_filter, permission_is_exempt, resolve_permission,
+    resolve_permission_type,
 )
 from .misc import _mirror_groups
 
 UserModel = get_user_model()
 
+OBJECT_PERMISSIONS_CACHE_KEY = 'object_permissions.{key}.{version}'
+OBJECT_PERMISSIONS_CACHE_TIMEOUT = 3600
+
 AUTH_BACKEND_ATTRS = {
     # backend name: title, MDI icon name
     'amazon': ('Amazon AWS', 'aws'),
@@ -69,15 +75,21 @@ class ObjectPermissionMixin:
         if not user_obj.is_active or user_obj.is_anonymous:
             return dict()
         if not hasattr(user_obj, '_object_perm_cache'):
-            user_obj._object_perm_cache = self.get_object_permissions(user_obj)
+            user_obj._object_perm_cache = self.get_cached_object_permissions(user_obj)
         return user_obj._object_perm_cache
 
     def get_permission_filter(self, user_obj):
         return Q(users=user_obj) | Q(groups__user=user_obj)
 
-    def get_object_permissions(self, user_obj):
+    def get_permission_cache_key(self, user_obj):
         """
-        Return all permissions granted to the user by an ObjectPermission.
+        Return a string identifying the set of ObjectPermissions assigned to the user, for use in cache keys.
+        """
+        return str(user_obj.pk)
+
+    def get_default_permissions(self):
+        """
+        Return all permissions granted to all users by DEFAULT_PERMISSIONS.
         """
         # Initialize a dictionary mapping permission names to sets of constraints
         perms = defaultdict(list)
@@ -91,6 +103,14 @@ class ObjectPermissionMixin:
                 )
             perms[perm_name].extend(constraints)
 
+        return perms
+
+    def get_assigned_permissions(self, user_obj):
+        """
+        Return all permissions granted to the user by an assigned ObjectPermission.
+        """
+        perms = defaultdict(list)
+
         # Retrieve all assigned and enabled ObjectPermissions
         object_permissions = ObjectPermission.objects.filter(
             self.get_permission_filter(user_obj),
@@ -106,6 +126,40 @@ class ObjectPermissionMixin:
 
         return perms
 
+    def get_object_permissions(self, user_obj):
+        """
+        Return all permissions granted to the user by an ObjectPermission.
+        """
+        perms = self.get_default_permissions()
+        for perm_name, constraints in self.get_assigned_permissions(user_obj).items():
+            perms[perm_name].extend(constraints)
+
+        return perms
+
+    def get_cached_object_permissions(self, user_obj):
+        """
+        Return all permissions granted to the user by an ObjectPermission, retrieving the user's assigned permissions
+        from the cache where possible. Cached permissions are keyed by the global permissions version, which changes
+        whenever any ObjectPermission or its assignment is modified.
+        """
+        cache_key = OBJECT_PERMISSIONS_CACHE_KEY.format(
+            key=self.get_permission_cache_key(user_obj),
+            version=get_permissions_version()
+        )
+        assigned_perms = cache.get(cache_key)
+        if assigned_perms is None:
+            assigned_perms = dict(self.get_assigned_permissions(user_obj))
+            cache.set(cache_key, assigned_perms, OBJECT_PERMISSIONS_CACHE_TIMEOUT)
+
+        perms = self.get_default_permissions()
+        for perm_name, constraints in assigned_perms.items():
+            perms[perm_name].extend(constraints)
+
+        # Record the cache key to enable reuse of compiled permission filters
+        user_obj._object_perm_cache_key = cache_key
+
+        return perms
+
     def has_perm(self, user_obj, perm, obj=None):
         app_label, action, model_name = resolve_permission(perm)
 
@@ -143,7 +197,7 @@ class ObjectPermissionMixin:
         tokens = {
             CONSTRAINT_TOKEN_USER: user_obj,
         }
-        qs_filter = qs_filter_from_constraints(object_permissions[perm], tokens)
+        qs_filter = get_user_permission_filter(user_obj, perm, tokens)
 
         # Permission to perform the requested action on the object depends on whether the specified object matches
         # the specified constraints. Note that this check is made against the *database* record representing the object,
@@ -325,6 +379,16 @@ try:
                 permission_filter = permission_filter | Q(groups__name__in=user_obj.ldap_user.group_names)
             return permission_filter
 
+        def get_permission_cache_key(self, user_obj):
+            # Permissions may also be granted by the user's LDAP groups
+            cache_key = super().get_permission_cache_key(user_obj)
+            if (self.settings.FIND_GROUP_PERMS and
+                    hasattr(user_obj, "ldap_user") and
+                    hasattr(user_obj.ldap_user, "group_names")):
+                group_names = ','.join(sorted(user_obj.ldap_user.group_names))
+                cache_key = f'{cache_key}.{hashlib.sha256(group_names.encode()).hexdigest()}'
+            return cache_key
+
     # Patch with our modified _mirror_groups() method to support our custom Group model
     _LDAPUser._mirror_groups = _mirror_groups
 
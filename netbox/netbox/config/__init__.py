@@ -1,5 +1,6 @@
 import logging
 import threading
+import time
 
 from django.conf import settings
 from django.core.cache import cache
@@ -12,33 +13,80 @@ __all__ = (
     'clear_config',
     'ConfigItem',
     'get_config',
+    'invalidate_config',
     'PARAMS',
 )
 
 _thread_locals = threading.local()
 
+# A process-wide snapshot of the current configuration, shared by all threads
+_config = None
+_config_checked = None
+_config_generation = 0
+_config_lock = threading.Lock()
+
 logger = logging.getLogger('netbox.config')
 
 
 def get_config():
     """
-    Return the current NetBox configuration, pulling it from cache if not already loaded in memory.
+    Return the current NetBox configuration, pulling it from cache if not already loaded in memory. The same
+    configuration is returned to the current thread until clear_config() is called.
     """
     if not hasattr(_thread_locals, 'config'):
-        _thread_locals.config = Config()
-        logger.debug("Initialized configuration")
+        _thread_locals.config = _get_current_config()
     return _thread_locals.config
 
 
+def _get_current_config():
+    """
+    Return the process-wide configuration snapshot. The cached configuration version is checked at most once every
+    CONFIG_REFRESH_INTERVAL seconds, and the configuration is reloaded only if the version has changed.
+    """
+    global _config, _config_checked
+
+    with _config_lock:
+        now = time.monotonic()
+        if _config_checked is not None and now - _config_checked < settings.CONFIG_REFRESH_INTERVAL:
+            return _config
+        config = _config
+        generation = _config_generation
+
+    # The configuration is loaded without holding the lock, as loading it from the database activates the latest
+    # ConfigRevision, which calls invalidate_config()
+    if config is None or config.version is None or cache.get('config_version') != config.version:
+        config = Config()
+        logger.debug("Initialized configuration")
+
+    with _config_lock:
+        _config = config
+        # Defer the next check if the configuration has not been invalidated in the meantime
+        if _config_generation == generation:
+            _config_checked = now
+
+    return config
+
+
 def clear_config():
     """
-    Delete the currently loaded configuration, if any.
+    Delete the configuration loaded for the current thread, if any. The process-wide snapshot is retained.
     """
     if hasattr(_thread_locals, 'config'):
         del _thread_locals.config
         logger.debug("Cleared configuration")
 
 
+def invalidate_config():
+    """
+    Force a check for changes to the cached configuration the next time it is loaded by any thread.
+    """
+    global _config_checked, _config_generation
+
+    with _config_lock:
+        _config_checked = None
+        _config_generation += 1
+
+
 class Config:
     """
     Fetch and store in memory the current NetBox configuration. This class must be instantiated prior to access, and
@@ -18,6 +18,9 @@ ADVISORY_LOCK_KEYS = {
     'available-vlans': 100300,
     'available-asns': 100400,
 
+    # Prefix hierarchy lock (held for the remainder of the transaction)
+    'prefix-hierarchy': 100500,
+
     # MPTT locks
     'region': 105100,
     'sitegroup': 105200,
@@ -1,10 +1,20 @@
 from contextvars import ContextVar
 
 __all__ = (
+    'component_instantiation_queue',
+    'counters_queue',
     'current_request',
+    'denormalized_queue',
     'events_queue',
+    'prefix_hierarchy_queue',
+    'search_cache_queue',
 )
 
 
+component_instantiation_queue = ContextVar('component_instantiation_queue', default=None)
+counters_queue = ContextVar('counters_queue', default=None)
 current_request = ContextVar('current_request', default=None)
+denormalized_queue = ContextVar('denormalized_queue', default=None)
 events_queue = ContextVar('events_queue', default=dict())
+prefix_hierarchy_queue = ContextVar('prefix_hierarchy_queue', default=None)
+search_cache_queue = ContextVar('search_cache_queue', default=None)
@@ -1,8 +1,11 @@
 import logging
+from collections import defaultdict
 
+from django.db.models import Q
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from netbox.context import denormalized_queue
 from netbox.registry import registry
 
 
@@ -27,32 +30,98 @@ def register(model, field_name, mappings):
         (model, field_name, mappings)
     )
 
+    # Track changes to the remote fields (if supported by the related model)
+    for origin in mappings.values():
+        registry['tracked_fields'][rel_model].add(rel_model._meta.get_field(origin).attname)
 
-@receiver(post_save)
-def update_denormalized_fields(sender, instance, created, raw, **kwargs):
+
+def _get_field_value(instance, field_name):
+    field = instance._meta.get_field(field_name)
+    return field.value_from_object(instance)
+
+
+def has_changed(instance, mappings, update_fields=None):
+    """
+    Return True if any of the remote fields in the given mappings may have changed on the instance. Instances which
+    do not employ TrackingModelMixin are always assumed to have changed.
+    """
+    origins = [instance._meta.get_field(origin) for origin in mappings.values()]
+
+    # If only specific fields were saved, ignore any others
+    if update_fields is not None:
+        origins = [field for field in origins if field.name in update_fields or field.attname in update_fields]
+
+    if not hasattr(instance, 'tracker'):
+        return bool(origins)
+
+    return any(field.attname in instance.tracker for field in origins)
+
+
+def update_denormalized_objects(model, field_name, mappings, pks_by_values):
+    """
+    Update the denormalized fields of all objects of the given model which reference the specified related objects.
+    Related objects sharing the same values are updated together with a single query, and objects which already hold
+    the correct values are excluded from the update.
+
+    Args:
+        model: The class being updated
+        field_name: The name of the field related to the triggering instances
+        mappings: Dictionary mapping of local to remote fields
+        pks_by_values: A dictionary mapping tuples of remote field values (ordered as in mappings) to lists of
+            related object PKs
+    """
+    count = 0
+    for values, pks in pks_by_values.items():
+        update_params = dict(zip(mappings.keys(), values))
+        count += model.objects.filter(
+            **{f'{field_name}__in': pks}
+        ).exclude(
+            Q(**update_params)
+        ).update(**update_params)
+
+    logger.debug(f'Updated {count} rows')
+    return count
+
+
+def flush_updates(queue):
     """
-    Check if the sender has denormalized fields registered, and update them as necessary.
+    Propagate changes for all queued objects. The queue maps each related model to a set of PKs. The current values of
+    all queued objects are retrieved from the database, so that only their final values are propagated.
     """
-    def _get_field_value(instance, field_name):
-        field = instance._meta.get_field(field_name)
-        return field.value_from_object(instance)
+    for rel_model, pks in queue.items():
+        for model, field_name, mappings in registry['denormalized_fields'].get(rel_model, []):
+            logger.debug(f'Updating denormalized values for {model}.{field_name}')
+            origins = [rel_model._meta.get_field(origin).attname for origin in mappings.values()]
+            pks_by_values = defaultdict(list)
+            for pk, *values in rel_model.objects.filter(pk__in=pks).values_list('pk', *origins):
+                pks_by_values[tuple(values)].append(pk)
+            update_denormalized_objects(model, field_name, mappings, pks_by_values)
+
 
+@receiver(post_save)
+def update_denormalized_fields(sender, instance, created, raw, update_fields=None, **kwargs):
+    """
+    Check if the sender has denormalized fields registered, and update them as necessary. If denormalized updates are
+    being queued (e.g. within a bulk operation), the instance is queued for propagation by flush_updates() instead.
+    """
     # Skip for new objects or those being populated from raw data
     if created or raw:
         return
 
+    queue = denormalized_queue.get()
+
     # Look up any denormalized fields referencing this model from the application registry
     for model, field_name, mappings in registry['denormalized_fields'].get(sender, []):
-        logger.debug(f'Updating denormalized values for {model}.{field_name}')
-        filter_params = {
-            field_name: instance.pk,
-        }
-        update_params = {
-            # Map the denormalized field names to the instance's values
-            denorm: _get_field_value(instance, origin) for denorm, origin in mappings.items()
-        }
-
-        # TODO: Improve efficiency here by placing conditions on the query?
+
+        # Skip if none of the mapped fields have changed
+        if not has_changed(instance, mappings, update_fields):
+            continue
+
+        if queue is not None:
+            queue.setdefault(sender, set()).add(instance.pk)
+            continue
+
         # Update all the denormalized fields with the triggering object's new values
-        count = model.objects.filter(**filter_params).update(**update_params)
-        logger.debug(f'Updated {count} rows')
+        logger.debug(f'Updating denormalized values for {model}.{field_name}')
+        values = tuple(_get_field_value(instance, origin) for origin in mappings.values())
+        update_denormalized_objects(model, field_name, mappings, {values: [instance.pk]})
@@ -0,0 +1,29 @@
+from prometheus_client import Counter, Histogram
+
+__all__ = (
+    'webhook_delivery_latency',
+    'webhook_events_total',
+    'webhook_requests_total',
+)
+
+#
+# Webhooks
+#
+
+# Delivery metrics (labeled by endpoint, i.e. the scheme and network location of the payload URL). These are recorded
+# by background workers; see the multiprocess notes in the Prometheus metrics documentation.
+webhook_delivery_latency = Histogram(
+    'netbox_webhook_delivery_latency_seconds',
+    'Time taken to deliver a webhook request',
+    ['endpoint']
+)
+webhook_requests_total = Counter(
+    'netbox_webhook_requests_total',
+    'Webhook requests sent, by result (success, failure, or error)',
+    ['endpoint', 'result']
+)
+webhook_events_total = Counter(
+    'netbox_webhook_events_total',
+    'Webhook events delivered successfully',
+    ['endpoint']
+)
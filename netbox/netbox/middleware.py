@@ -11,6 +11,7 @@ from django.db.utils import InternalError
 from django.http import Http404, HttpResponseRedirect
 
 from extras.context_managers import event_tracking
+from netbox.api.authentication import flush_token_last_used_if_due
 from netbox.config import clear_config, get_config
 from netbox.views import handler_500
 from utilities.api import is_api_request
@@ -57,9 +58,13 @@ class CoreMiddleware:
         if is_api_request(request):
             response['API-Version'] = settings.REST_FRAMEWORK_VERSION
 
-        # Clear any cached dynamic config parameters after each request.
+        # Release the dynamic config parameters loaded for this request. (The process-wide configuration is retained
+        # until a new revision is detected.)
         clear_config()
 
+        # Write any pending updates to API tokens' last used times, if due
+        flush_token_last_used_if_due()
+
         return response
 
     def process_exception(self, request, exception):
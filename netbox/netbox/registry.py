@@ -30,6 +30,7 @@ registry = Registry({
     'plugins': dict(),
     'search': dict(),
     'tables': collections.defaultdict(dict),
+    'tracked_fields': collections.defaultdict(set),
     'views': collections.defaultdict(dict),
     'widgets': dict(),
 })
@@ -2,6 +2,7 @@ from collections import defaultdict
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import TrigramSimilarity
 from django.core.exceptions import ImproperlyConfigured
 from django.db.models import F, Window, Q, prefetch_related_objects
 from django.db.models.fields.related import ForeignKey
@@ -14,6 +15,7 @@ from netaddr.core import AddrFormatError
 
 from core.models import ObjectType
 from extras.models import CachedValue, CustomField
+from netbox.context import search_cache_queue
 from netbox.registry import registry
 from utilities.object_types import object_type_identifier
 from utilities.querysets import RestrictedPrefetch
@@ -22,6 +24,7 @@ from . import FieldTypes, LookupTypes, get_indexer
 
 DEFAULT_LOOKUP_TYPE = LookupTypes.PARTIAL
 MAX_RESULTS = 1000
+CACHE_BATCH_SIZE = 2000
 
 
 class SearchBackend:
@@ -60,22 +63,57 @@ class SearchBackend:
 
     def caching_handler(self, sender, instance, created, **kwargs):
         """
-        Receiver for the post_save signal, responsible for caching object creation/changes.
+        Receiver for the post_save signal, responsible for caching object creation/changes. If search cache updates
+        are being queued (e.g. while processing a request), the object is queued for caching by flush() instead.
         """
+        queue = search_cache_queue.get()
+        if queue is not None:
+            try:
+                get_indexer(sender)
+            except KeyError:
+                return
+            queue.setdefault(sender, set()).add(instance.pk)
+            return
+
         self.cache(instance, remove_existing=not created)
 
     def removal_handler(self, sender, instance, **kwargs):
         """
         Receiver for the post_delete signal, responsible for caching object deletion.
         """
+        if queued_pks := (search_cache_queue.get() or {}).get(sender):
+            queued_pks.discard(instance.pk)
+
         self.remove(instance)
 
+    def flush(self, queue):
+        """
+        Update the cached representations of all queued objects. The queue maps each model to a set of primary keys.
+        Objects are retrieved from the database in bulk, so that only committed data is cached.
+        """
+        counter = 0
+        for model, pks in queue.items():
+            indexer = get_indexer(model)
+            pks = sorted(pks)
+            for i in range(0, len(pks), CACHE_BATCH_SIZE):
+                instances = model.objects.filter(pk__in=pks[i:i + CACHE_BATCH_SIZE])
+                counter += self.update(instances, indexer=indexer)
+
+        return counter
+
     def cache(self, instances, indexer=None, remove_existing=True):
         """
         Create or update the cached representation of an instance.
         """
         raise NotImplementedError
 
+    def update(self, instances, indexer=None):
+        """
+        Update the cached representations of one or more existing instances of the same model. Backends may extend
+        this method to avoid rewriting values which have not changed.
+        """
+        return self.cache(instances, indexer=indexer, remove_existing=True)
+
     def remove(self, instance):
         """
         Delete any cached representation of an instance.
@@ -105,9 +143,11 @@ class SearchBackend:
 
 class CachedValueSearchBackend(SearchBackend):
 
-    def search(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
-
-        # Build the filter used to find relevant CachedValue records
+    @staticmethod
+    def _get_query_filter(value, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        """
+        Return a Q object matching CachedValue records for the given value and lookup.
+        """
         query_filter = Q(**{f'value__{lookup}': value})
         if object_types:
             # Limit results by object type
@@ -123,39 +163,24 @@ class CachedValueSearchBackend(SearchBackend):
             except (AddrFormatError, ValueError):
                 pass
 
-        # Construct the base queryset to retrieve matching results
-        queryset = CachedValue.objects.filter(query_filter).annotate(
-            # Annotate the rank of each result for its object according to its weight
-            row_number=Window(
-                expression=window.RowNumber(),
-                partition_by=[F('object_type'), F('object_id')],
-                order_by=[F('weight').asc()],
-            )
-        )[:MAX_RESULTS]
-
-        # Gather all ObjectTypes present in the search results (used for prefetching related
-        # objects). This must be done before generating the final results list, which returns
-        # a RawQuerySet.
-        object_type_ids = set(queryset.values_list('object_type', flat=True))
-        object_types = ObjectType.objects.filter(pk__in=object_type_ids)
+        return query_filter
 
-        # Construct a Prefetch to pre-fetch only those related objects for which the
-        # user has permission to view.
+    @staticmethod
+    def _get_prefetches(user=None):
+        """
+        Return the prefetches needed to resolve the object referenced by each result. If a user is specified, only
+        objects which the user has permission to view are prefetched.
+        """
         if user:
-            prefetch = (RestrictedPrefetch('object', user, 'view'), 'object_type')
-        else:
-            prefetch = ('object', 'object_type')
+            return RestrictedPrefetch('object', user, 'view'), 'object_type'
+        return 'object', 'object_type'
 
-        # Wrap the base query to return only the lowest-weight result for each object
-        # Hat-tip to https://blog.oyam.dev/django-filter-by-window-function/ for the solution
-        sql, params = queryset.query.sql_with_params()
-        results = CachedValue.objects.prefetch_related(*prefetch).raw(
-            f"SELECT * FROM ({sql}) t WHERE row_number = 1",
-            params
-        )
-
-        # Iterate through each ObjectType represented in the search results and prefetch any
-        # related objects necessary to render the prescribed display attributes (display_attrs).
+    @staticmethod
+    def _prefetch_display_attrs(results, object_types):
+        """
+        Iterate through each ObjectType represented in the search results and prefetch any related objects
+        necessary to render the prescribed display attributes (display_attrs).
+        """
         for object_type in object_types:
             model = object_type.model_class()
             indexer = registry['search'].get(object_type_identifier(object_type))
@@ -175,7 +200,11 @@ class CachedValueSearchBackend(SearchBackend):
                 objects = [r for r in results if r.object_type == object_type]
                 prefetch_related_objects(objects, *prefetch_fields)
 
-        # Omit any results pertaining to an object the user does not have permission to view
+    @staticmethod
+    def _filter_results(results):
+        """
+        Omit any results pertaining to an object the user does not have permission to view.
+        """
         ret = []
         for r in results:
             if r.object is not None:
@@ -184,6 +213,39 @@ class CachedValueSearchBackend(SearchBackend):
 
         return ret
 
+    def search(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+
+        # Build the filter used to find relevant CachedValue records
+        query_filter = self._get_query_filter(value, object_types, lookup)
+
+        # Construct the base queryset to retrieve matching results
+        queryset = CachedValue.objects.filter(query_filter).annotate(
+            # Annotate the rank of each result for its object according to its weight
+            row_number=Window(
+                expression=window.RowNumber(),
+                partition_by=[F('object_type'), F('object_id')],
+                order_by=[F('weight').asc()],
+            )
+        )[:MAX_RESULTS]
+
+        # Gather all ObjectTypes present in the search results (used for prefetching related
+        # objects). This must be done before generating the final results list, which returns
+        # a RawQuerySet.
+        object_type_ids = set(queryset.values_list('object_type', flat=True))
+        object_types = ObjectType.objects.filter(pk__in=object_type_ids)
+
+        # Wrap the base query to return only the lowest-weight result for each object
+        # Hat-tip to https://blog.oyam.dev/django-filter-by-window-function/ for the solution
+        sql, params = queryset.query.sql_with_params()
+        results = CachedValue.objects.prefetch_related(*self._get_prefetches(user)).raw(
+            f"SELECT * FROM ({sql}) t WHERE row_number = 1",
+            params
+        )
+
+        self._prefetch_display_attrs(results, object_types)
+
+        return self._filter_results(results)
+
     def cache(self, instances, indexer=None, remove_existing=True):
         object_type = None
         custom_fields = None
@@ -228,7 +290,7 @@ class CachedValueSearchBackend(SearchBackend):
                 )
 
             # Check whether the buffer needs to be flushed
-            if len(buffer) >= 2000:
+            if len(buffer) >= CACHE_BATCH_SIZE:
                 counter += len(CachedValue.objects.bulk_create(buffer))
                 buffer = []
 
@@ -238,6 +300,62 @@ class CachedValueSearchBackend(SearchBackend):
 
         return counter
 
+    def update(self, instances, indexer=None):
+        instances = list(instances)
+        if not instances:
+            return 0
+        if indexer is None:
+            try:
+                indexer = get_indexer(instances[0])
+            except KeyError:
+                return 0
+
+        object_type = ObjectType.objects.get_for_model(indexer.model)
+        custom_fields = CustomField.objects.filter(object_types=object_type).exclude(search_weight=0)
+
+        # Retrieve the values currently cached for all instances
+        existing = {}
+        stale_pks = []
+        cached_values = CachedValue.objects.filter(
+            object_type=object_type,
+            object_id__in=[instance.pk for instance in instances]
+        ).values_list('pk', 'object_id', 'field', 'type', 'weight', 'value')
+        for pk, object_id, field, type_, weight, value in cached_values:
+            if (object_id, field) in existing:
+                # Discard any duplicate entries
+                stale_pks.append(pk)
+            else:
+                existing[(object_id, field)] = (pk, type_, weight, value)
+
+        # Compare the current values of each instance with those cached
+        buffer = []
+        for instance in instances:
+            for field in indexer.to_cache(instance, custom_fields=custom_fields):
+                value = str(field.value)
+                cached = existing.pop((instance.pk, field.name), None)
+                if cached is not None:
+                    if cached[1:] == (field.type, field.weight, value):
+                        continue
+                    stale_pks.append(cached[0])
+                buffer.append(
+                    CachedValue(
+                        object_type=object_type,
+                        object_id=instance.pk,
+                        field=field.name,
+                        type=field.type,
+                        weight=field.weight,
+                        value=value
+                    )
+                )
+
+        # Any remaining cached values pertain to fields which no longer have a value
+        stale_pks.extend(cached[0] for cached in existing.values())
+        if stale_pks:
+            qs = CachedValue.objects.filter(pk__in=stale_pks)
+            qs._raw_delete(using=qs.db)
+
+        return len(CachedValue.objects.bulk_create(buffer, batch_size=CACHE_BATCH_SIZE))
+
     def remove(self, instance):
         # Avoid attempting to query for non-cacheable objects
         try:
@@ -270,6 +388,41 @@ class CachedValueSearchBackend(SearchBackend):
         return CachedValue.objects.count()
 
 
+class TrigramSearchBackend(CachedValueSearchBackend):
+    """
+    A variant of CachedValueSearchBackend optimized for very large search caches. Matches are located using the
+    PostgreSQL trigram (pg_trgm) index on CachedValue values, and the best match for each object is selected and
+    ranked (by weight, then trigram similarity to the query) entirely within the database.
+    """
+    def search(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+
+        # Build the filter used to find relevant CachedValue records
+        query_filter = self._get_query_filter(value, object_types, lookup)
+
+        # Select the lowest-weight match for each object
+        best_matches = CachedValue.objects.filter(query_filter).order_by(
+            'object_type', 'object_id', 'weight'
+        ).distinct(
+            'object_type', 'object_id'
+        ).values('pk')
+
+        # Rank the selected matches by weight and similarity to the query value
+        results = list(
+            CachedValue.objects.filter(pk__in=best_matches).annotate(
+                similarity=TrigramSimilarity('value', value)
+            ).order_by(
+                'weight', '-similarity'
+            ).prefetch_related(
+                *self._get_prefetches(user)
+            )[:MAX_RESULTS]
+        )
+
+        object_types = {r.object_type for r in results}
+        self._prefetch_display_attrs(results, object_types)
+
+        return self._filter_results(results)
+
+
 def get_backend():
     """
     Initializes and returns the configured search backend.
@@ -1,7 +1,9 @@
 import datetime
+import time
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client
 from django.test.utils import override_settings
 from django.urls import reverse
@@ -11,6 +13,11 @@ from rest_framework.test import APIClient
 from core.models import ObjectType
 from dcim.models import Site
 from ipam.models import Prefix
+from netbox.api import authentication
+from netbox.api.authentication import (
+    TOKEN_LAST_USED_INTERVAL, TokenAuthentication, flush_token_last_used, flush_token_last_used_on_exit,
+    get_token_cache_key,
+)
 from users.models import Group, ObjectPermission, Token
 from utilities.testing import TestCase
 from utilities.testing.api import APITestCase
@@ -35,6 +42,69 @@ class TokenAuthenticationTestCase(APITestCase):
         self.assertEqual(response.status_code, 200)
 
         # Check that the token's last_used time has been updated
+        flush_token_last_used()
+        token.refresh_from_db()
+        self.assertIsNotNone(token.last_used)
+
+    @override_settings(LOGIN_REQUIRED=True, EXEMPT_VIEW_PERMISSIONS=['*'], API_TOKEN_CACHE_TIMEOUT=60)
+    def test_token_cache(self):
+        url = reverse('dcim-api:site-list')
+        token = Token.objects.create(user=self.user)
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 200)
+
+        # The token should be retrieved from the cache (only its user is retrieved from the database)
+        with self.assertNumQueries(1):
+            user, cached_token = TokenAuthentication().authenticate_credentials(token.key)
+        self.assertEqual(user, self.user)
+        self.assertEqual(cached_token.pk, token.pk)
+
+        # The token's key and user must not be cached
+        cached_data = cache.get(get_token_cache_key(token.key))
+        self.assertNotIn('key', cached_data)
+        self.assertNotIn('user', cached_data)
+        self.assertEqual(cached_data['user_id'], self.user.pk)
+
+        # Deactivating the user should invalidate the cached token
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 403)
+
+        # Deleting the token should invalidate the cached token
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}').status_code, 200)
+        token.delete()
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(LOGIN_REQUIRED=True, EXEMPT_VIEW_PERMISSIONS=['*'])
+    def test_token_last_used_flush(self):
+        url = reverse('dcim-api:site-list')
+        token = Token.objects.create(user=self.user)
+
+        # The token's last_used time is not written until TOKEN_LAST_USED_INTERVAL has passed since the last flush
+        flush_token_last_used()
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 200)
+        token.refresh_from_db()
+        self.assertIsNone(token.last_used)
+
+        # Pending updates are written when the process exits, even if no further requests are received
+        flush_token_last_used_on_exit()
+        token.refresh_from_db()
+        self.assertIsNotNone(token.last_used)
+
+    @override_settings(LOGIN_REQUIRED=True, EXEMPT_VIEW_PERMISSIONS=['*'])
+    def test_token_last_used_flush_at_request_end(self):
+        url = reverse('dcim-api:site-list')
+        token = Token.objects.create(user=self.user)
+
+        # Pending updates are written at the end of a request once TOKEN_LAST_USED_INTERVAL has passed
+        authentication._last_flush = time.monotonic() - TOKEN_LAST_USED_INTERVAL - 1
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 200)
         token.refresh_from_db()
         self.assertIsNotNone(token.last_used)
 
@@ -489,6 +559,35 @@ class ObjectPermissionAPIViewTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data['count'], 3)
 
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=[])
+    def test_revoke_permission(self):
+        url = reverse('ipam-api:prefix-list')
+
+        # Assign object permission
+        obj_perm = ObjectPermission(
+            name='Test permission',
+            actions=['view']
+        )
+        obj_perm.save()
+        obj_perm.users.add(self.user)
+        obj_perm.object_types.add(ObjectType.objects.get_for_model(Prefix))
+
+        response = self.client.get(url, **self.header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 9)
+
+        # Constrain the permission. Cached permissions should be invalidated.
+        obj_perm.constraints = {'site__name': 'Site 1'}
+        obj_perm.save()
+        response = self.client.get(url, **self.header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+
+        # Revoke the permission
+        obj_perm.users.remove(self.user)
+        response = self.client.get(url, **self.header)
+        self.assertEqual(response.status_code, 403)
+
     @override_settings(EXEMPT_VIEW_PERMISSIONS=[])
     def test_create_object(self):
         url = reverse('ipam-api:prefix-list')
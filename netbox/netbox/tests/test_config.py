@@ -3,7 +3,7 @@ from django.core.cache import cache
 from django.test import override_settings, TestCase
 
 from core.models import ConfigRevision
-from netbox.config import clear_config, get_config
+from netbox.config import clear_config, get_config, invalidate_config
 
 
 # Prefix cache keys to avoid interfering with the local environment
@@ -16,6 +16,7 @@ class ConfigTestCase(TestCase):
     @override_settings(CACHES=CACHES)
     def test_config_init_empty(self):
         cache.clear()
+        invalidate_config()
 
         config = get_config()
         self.assertEqual(config.config, {})
@@ -27,6 +28,7 @@ class ConfigTestCase(TestCase):
     def test_config_init_from_db(self):
         CONFIG_DATA = {'BANNER_TOP': 'A'}
         cache.clear()
+        invalidate_config()
 
         # Create a config but don't load it into the cache
         configrevision = ConfigRevision.objects.create(data=CONFIG_DATA)
@@ -41,6 +43,7 @@ class ConfigTestCase(TestCase):
     def test_config_init_from_cache(self):
         CONFIG_DATA = {'BANNER_TOP': 'B'}
         cache.clear()
+        invalidate_config()
 
         # Create a config and load it into the cache
         configrevision = ConfigRevision.objects.create(data=CONFIG_DATA)
@@ -56,6 +59,7 @@ class ConfigTestCase(TestCase):
     def test_settings_override(self):
         CONFIG_DATA = {'BANNER_TOP': 'A'}
         cache.clear()
+        invalidate_config()
 
         # Create a config and load it into the cache
         configrevision = ConfigRevision.objects.create(data=CONFIG_DATA)
@@ -66,3 +70,26 @@ class ConfigTestCase(TestCase):
         self.assertEqual(config.version, configrevision.pk)
 
         clear_config()
+
+    @override_settings(CACHES=CACHES, CONFIG_REFRESH_INTERVAL=60)
+    def test_config_snapshot(self):
+        cache.clear()
+        invalidate_config()
+
+        configrevision = ConfigRevision.objects.create(data={'BANNER_TOP': 'A'})
+        configrevision.activate()
+        config = get_config()
+        clear_config()
+
+        # The same configuration should be reused without consulting the cache
+        cache.set('config', {'BANNER_TOP': 'B'}, None)
+        self.assertIs(get_config(), config)
+        clear_config()
+
+        # Activating a new revision should replace the configuration
+        configrevision = ConfigRevision.objects.create(data={'BANNER_TOP': 'C'})
+        configrevision.activate()
+        self.assertIsNot(get_config(), config)
+        self.assertEqual(get_config().BANNER_TOP, 'C')
+
+        clear_config()
@@ -1,7 +1,10 @@
 from django.test import override_settings
+from django.urls import reverse
 
 from core.models import ObjectType
 from dcim.models import *
+from extras.choices import ObjectChangeActionChoices
+from extras.models import ObjectChange
 from netbox.choices import CSVDelimiterChoices, ImportFormatChoices
 from users.models import ObjectPermission
 from utilities.testing import ModelViewTestCase, create_tags
@@ -116,3 +119,111 @@ class CSVImportTestCase(ModelViewTestCase):
         # Test POST with permission
         self.assertHttpStatus(self.client.post(self._get_url('import'), data), 200)
         self.assertEqual(Region.objects.count(), 0)
+
+
+class BulkSaveImportTestCase(ModelViewTestCase):
+    """
+    Test the import of objects which are saved in bulk.
+    """
+    model = Manufacturer
+
+    @classmethod
+    def setUpTestData(cls):
+        create_tags('Alpha', 'Bravo')
+
+    def _import(self, csv_data):
+        data = {
+            'format': ImportFormatChoices.CSV,
+            'data': '\n'.join(csv_data),
+            'csv_delimiter': CSVDelimiterChoices.AUTO,
+        }
+        return self.client.post(self._get_url('import'), data)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=['*'])
+    def test_import_objects(self):
+        self.add_permissions('dcim.add_manufacturer')
+
+        csv_data = (
+            'name,slug,tags',
+            'Manufacturer 1,manufacturer-1,"alpha,bravo"',
+            'Manufacturer 2,manufacturer-2,alpha',
+            'Manufacturer 3,manufacturer-3,',
+        )
+        self.assertHttpStatus(self._import(csv_data), 302)
+
+        manufacturers = Manufacturer.objects.order_by('name')
+        self.assertEqual(manufacturers.count(), 3)
+        self.assertEqual(list(manufacturers[0].tags.values_list('name', flat=True)), ['Alpha', 'Bravo'])
+        self.assertEqual(list(manufacturers[1].tags.values_list('name', flat=True)), ['Alpha'])
+        self.assertEqual(manufacturers[2].tags.count(), 0)
+
+        # Verify that the creation of each object was recorded
+        objectchanges = ObjectChange.objects.filter(
+            changed_object_type=ObjectType.objects.get_for_model(Manufacturer),
+            action=ObjectChangeActionChoices.ACTION_CREATE
+        )
+        self.assertEqual(
+            sorted(objectchanges.values_list('changed_object_id', flat=True)),
+            sorted(manufacturers.values_list('pk', flat=True))
+        )
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=['*'])
+    def test_update_objects(self):
+        self.add_permissions('dcim.add_manufacturer')
+        manufacturers = (
+            Manufacturer(name='Manufacturer 1', slug='manufacturer-1'),
+            Manufacturer(name='Manufacturer 2', slug='manufacturer-2'),
+        )
+        Manufacturer.objects.bulk_create(manufacturers)
+
+        csv_data = (
+            'id,description',
+            f'{manufacturers[0].pk},New description 1',
+            f'{manufacturers[1].pk},New description 2',
+        )
+        self.assertHttpStatus(self._import(csv_data), 302)
+
+        for i, manufacturer in enumerate(Manufacturer.objects.order_by('name'), start=1):
+            self.assertEqual(manufacturer.name, f'Manufacturer {i}')
+            self.assertEqual(manufacturer.description, f'New description {i}')
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=['*'])
+    def test_conflicting_records(self):
+        """
+        Records which conflict with one another should be reported, rather than raising an IntegrityError.
+        """
+        self.add_permissions('dcim.add_manufacturer')
+
+        csv_data = (
+            'name,slug',
+            'Manufacturer 1,manufacturer-1',
+            'Manufacturer 1,manufacturer-1',
+        )
+        self.assertHttpStatus(self._import(csv_data), 200)
+        self.assertEqual(Manufacturer.objects.count(), 0)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=['*'])
+    def test_related_objects(self):
+        self.add_permissions('dcim.add_site')
+        regions = (
+            Region(name='Region 1', slug='region-1'),
+            Region(name='Region 2', slug='region-2'),
+        )
+        for region in regions:
+            region.save()
+
+        csv_data = (
+            'name,slug,status,region',
+            'Site 1,site-1,active,Region 1',
+            'Site 2,site-2,active,Region 2',
+            'Site 3,site-3,active,Region 1',
+        )
+        data = {
+            'format': ImportFormatChoices.CSV,
+            'data': '\n'.join(csv_data),
+            'csv_delimiter': CSVDelimiterChoices.AUTO,
+        }
+        self.assertHttpStatus(self.client.post(reverse('dcim:site_import'), data), 302)
+
+        sites = Site.objects.order_by('name')
+        self.assertEqual([site.region for site in sites], [regions[0], regions[1], regions[0]])
@@ -1,10 +1,18 @@
+import uuid
+from io import StringIO
+
 from django.contrib.contenttypes.models import ContentType
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
 
-from dcim.models import Site
+from dcim.models import Manufacturer, Site
 from dcim.search import SiteIndex
+from extras.context_managers import event_tracking
+from extras.management.commands.reindex import COMPLETED_CACHE_KEY, clear_checkpoints, reindex_model
 from extras.models import CachedValue
-from netbox.search.backends import search_backend
+from netbox.search.backends import TrigramSearchBackend, search_backend
+from users.models import User
 
 
 class SearchBackendTestCase(TestCase):
@@ -111,6 +119,51 @@ class SearchBackendTestCase(TestCase):
             len(SiteIndex.fields)
         )
 
+    def test_cache_queued_within_request(self):
+        """
+        Test that objects saved while processing a request are cached once the request has been processed.
+        """
+        request = RequestFactory().get('/')
+        request.id = uuid.uuid4()
+        request.user = User.objects.create(username='testuser')
+        content_type = ContentType.objects.get_for_model(Site)
+
+        with event_tracking(request):
+            site = Site(name='Site 4', slug='site-4', description='Fourth test site')
+            site.save()
+            site.description = 'Fourth test site (modified)'
+            site.save()
+            self.assertFalse(
+                CachedValue.objects.filter(object_type=content_type, object_id=site.pk).exists()
+            )
+
+        self.assertEqual(
+            CachedValue.objects.get(object_type=content_type, object_id=site.pk, field='description').value,
+            'Fourth test site (modified)'
+        )
+
+    def test_update(self):
+        """
+        Test that updating the cached representation of an object rewrites only those values which have changed.
+        """
+        site = Site.objects.first()
+        search_backend.cache(site)
+        content_type = ContentType.objects.get_for_model(Site)
+        cached_values = CachedValue.objects.filter(object_type=content_type, object_id=site.pk)
+        name_pk = cached_values.get(field='name').pk
+        description_pk = cached_values.get(field='description').pk
+
+        site.description = 'Modified test site'
+        site.facility = ''
+        search_backend.update([site])
+
+        # Unchanged values are retained, and changed values are replaced
+        self.assertEqual(cached_values.get(field='name').pk, name_pk)
+        self.assertNotEqual(cached_values.get(field='description').pk, description_pk)
+        self.assertEqual(cached_values.get(field='description').value, 'Modified test site')
+        self.assertFalse(cached_values.filter(field='facility').exists())
+        self.assertEqual(cached_values.count(), len(SiteIndex.fields) - 1)
+
     def test_remove_on_delete(self):
         """
         Test that any cached value for an object are automatically removed on delete().
@@ -151,3 +204,77 @@ class SearchBackendTestCase(TestCase):
         self.assertEqual(len(results), 1)
         results = search_backend.search('xxxxx')
         self.assertEqual(len(results), 0)
+
+    def test_trigram_search(self):
+        """
+        Test searches using the trigram search backend.
+        """
+        sites = Site.objects.all()
+        search_backend.cache(sites)
+        backend = TrigramSearchBackend()
+
+        results = backend.search('site')
+        self.assertEqual(len(results), 3)
+        results = backend.search('first')
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].object, Site.objects.get(name='Site 1'))
+        results = backend.search('xxxxx')
+        self.assertEqual(len(results), 0)
+
+
+class ReindexCommandTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Site.objects.bulk_create([
+            Site(name=f'Site {i}', slug=f'site-{i}', description=f'Site {i}') for i in range(1, 6)
+        ])
+        Manufacturer.objects.bulk_create([
+            Manufacturer(name=f'Manufacturer {i}', slug=f'manufacturer-{i}') for i in range(1, 4)
+        ])
+
+    def setUp(self):
+        clear_checkpoints('dcim.site', 'dcim.manufacturer')
+        search_backend.clear()
+
+    def get_cached_count(self, model):
+        return CachedValue.objects.filter(object_type=ContentType.objects.get_for_model(model)).count()
+
+    def test_resume_completed_model(self):
+        # Simulate a run which was interrupted after all sites had been cached
+        reindex_model('dcim.site', chunk_size=2)
+        site_count = self.get_cached_count(Site)
+        self.assertGreater(site_count, 0)
+
+        # Resuming the run should not cache the sites again
+        call_command('reindex', 'dcim.site', 'dcim.manufacturer', resume=True, chunk_size=2, stdout=StringIO())
+        self.assertEqual(self.get_cached_count(Site), site_count)
+        self.assertGreater(self.get_cached_count(Manufacturer), 0)
+
+        # Checkpoints should be discarded once the run has completed
+        self.assertIsNone(cache.get(COMPLETED_CACHE_KEY.format('dcim.site')))
+
+    def test_resume_without_checkpoint(self):
+        site_count = search_backend.cache(Site.objects.all())
+        search_backend.clear()
+
+        # Simulate a run which was interrupted after sites were cached, but before a checkpoint was recorded
+        search_backend.cache(Site.objects.first())
+        search_backend.cache(Site.objects.last())
+
+        # Resuming the run should not duplicate the entries of the cached sites
+        call_command('reindex', 'dcim.site', resume=True, chunk_size=2, stdout=StringIO())
+        self.assertEqual(self.get_cached_count(Site), site_count)
+
+    def test_incremental_removes_deleted_objects(self):
+        site_count = search_backend.cache(Site.objects.all())
+
+        # Simulate entries left behind by a deleted site
+        CachedValue.objects.filter(
+            object_type=ContentType.objects.get_for_model(Site),
+            object_id=Site.objects.first().pk
+        ).update(object_id=0)
+
+        call_command('reindex', 'dcim.site', incremental=True, stdout=StringIO())
+        self.assertEqual(self.get_cached_count(Site), site_count)
+        self.assertFalse(CachedValue.objects.filter(object_id=0).exists())
@@ -1,8 +1,11 @@
 import urllib.parse
+from unittest.mock import patch
 
 from django.urls import reverse
 from django.test import override_settings
 
+from core.choices import JobStatusChoices
+from core.models import Job
 from dcim.models import Site
 from netbox.constants import EMPTY_TABLE_TEXT
 from netbox.search.backends import search_backend
@@ -74,3 +77,43 @@ class SearchViewTestCase(TestCase):
         self.assertHttpStatus(response, 200)
         content = str(response.content)
         self.assertIn(EMPTY_TABLE_TEXT, content)
+
+
+class BackgroundExportViewTestCase(TestCase):
+    user_permissions = ['dcim.view_site']
+
+    @classmethod
+    def setUpTestData(cls):
+        Site.objects.bulk_create([
+            Site(name='Site 1', slug='site-1'),
+            Site(name='Site 2', slug='site-2'),
+            Site(name='Site 3', slug='site-3'),
+        ])
+
+    @patch('netbox.views.generic.bulk_views.get_workers_for_queue', return_value=1)
+    def test_export_background(self, mock_get_workers):
+        url = f"{reverse('dcim:site_list')}?export=table&background=true"
+
+        # An export job should be enqueued
+        response = self.client.get(url)
+        job = Job.objects.get()
+        self.assertRedirects(response, job.get_absolute_url(), fetch_redirect_response=False)
+        self.assertEqual(job.status, JobStatusChoices.STATUS_PENDING)
+        self.assertEqual(job.user, self.user)
+        self.assertIn('export_key', job.data)
+
+        # An identical request should reuse the pending job
+        response = self.client.get(url)
+        self.assertRedirects(response, job.get_absolute_url(), fetch_redirect_response=False)
+        self.assertEqual(Job.objects.count(), 1)
+
+        # A different export should enqueue a new job
+        response = self.client.get(f"{reverse('dcim:site_list')}?export=&background=true")
+        self.assertHttpStatus(response, 302)
+        self.assertEqual(Job.objects.count(), 2)
+
+    @patch('netbox.views.generic.bulk_views.get_workers_for_queue', return_value=0)
+    def test_export_background_no_workers(self, mock_get_workers):
+        response = self.client.get(f"{reverse('dcim:site_list')}?export=table&background=true")
+        self.assertRedirects(response, f"{reverse('dcim:site_list')}?", fetch_redirect_response=False)
+        self.assertFalse(Job.objects.exists())
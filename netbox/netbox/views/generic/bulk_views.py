@@ -5,26 +5,35 @@ from copy import deepcopy
 from django.contrib import messages
 from django.contrib.contenttypes.fields import GenericRel
 from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist, ValidationError
-from django.db import transaction, IntegrityError
+from django.db import DatabaseError, transaction, IntegrityError
 from django.db.models import ManyToManyField, ProtectedError, RestrictedError
 from django.db.models.fields.reverse_related import ManyToManyRel
 from django.forms import HiddenInput, ModelMultipleChoiceField, MultipleHiddenInput
-from django.http import HttpResponse
+from django.forms.models import BaseModelForm
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext as _
 from django_tables2.export import TableExport
 
+from core.jobs import enqueue_export, enqueue_import
 from core.models import ObjectType
+from extras.context_managers import deferred_updates
 from extras.models import ExportTemplate
-from extras.signals import clear_events
+from extras.signals import clear_events, handle_bulk_save, supports_bulk_save
+from netbox.constants import RQ_QUEUE_DEFAULT
 from utilities.error_handlers import handle_protectederror
 from utilities.exceptions import AbortRequest, AbortTransaction, PermissionsViolation
+from utilities.export import iter_buffered, iter_csv, iter_table_values, iter_yaml, stream_export
+from utilities.fields import CounterCacheField
 from utilities.forms import BulkRenameForm, ConfirmationForm, restrict_form_fields
 from utilities.forms.bulk_import import BulkImportForm
+from utilities.forms.fields import CSVModelChoiceField
 from utilities.htmx import htmx_partial
 from utilities.permissions import get_permission_for_model
+from utilities.querysets import RestrictedQuerySet
+from utilities.rqworker import get_workers_for_queue
 from utilities.views import GetReturnURLMixin, get_viewname
 from .base import BaseMultiObjectView
 from .mixins import ActionsMixin, TableMixin
@@ -70,15 +79,14 @@ class ObjectListView(BaseMultiObjectView, ActionsMixin, TableMixin):
 
         return '---\n'.join(yaml_data)
 
-    def export_table(self, table, columns=None, filename=None):
+    @staticmethod
+    def get_export_exclude_columns(table, columns=None):
         """
-        Export all table data in CSV format.
+        Return the set of table columns to be excluded from an export.
 
         Args:
             table: The Table instance to export
             columns: A list of specific columns to include. If None, all columns will be exported.
-            filename: The name of the file attachment sent to the client. If None, will be determined automatically
-                from the queryset model name.
         """
         exclude_columns = {'pk', 'actions'}
         if columns:
@@ -86,25 +94,48 @@ class ObjectListView(BaseMultiObjectView, ActionsMixin, TableMixin):
             exclude_columns.update({
                 col for col in all_columns if col not in columns
             })
+        return exclude_columns
+
+    def export_table(self, table, columns=None, filename=None, stream=False):
+        """
+        Export all table data in CSV format.
+
+        Args:
+            table: The Table instance to export
+            columns: A list of specific columns to include. If None, all columns will be exported.
+            filename: The name of the file attachment sent to the client. If None, will be determined automatically
+                from the queryset model name.
+            stream: If True, stream the table data to the client as it is retrieved from the database
+        """
+        exclude_columns = self.get_export_exclude_columns(table, columns)
+        filename = filename or f'netbox_{self.queryset.model._meta.verbose_name_plural}.csv'
+
+        if stream:
+            response = StreamingHttpResponse(
+                iter_buffered(iter_csv(iter_table_values(table, exclude_columns))),
+                content_type='text/csv; charset=utf-8'
+            )
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+
         exporter = TableExport(
             export_format=TableExport.CSV,
             table=table,
             exclude_columns=exclude_columns
         )
-        return exporter.response(
-            filename=filename or f'netbox_{self.queryset.model._meta.verbose_name_plural}.csv'
-        )
+        return exporter.response(filename=filename)
 
-    def export_template(self, template, request):
+    def export_template(self, template, request, stream=False):
         """
         Render an ExportTemplate using the current queryset.
 
         Args:
             template: ExportTemplate instance
             request: The current request
+            stream: If True, stream the rendered output to the client as it is generated
         """
         try:
-            return template.render_to_response(self.queryset)
+            return template.render_to_response(self.queryset, stream=stream)
         except Exception as e:
             messages.error(request, f"There was an error rendering the selected export template ({template.name}): {e}")
             # Strip the `export` param and redirect user to the filtered objects list
@@ -112,6 +143,67 @@ class ObjectListView(BaseMultiObjectView, ActionsMixin, TableMixin):
             query_params.pop('export')
             return redirect(f'{request.path}?{query_params.urlencode()}')
 
+    def export_background(self, request, object_type, has_bulk_actions):
+        """
+        Enqueue a background job to export the current queryset (or reuse a recent identical export), and redirect
+        the user to the job.
+
+        Args:
+            request: The current request
+            object_type: The ObjectType of the exported model
+            has_bulk_actions: Passed to get_table()
+        """
+        model = self.queryset.model
+        export = request.GET['export']
+        model_name = model._meta.verbose_name_plural
+
+        if not get_workers_for_queue(RQ_QUEUE_DEFAULT):
+            messages.error(request, _("Unable to export in the background: RQ worker process not running."))
+            query_params = request.GET.copy()
+            query_params.pop('export')
+            query_params.pop('background')
+            return redirect(f'{request.path}?{query_params.urlencode()}')
+
+        # Export the current table view, or all table data if YAML export is not supported
+        if export == 'table' or (not export and not hasattr(model, 'to_yaml')):
+            table = self.get_table(self.queryset, request, has_bulk_actions)
+            columns = [name for name, _ in table.selected_columns] if export == 'table' else None
+            job, created = enqueue_export(
+                request.user,
+                table.data.data,
+                filename=f'netbox_{model_name}.csv',
+                content_type='text/csv; charset=utf-8',
+                table=self.table,
+                exclude_columns=self.get_export_exclude_columns(table, columns)
+            )
+
+        # Render an ExportTemplate
+        elif export:
+            template = get_object_or_404(ExportTemplate, object_types=object_type, name=export)
+            job, created = enqueue_export(
+                request.user,
+                self.queryset,
+                filename=template.get_filename(model),
+                content_type=template.mime_type or 'text/plain; charset=utf-8',
+                template=template
+            )
+
+        # Export YAML
+        else:
+            job, created = enqueue_export(
+                request.user,
+                self.queryset,
+                filename=f'netbox_{model_name}.yaml',
+                content_type='text/yaml'
+            )
+
+        if created:
+            messages.info(request, _("Queued export job #{id}").format(id=job.pk))
+        else:
+            messages.info(request, _("Reusing the results of a recent export (job #{id})").format(id=job.pk))
+
+        return redirect(job.get_absolute_url())
+
     #
     # Request handlers
     #
@@ -135,20 +227,30 @@ class ObjectListView(BaseMultiObjectView, ActionsMixin, TableMixin):
 
         if 'export' in request.GET:
 
+            # Export in the background
+            if request.GET.get('background'):
+                return self.export_background(request, object_type, has_bulk_actions)
+
+            # Stream large exports to the client
+            stream = stream_export(self.queryset)
+
             # Export the current table view
             if request.GET['export'] == 'table':
                 table = self.get_table(self.queryset, request, has_bulk_actions)
                 columns = [name for name, _ in table.selected_columns]
-                return self.export_table(table, columns)
+                return self.export_table(table, columns, stream=stream)
 
             # Render an ExportTemplate
             elif request.GET['export']:
                 template = get_object_or_404(ExportTemplate, object_types=object_type, name=request.GET['export'])
-                return self.export_template(template, request)
+                return self.export_template(template, request, stream=stream)
 
             # Check for YAML export support on the model
             elif hasattr(model, 'to_yaml'):
-                response = HttpResponse(self.export_yaml(), content_type='text/yaml')
+                if stream:
+                    response = StreamingHttpResponse(iter_buffered(iter_yaml(self.queryset)), content_type='text/yaml')
+                else:
+                    response = HttpResponse(self.export_yaml(), content_type='text/yaml')
                 filename = 'netbox_{}.yaml'.format(self.queryset.model._meta.verbose_name_plural)
                 response['Content-Disposition'] = 'attachment; filename="{}"'.format(filename)
                 return response
@@ -156,7 +258,7 @@ class ObjectListView(BaseMultiObjectView, ActionsMixin, TableMixin):
             # Fall back to default table/YAML export
             else:
                 table = self.get_table(self.queryset, request, has_bulk_actions)
-                return self.export_table(table)
+                return self.export_table(table, stream=stream)
 
         # Render the objects table
         table = self.get_table(self.queryset, request, has_bulk_actions)
@@ -256,7 +358,7 @@ class BulkCreateView(GetReturnURLMixin, BaseMultiObjectView):
             logger.debug("Form validation was successful")
 
             try:
-                with transaction.atomic():
+                with transaction.atomic(), deferred_updates():
                     new_objs = self._create_objects(form, request)
 
                     # Enforce object-level permissions
@@ -298,10 +400,12 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
 
     Attributes:
         model_form: The form used to create each imported object
+        batch_size: The number of records validated and saved together
     """
     template_name = 'generic/bulk_import.html'
     model_form = None
     related_object_forms = dict()
+    batch_size = 500
 
     def get_required_permission(self):
         return get_permission_for_model(self.queryset.model, 'add')
@@ -329,15 +433,11 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
 
         return {**required_fields, **optional_fields}
 
-    def _save_object(self, import_form, model_form, request):
+    def _save_object(self, model_form, request):
 
         # Save the primary object
         obj = self.save_object(model_form, request)
 
-        # Enforce object-level permissions
-        if not self.queryset.filter(pk=obj.pk).first():
-            raise PermissionsViolation()
-
         # Iterate through the related object forms (if any), validating and saving each instance.
         for field_name, related_object_form in self.related_object_forms.items():
 
@@ -354,15 +454,15 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
                     related_obj = f.save()
                     related_obj_pks.append(related_obj.pk)
                 else:
-                    # Replicate errors on the related object form to the import form for display and abort
-                    for subfield_name, errors in f.errors.items():
-                        for err in errors:
+                    # Replicate errors on the related object form for display and abort
+                    errors = []
+                    for subfield_name, subfield_errors in f.errors.items():
+                        for err in subfield_errors:
                             if subfield_name == '__all__':
-                                err_msg = f"{field_name}[{i}]: {err}"
+                                errors.append(f"{field_name}[{i}]: {err}")
                             else:
-                                err_msg = f"{field_name}[{i}] {subfield_name}: {err}"
-                            import_form.add_error(None, err_msg)
-                    raise AbortTransaction()
+                                errors.append(f"{field_name}[{i}] {subfield_name}: {err}")
+                    raise ValidationError(errors)
 
             # Enforce object-level permissions on related objects
             model = related_object_form.Meta.model
@@ -371,6 +471,38 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
 
         return obj
 
+    def _bulk_save_objects(self, model_forms):
+        """
+        Save the instances of the given (validated) model forms using bulk_create() and bulk_update(), and replicate the
+        effects of saving each instance individually (see handle_bulk_save()).
+        """
+        model = self.queryset.model
+        is_new = [model_form.instance._state.adding for model_form in model_forms]
+        created = [model_form.instance for model_form, new in zip(model_forms, is_new) if new]
+        updated = [model_form.instance for model_form, new in zip(model_forms, is_new) if not new]
+
+        # Update all concrete fields (other than counters) of existing objects, as save() would
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not field.primary_key and type(field) is not CounterCacheField
+        ]
+        for obj in updated:
+            for field in fields:
+                setattr(obj, field.attname, field.pre_save(obj, False))
+
+        with transaction.atomic():
+            model.objects.bulk_create(created, batch_size=self.batch_size)
+            model.objects.bulk_update(updated, [field.name for field in fields], batch_size=self.batch_size)
+        handle_bulk_save(model, created, created=True, batch_size=self.batch_size)
+        handle_bulk_save(model, updated, created=False, batch_size=self.batch_size)
+
+        # Save many-to-many assignments (new objects have none to be cleared)
+        for model_form, new in zip(model_forms, is_new):
+            if not new or any(model_form.cleaned_data.get(field.name) for field in model._meta.many_to_many):
+                model_form._save_m2m()
+
+        return [model_form.instance for model_form in model_forms]
+
     def save_object(self, object_form, request):
         """
         Provide a hook to modify the object immediately before saving it (e.g. to encrypt secret data).
@@ -381,29 +513,118 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
         """
         return object_form.save()
 
-    def create_and_update_objects(self, form, request):
-        saved_objects = []
+    def resolve_related_objects(self, model_form, records, user):
+        """
+        Retrieve the objects referenced by the given records for each CSVModelChoiceField on the model form, with a
+        single query per field. Returns a dictionary mapping each field name to a three-tuple of the field's
+        (restricted) QuerySet, its to_field_name, and a dictionary mapping each referenced value to its object. Values
+        which match multiple objects are omitted, to be resolved (and reported) by the form field as usual.
 
-        records = list(form.cleaned_data['data'])
+        Args:
+            model_form: An unbound instance of the model form
+            records: A list of dictionaries, each representing an object to be created or updated
+            user: The user importing the records
+        """
+        resolved = {}
+
+        for name, field in model_form.fields.items():
+            if not isinstance(field, CSVModelChoiceField) or type(field).to_python is not CSVModelChoiceField.to_python:
+                continue
+            values = {str(record[name]) for record in records if record.get(name) not in field.empty_values}
+            if not values:
+                continue
+
+            queryset = field.queryset
+            if issubclass(queryset.__class__, RestrictedQuerySet):
+                queryset = queryset.restrict(user, 'view')
+            to_field_name = field.to_field_name or 'pk'
+
+            objects = {}
+            try:
+                with transaction.atomic():
+                    for obj in queryset.filter(**{f'{to_field_name}__in': values}):
+                        value = str(getattr(obj, to_field_name))
+                        objects[value] = None if value in objects else obj
+            except (DatabaseError, ValidationError, ValueError):
+                # Invalid values will be reported by the form field
+                continue
+
+            resolved[name] = (
+                queryset,
+                to_field_name,
+                {value: obj for value, obj in objects.items() if obj is not None}
+            )
+
+        return resolved
+
+    def _can_save_in_bulk(self, model_form, records, object_ids):
+        """
+        Return True if the given records can be saved together in bulk. This requires that the model supports saving
+        in bulk, that saving is not customized by the model form or view, and that no record references another object
+        of the same type (which may be created by a preceding record) or includes related objects.
+        """
+        model = self.queryset.model
+
+        if not supports_bulk_save(model):
+            return False
+        if type(model_form).save is not BaseModelForm.save or type(self).save_object is not BulkImportView.save_object:
+            return False
+
+        # Objects may be updated only once per batch
+        pks = [pk for pk in object_ids if pk]
+        if len(pks) != len(set(pks)):
+            return False
+
+        field_names = [
+            name for name, field in model_form.fields.items()
+            if getattr(field, 'queryset', None) is not None and field.queryset.model is model
+        ]
+        field_names.extend(self.related_object_forms)
+
+        return not any(record.get(name) for record in records for name in field_names)
+
+    def import_records(self, records, request, headers=None, offset=0, save_in_bulk=True):
+        """
+        Validate and save a batch of records, returning the saved objects. Related objects referenced by the records
+        are retrieved in bulk (see resolve_related_objects()), and object-level permissions are enforced for all saved
+        objects with a single query. Where possible, objects are saved together using bulk_create() and bulk_update();
+        otherwise, each is saved individually. Raises ValidationError if any record is invalid.
+
+        Args:
+            records: A list of dictionaries, each representing an object to be created or updated
+            request: The current request
+            headers: A dictionary mapping CSV headers to any customized to_field_name values (CSV data only)
+            offset: The number of records preceding this batch, for use in error messages
+            save_in_bulk: If False, always save objects individually
+        """
+        model = self.queryset.model
+        data = [dict(record) for record in records]
+        object_ids = [int(record.pop('id')) if record.get('id') else None for record in data]
 
         # Prefetch objects to be updated, if any
-        prefetch_ids = [int(record['id']) for record in records if record.get('id')]
+        prefetch_ids = [object_id for object_id in object_ids if object_id]
         prefetched_objects = {
             obj.pk: obj
-            for obj in self.queryset.model.objects.filter(id__in=prefetch_ids)
+            for obj in model.objects.filter(id__in=prefetch_ids)
         } if prefetch_ids else {}
 
-        for i, record in enumerate(records, start=1):
+        unbound_form = self.model_form(headers=headers) if headers is not None else self.model_form()
+        resolved = self.resolve_related_objects(unbound_form, data, request.user)
+        save_in_bulk = save_in_bulk and self._can_save_in_bulk(unbound_form, data, object_ids)
+
+        model_forms = []
+        saved_objects = []
+        for i, (record, object_id) in enumerate(zip(data, object_ids), start=offset + 1):
             instance = None
-            object_id = int(record.pop('id')) if record.get('id') else None
 
             # Determine whether this object is being created or updated
             if object_id:
                 try:
                     instance = prefetched_objects[object_id]
                 except KeyError:
-                    form.add_error('data', _("Row {i}: Object with ID {id} does not exist").format(i=i, id=object_id))
-                    raise ValidationError('')
+                    raise ValidationError(
+                        _("Row {i}: Object with ID {id} does not exist").format(i=i, id=object_id)
+                    )
 
                 # Take a snapshot for change logging
                 if instance.pk and hasattr(instance, 'snapshot'):
@@ -414,8 +635,8 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
                 'data': record,
                 'instance': instance,
             }
-            if hasattr(form, '_csv_headers'):
-                model_form_kwargs['headers'] = form._csv_headers  # Add CSV headers
+            if headers is not None:
+                model_form_kwargs['headers'] = headers  # Add CSV headers
             model_form = self.model_form(**model_form_kwargs)
 
             # When updating, omit all form fields other than those specified in the record. (No
@@ -427,22 +648,84 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
 
             restrict_form_fields(model_form, request.user)
 
-            if model_form.is_valid():
-                obj = self._save_object(form, model_form, request)
-                saved_objects.append(obj)
-            else:
+            # Employ the related objects retrieved in bulk, unless the form has modified the field's queryset
+            for field_name, (queryset, to_field_name, objects) in resolved.items():
+                field = model_form.fields.get(field_name)
+                if (
+                    field is not None and
+                    (field.to_field_name or 'pk') == to_field_name and
+                    field.queryset.model is queryset.model and
+                    field.queryset.query.where == queryset.query.where
+                ):
+                    field.resolved_objects = objects
+
+            if not model_form.is_valid():
                 # Replicate model form errors for display
-                for field, errors in model_form.errors.items():
-                    for err in errors:
+                errors = []
+                for field, field_errors in model_form.errors.items():
+                    for err in field_errors:
                         if field == '__all__':
-                            form.add_error(None, f'Record {i}: {err}')
+                            errors.append(f'Record {i}: {err}')
                         else:
-                            form.add_error(None, f'Record {i} {field}: {err}')
+                            errors.append(f'Record {i} {field}: {err}')
+                raise ValidationError(errors)
+
+            if save_in_bulk:
+                model_forms.append(model_form)
+            else:
+                saved_objects.append(self._save_object(model_form, request))
+
+        if save_in_bulk:
+            try:
+                saved_objects = self._bulk_save_objects(model_forms)
+            except IntegrityError:
+                # Records may conflict with one another (e.g. by repeating a unique value). Save each individually
+                # to identify the offending record.
+                return self.import_records(records, request, headers=headers, offset=offset, save_in_bulk=False)
 
-                raise ValidationError("")
+        # Enforce object-level permissions
+        if self.queryset.filter(pk__in=[obj.pk for obj in saved_objects]).count() != len(saved_objects):
+            raise PermissionsViolation
 
         return saved_objects
 
+    def create_and_update_objects(self, form, request):
+        records = list(form.cleaned_data['data'])
+        headers = getattr(form, '_csv_headers', None)
+        saved_objects = []
+
+        try:
+            for i in range(0, len(records), self.batch_size):
+                saved_objects.extend(
+                    self.import_records(records[i:i + self.batch_size], request, headers=headers, offset=i)
+                )
+        except ValidationError as e:
+            form.add_error(None, e)
+            raise
+
+        return saved_objects
+
+    def import_background(self, request, form):
+        """
+        Enqueue a background job to import the submitted data, and redirect the user to the job.
+
+        Args:
+            request: The current request
+            form: The validated BulkImportForm
+        """
+        if not get_workers_for_queue(RQ_QUEUE_DEFAULT):
+            raise AbortRequest(_("Unable to import in the background: RQ worker process not running."))
+
+        job = enqueue_import(
+            request,
+            view=self.__class__,
+            records=list(form.cleaned_data['data']),
+            headers=getattr(form, '_csv_headers', None)
+        )
+        messages.info(request, _("Queued import job #{id}").format(id=job.pk))
+
+        return redirect(job.get_absolute_url())
+
     #
     # Request handlers
     #
@@ -467,14 +750,14 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
             logger.debug("Import form validation was successful")
 
             try:
+                # Import in the background
+                if form.cleaned_data['background']:
+                    return self.import_background(request, form)
+
                 # Iterate through data and bind each record to a new model form instance.
-                with transaction.atomic():
+                with transaction.atomic(), deferred_updates():
                     new_objs = self.create_and_update_objects(form, request)
 
-                    # Enforce object-level permissions
-                    if self.queryset.filter(pk__in=[obj.pk for obj in new_objs]).count() != len(new_objs):
-                        raise PermissionsViolation
-
                 if new_objs:
                     msg = f"Imported {len(new_objs)} {model._meta.verbose_name_plural}"
                     logger.info(msg)
@@ -634,7 +917,7 @@ class BulkEditView(GetReturnURLMixin, BaseMultiObjectView):
 
                 try:
 
-                    with transaction.atomic():
+                    with transaction.atomic(), deferred_updates():
                         updated_objects = self._update_objects(form, request)
 
                         # Enforce object-level permissions
@@ -821,7 +1104,7 @@ class BulkDeleteView(GetReturnURLMixin, BaseMultiObjectView):
                 queryset = self.queryset.filter(pk__in=pk_list)
                 deleted_count = queryset.count()
                 try:
-                    with transaction.atomic():
+                    with transaction.atomic(), deferred_updates():
                         for obj in queryset:
                             # Take a snapshot of change-logged models
                             if hasattr(obj, 'snapshot'):
@@ -917,7 +1200,7 @@ class BulkComponentCreateView(GetReturnURLMixin, BaseMultiObjectView):
                 }
 
                 try:
-                    with transaction.atomic():
+                    with transaction.atomic(), deferred_updates():
 
                         for obj in data['pk']:
 
@@ -1,11 +1,13 @@
 import logging
 
 from django.contrib.auth.signals import user_login_failed
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
+from netbox.api.authentication import invalidate_cached_tokens
 from netbox.config import get_config
-from users.models import User, UserConfig
+from users.models import Group, ObjectPermission, Token, User, UserConfig
+from utilities.permissions import invalidate_permissions
 from utilities.request import get_client_ip
 
 
@@ -31,3 +33,38 @@ def create_userconfig(instance, created, raw=False, **kwargs):
     if created and not raw:
         config = get_config()
         UserConfig(user=instance, data=config.DEFAULT_USER_PREFERENCES).save()
+
+
+@receiver(post_save, sender=ObjectPermission)
+@receiver(post_delete, sender=ObjectPermission)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(m2m_changed, sender=ObjectPermission.object_types.through)
+@receiver(m2m_changed, sender=User.object_permissions.through)
+@receiver(m2m_changed, sender=Group.object_permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_cached_permissions(sender, **kwargs):
+    """
+    Invalidate all cached permissions whenever an ObjectPermission or Group, or the assignment of either, is modified.
+    """
+    if kwargs.get('raw') or kwargs.get('action', '').startswith('pre_'):
+        return
+    invalidate_permissions()
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(instance, **kwargs):
+    """
+    Discard the cached copy of a Token whenever it is modified or deleted.
+    """
+    invalidate_cached_tokens(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_tokens(instance, created, raw=False, **kwargs):
+    """
+    Discard the cached copies of all of a User's Tokens whenever the User is modified (e.g. deactivated).
+    """
+    if not created and not raw:
+        invalidate_cached_tokens(*instance.tokens.values_list('key', flat=True))
@@ -1,11 +1,17 @@
+from collections import namedtuple
+from functools import lru_cache
+
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.core.exceptions import (
     FieldDoesNotExist, FieldError, MultipleObjectsReturned, ObjectDoesNotExist, ValidationError,
 )
+from django.db.models import Prefetch
+from django.db.models.constants import LOOKUP_SEP
 from django.db.models.fields.related import ManyToOneRel, RelatedField
 from django.urls import reverse
 from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
+from rest_framework.relations import HyperlinkedIdentityField
 from rest_framework.serializers import Serializer
 from rest_framework.views import get_view_name as drf_get_view_name
 
@@ -16,15 +22,23 @@ from .query import count_related, dict_to_filter_params
 from .string import title
 
 __all__ = (
+    'SerializerPlan',
     'get_annotations_for_serializer',
     'get_graphql_type_for_model',
     'get_prefetches_for_serializer',
+    'get_queryset_relation_fields',
     'get_related_object_by_attrs',
     'get_serializer_for_model',
+    'get_serializer_plan',
     'get_view_name',
     'is_api_request',
 )
 
+# The maximum number of serializer plans to cache (one per serializer class and set of requested fields)
+SERIALIZER_PLAN_CACHE_SIZE = 1024
+
+SerializerPlan = namedtuple('SerializerPlan', ('select_related', 'prefetch_related', 'annotations', 'only'))
+
 
 def get_serializer_for_model(model, prefix=''):
     """
@@ -135,6 +149,122 @@ def get_annotations_for_serializer(serializer_class, fields_to_include=None):
     return annotations
 
 
+def get_serializer_plan(serializer_class, fields_to_include=None):
+    """
+    Return a SerializerPlan describing how to retrieve the objects represented by a serializer:
+
+      * select_related: Forward many-to-one and one-to-one relations to be retrieved with select_related()
+      * prefetch_related: All other relations, to be retrieved with prefetch_related()
+      * annotations: A mapping of field names to annotations for RelatedObjectCountFields
+      * only: The names of the model fields to be retrieved with only(), or None if the model fields represented by
+        any of the included serializer fields cannot be determined (e.g. because a field is computed)
+
+    Plans are cached per serializer class and set of included fields.
+    """
+    if fields_to_include:
+        fields_to_include = tuple(sorted(set(fields_to_include)))
+    plan = _get_serializer_plan(serializer_class, fields_to_include or None)
+
+    # Copy the annotations to protect the cached plan from modification
+    return plan._replace(annotations=dict(plan.annotations))
+
+
+@lru_cache(maxsize=SERIALIZER_PLAN_CACHE_SIZE)
+def _get_serializer_plan(serializer_class, fields_to_include):
+    model = serializer_class.Meta.model
+    annotations = get_annotations_for_serializer(serializer_class, fields_to_include)
+
+    # If fields are not specified, default to all
+    if not fields_to_include:
+        fields_to_include = serializer_class.Meta.fields
+
+    select_related = []
+    prefetch_related = []
+    only = {model._meta.pk.name}
+    for field_name in fields_to_include:
+        serializer_field = serializer_class._declared_fields.get(field_name)
+
+        # Annotated fields and hyperlinks to the object itself require no additional model fields
+        if field_name in annotations:
+            continue
+        if isinstance(serializer_field, HyperlinkedIdentityField) and serializer_field.lookup_field == 'pk':
+            continue
+
+        # Determine the name of the model field referenced by the serializer field
+        model_field_name = field_name
+        if serializer_field and serializer_field.source:
+            model_field_name = serializer_field.source
+
+        # If the serializer field does not map to a discrete model field, the model fields it requires are unknown
+        try:
+            field = model._meta.get_field(model_field_name)
+        except FieldDoesNotExist:
+            only = None
+            continue
+
+        if isinstance(field, GenericForeignKey):
+            prefetch_related.append(field.name)
+            if only is not None:
+                only.update((field.ct_field, field.fk_field))
+        elif isinstance(field, RelatedField) and (field.many_to_one or field.one_to_one):
+            select_related.append(field.name)
+            if only is not None:
+                only.add(field.name)
+        elif isinstance(field, (RelatedField, ManyToOneRel)):
+            prefetch_related.append(field.name)
+        elif only is not None:
+            only.add(field.name)
+
+        # If this field is represented by a nested serializer, recurse to resolve the related objects to retrieve
+        # for the nested object
+        if serializer_field and issubclass(type(serializer_field), Serializer):
+            subfields = serializer_field.Meta.brief_fields if serializer_field.nested else None
+            nested_plan = get_serializer_plan(type(serializer_field), subfields)
+            if select_related and select_related[-1] == field.name:
+                select_related.extend(f'{field.name}{LOOKUP_SEP}{name}' for name in nested_plan.select_related)
+                prefetch_related.extend(f'{field.name}{LOOKUP_SEP}{name}' for name in nested_plan.prefetch_related)
+            else:
+                prefetch_related.extend(
+                    f'{field.name}{LOOKUP_SEP}{name}'
+                    for name in (*nested_plan.select_related, *nested_plan.prefetch_related)
+                )
+
+    return SerializerPlan(
+        select_related=tuple(select_related),
+        prefetch_related=tuple(prefetch_related),
+        annotations=annotations,
+        only=tuple(sorted(only)) if only is not None else None
+    )
+
+
+def get_queryset_relation_fields(queryset):
+    """
+    Return the names of the model fields required to retrieve the related objects which a queryset is already
+    configured to retrieve using select_related() or prefetch_related(). These must be retrieved alongside any fields
+    specified with only().
+    """
+    model = queryset.model
+    lookups = [
+        lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+        for lookup in queryset._prefetch_related_lookups
+    ]
+    if isinstance(queryset.query.select_related, dict):
+        lookups.extend(queryset.query.select_related)
+
+    field_names = set()
+    for lookup in lookups:
+        try:
+            field = model._meta.get_field(lookup.split(LOOKUP_SEP)[0])
+        except FieldDoesNotExist:
+            continue
+        if isinstance(field, GenericForeignKey):
+            field_names.update((field.ct_field, field.fk_field))
+        elif field.concrete and not field.many_to_many:
+            field_names.add(field.name)
+
+    return field_names
+
+
 def get_related_object_by_attrs(queryset, attrs):
     """
     Return an object identified by either a dictionary of attributes or its numeric primary key (ID). This is used
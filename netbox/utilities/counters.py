@@ -1,7 +1,11 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
 from django.apps import apps
-from django.db.models import F, Count, OuterRef, Subquery
+from django.db.models import F, Count, OuterRef, Q, Subquery
 from django.db.models.signals import post_delete, post_save, pre_delete
 
+from netbox.context import counters_queue
 from netbox.registry import registry
 from .fields import CounterCacheField
 
@@ -13,16 +17,75 @@ def get_counters_for_model(model):
     return registry['counter_fields'][model].items()
 
 
+def get_counted_models():
+    """
+    Return a mapping of counter fields to related query names for each model which has one or more counter fields.
+    """
+    models = defaultdict(dict)
+
+    for model, field_mappings in registry['counter_fields'].items():
+        for field_name, counter_name in field_mappings.items():
+            fk_field = model._meta.get_field(field_name)        # Interface.device
+            parent_model = fk_field.related_model               # Device
+            related_query_name = fk_field.related_query_name()  # 'interfaces'
+            models[parent_model][counter_name] = related_query_name
+
+    return models
+
+
 def update_counter(model, pk, counter_name, value):
     """
     Increment or decrement a counter field on an object identified by its model and primary key (PK). Positive values
-    will increment; negative values will decrement.
+    will increment; negative values will decrement. If counter updates are being deferred, the change is queued
+    instead.
     """
+    queue = counters_queue.get()
+    if queue is not None:
+        queue[(model, pk)][counter_name] += value
+        return
+
     model.objects.filter(pk=pk).update(
         **{counter_name: F(counter_name) + value}
     )
 
 
+def flush_counters(queue):
+    """
+    Apply all queued counter changes. The queue maps (model, PK) tuples to the net change for each counter. Objects
+    sharing identical changes are updated together, such that at most one UPDATE is issued per object.
+    """
+    changes = defaultdict(list)
+    for (model, pk), deltas in queue.items():
+        if deltas := tuple(sorted((name, value) for name, value in deltas.items() if value)):
+            changes[(model, deltas)].append(pk)
+
+    for (model, deltas), pks in changes.items():
+        model.objects.filter(pk__in=sorted(pks)).update(**{
+            counter_name: F(counter_name) + value for counter_name, value in deltas
+        })
+
+
+@contextmanager
+def deferred_counters():
+    """
+    Defer all counter updates made within the context, aggregating them in memory and applying the net changes in
+    bulk upon exit. This avoids repeatedly updating (and locking) the same parent object when creating or modifying
+    many related objects, and should be employed within a transaction. Queued changes are discarded if an exception
+    is raised. Nested contexts defer to the outermost context.
+    """
+    if counters_queue.get() is not None:
+        yield
+        return
+
+    queue = defaultdict(Counter)
+    token = counters_queue.set(queue)
+    try:
+        yield
+    finally:
+        counters_queue.reset(token)
+    flush_counters(queue)
+
+
 def update_counts(model, field_name, related_query):
     """
     Perform a bulk update for the given model and counter field. For example,
@@ -41,6 +104,29 @@ def update_counts(model, field_name, related_query):
     })
 
 
+def reconcile_counts(model, field_name, related_query):
+    """
+    Correct the given counter field on only those objects for which it has drifted from the actual count of related
+    objects. Returns the number of objects updated. For example,
+
+        reconcile_counts(Device, '_interface_count', 'interfaces')
+
+    will update only devices for which _interface_count does not match the number of assigned interfaces.
+    """
+    subquery = Subquery(
+        model.objects.filter(pk=OuterRef('pk')).annotate(_count=Count(related_query)).values('_count')
+    )
+    drifted = model.objects.annotate(
+        _actual_count=subquery
+    ).filter(
+        ~Q(**{field_name: F('_actual_count')})
+    ).values('pk')
+
+    return model.objects.filter(pk__in=drifted).update(**{
+        field_name: subquery
+    })
+
+
 #
 # Signal handlers
 #
@@ -102,6 +188,7 @@ def connect_counters(*models):
             # Register the counter in the registry
             change_tracking_fields = registry['counter_fields'][to_model]
             change_tracking_fields[f"{field.to_field_name}_id"] = field.name
+            registry['tracked_fields'][to_model].add(f"{field.to_field_name}_id")
 
             # Connect the post_save and post_delete handlers
             post_save.connect(
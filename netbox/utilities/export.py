@@ -0,0 +1,139 @@
+import csv
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.utils.encoding import force_str
+from django_tables2.rows import BoundRow
+
+__all__ = (
+    'ChunkedQuerySet',
+    'EXPORT_CHUNK_SIZE',
+    'get_export_key',
+    'iter_buffered',
+    'iter_csv',
+    'iter_table_values',
+    'iter_yaml',
+    'stream_export',
+)
+
+# The number of objects retrieved from the database at a time when streaming an export
+EXPORT_CHUNK_SIZE = 2000
+
+# The minimum size (in characters) of each chunk of content sent to the client when streaming an export
+EXPORT_BUFFER_SIZE = 65536
+
+
+class ChunkedQuerySet:
+    """
+    Wrap a QuerySet such that iterating over it retrieves objects from the database in chunks, without caching them.
+    All other attributes are passed through to the QuerySet. This enables export templates to iterate over very large
+    numbers of objects with constant memory usage.
+    """
+    def __init__(self, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return self.queryset.iterator(chunk_size=self.chunk_size)
+
+    def __len__(self):
+        return self.queryset.count()
+
+    def __bool__(self):
+        return self.queryset.exists()
+
+    def __getattr__(self, item):
+        return getattr(self.queryset, item)
+
+
+class _Echo:
+    """
+    A file-like object which returns the value written to it (for use with csv.writer).
+    """
+    def write(self, value):
+        return value
+
+
+def stream_export(queryset):
+    """
+    Return True if the export of the given QuerySet should be streamed to the client (i.e. if it contains more than
+    EXPORT_STREAMING_THRESHOLD objects).
+    """
+    threshold = settings.EXPORT_STREAMING_THRESHOLD
+    if threshold is None:
+        return False
+    return queryset.count() > threshold
+
+
+def get_export_key(user, queryset, *params):
+    """
+    Return a string uniquely identifying the export of a QuerySet by a user, for the identification of identical
+    exports. Any additional parameters which affect the output (e.g. the export format) must also be passed.
+    """
+    try:
+        sql, sql_params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        sql, sql_params = '', ()
+    key = repr((getattr(user, 'pk', None), queryset.model._meta.label_lower, sql, sql_params, params))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def iter_buffered(chunks, size=EXPORT_BUFFER_SIZE):
+    """
+    Combine an iterable of strings into chunks of at least the specified size (except for the last chunk).
+    """
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_csv(rows):
+    """
+    Yield each of the given rows (lists of values) as a line of CSV data.
+    """
+    writer = csv.writer(_Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_table_values(table, exclude_columns=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Replicate Table.as_values() for a table populated from a QuerySet, retrieving its records from the database in
+    chunks. The first row yielded contains the table headers.
+
+    Args:
+        table: The Table instance to export
+        exclude_columns: An iterable of column names to exclude
+        chunk_size: The number of records to retrieve from the database at a time
+    """
+    exclude_columns = exclude_columns or ()
+    columns = [
+        column for column in table.columns.iterall()
+        if not (column.column.exclude_from_export or column.name in exclude_columns)
+    ]
+
+    yield [force_str(column.header, strings_only=True) for column in columns]
+
+    for record in table.data.data.iterator(chunk_size=chunk_size):
+        row = BoundRow(record, table=table)
+        yield [force_str(row.get_cell_value(column.name), strings_only=True) for column in columns]
+
+
+def iter_yaml(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the YAML document for each object in the QuerySet, separated by document markers, retrieving objects from
+    the database in chunks.
+    """
+    for i, obj in enumerate(queryset.iterator(chunk_size=chunk_size)):
+        if i:
+            yield '---\n'
+        yield obj.to_yaml()
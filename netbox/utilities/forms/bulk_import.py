@@ -37,6 +37,11 @@ class BulkImportForm(SyncedDataMixin, forms.Form):
         help_text=_("The character which delimits CSV fields. Applies only to CSV format."),
         required=False
     )
+    background = forms.BooleanField(
+        label=_("Import in background"),
+        required=False,
+        help_text=_("Import the data using a background job, committing each batch of records as it is completed.")
+    )
 
     data_field = 'data'
 
@@ -52,12 +52,22 @@ class CSVTypedChoiceField(forms.TypedChoiceField):
 class CSVModelChoiceField(forms.ModelChoiceField):
     """
     Extends Django's `ModelChoiceField` to provide additional validation for CSV values.
+
+    Attributes:
+        resolved_objects: An optional dictionary mapping values to objects already retrieved from the field's
+            queryset (e.g. in bulk for many records being imported). Values not found are looked up as usual.
     """
     default_error_messages = {
         'invalid_choice': _('Object not found: %(value)s'),
     }
+    resolved_objects = None
 
     def to_python(self, value):
+        if self.resolved_objects is not None and value not in self.empty_values:
+            try:
+                return self.resolved_objects[str(value)]
+            except KeyError:
+                pass
         try:
             return super().to_python(value)
         except MultipleObjectsReturned:
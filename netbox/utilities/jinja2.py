@@ -1,12 +1,35 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
 from django.apps import apps
 from jinja2 import BaseLoader, TemplateNotFound
 from jinja2.meta import find_referenced_templates
 from jinja2.sandbox import SandboxedEnvironment
+from prometheus_client import Counter
 
 from netbox.config import get_config
 
 __all__ = (
     'DataFileLoader',
+    'get_jinja2_environment',
+    'get_jinja2_template',
+    'render_jinja2',
+)
+
+TEMPLATE_CACHE_SIZE = 1024
+
+# Shared sandboxed environments (keyed by environment parameters and filters) and an LRU cache of the templates
+# compiled within them (keyed by environment and a hash of the template source)
+_environments = {}
+_templates = OrderedDict()
+_templates_lock = threading.Lock()
+
+template_cache_total = Counter(
+    'netbox_jinja2_template_cache_total',
+    'Lookups of compiled Jinja2 templates, by result (hit or miss)',
+    ['result']
 )
 
 
@@ -44,10 +67,57 @@ class DataFileLoader(BaseLoader):
 # Utility functions
 #
 
-def render_jinja2(template_code, context):
+def _get_environment_key(environment_params=None):
+    filters = get_config().JINJA2_FILTERS
+    return (
+        json.dumps(environment_params or {}, sort_keys=True),
+        tuple(sorted(filters.items(), key=lambda item: item[0])),
+    )
+
+
+def get_jinja2_environment(environment_params=None):
+    """
+    Return a shared SandboxedEnvironment initialized with the given parameters (if any) and JINJA2_FILTERS.
+
+    :param environment_params: A dictionary of additional parameters to pass to the environment
+    """
+    key = _get_environment_key(environment_params)
+    with _templates_lock:
+        if key not in _environments:
+            environment = SandboxedEnvironment(**(environment_params or {}))
+            environment.filters.update(dict(key[1]))
+            _environments[key] = environment
+        return _environments[key]
+
+
+def get_jinja2_template(template_code, environment_params=None):
+    """
+    Return the compiled Template for the given source, retrieving it from the cache where possible.
+
+    :param template_code: The template source
+    :param environment_params: A dictionary of additional parameters to pass to the environment
+    """
+    environment = get_jinja2_environment(environment_params)
+    key = (id(environment), hashlib.sha256(template_code.encode()).digest())
+
+    with _templates_lock:
+        if key in _templates:
+            _templates.move_to_end(key)
+            template_cache_total.labels(result='hit').inc()
+            return _templates[key]
+
+    template_cache_total.labels(result='miss').inc()
+    template = environment.from_string(source=template_code)
+    with _templates_lock:
+        _templates[key] = template
+        if len(_templates) > TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+
+    return template
+
+
+def render_jinja2(template_code, context, environment_params=None):
     """
     Render a Jinja2 template with the provided context. Return the rendered content.
     """
-    environment = SandboxedEnvironment()
-    environment.filters.update(get_config().JINJA2_FILTERS)
-    return environment.from_string(source=template_code).render(**context)
+    return get_jinja2_template(template_code, environment_params).render(**context)
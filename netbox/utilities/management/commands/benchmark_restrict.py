@@ -0,0 +1,84 @@
+import time
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from utilities.querysets import RESTRICT_DIRECT, RESTRICT_EXISTS, RESTRICT_SUBQUERY, get_restrict_strategy
+
+STRATEGIES = (RESTRICT_DIRECT, RESTRICT_EXISTS, RESTRICT_SUBQUERY)
+
+
+class Command(BaseCommand):
+    help = "Compare the performance of the strategies available for restricting a model's objects to a user"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'username',
+            help="The user whose permissions are to be applied"
+        )
+        parser.add_argument(
+            'model',
+            help="The model to query, in the format <app_label>.<model> (e.g. dcim.interface)"
+        )
+        parser.add_argument(
+            '--action', default='view',
+            help="The permitted action to be evaluated (default: view)"
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=5,
+            help="The number of times each query is executed (default: 5)"
+        )
+        parser.add_argument(
+            '--limit', type=int, default=50,
+            help="The number of objects retrieved per query, as for a single page of results (default: 50)"
+        )
+        parser.add_argument(
+            '--explain', action='store_true',
+            help="Print the query plan for each strategy"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User not found: {options['username']}")
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError):
+            raise CommandError(f"Invalid model: {options['model']}")
+
+        queryset = model.objects.all()
+        if not hasattr(queryset, 'restrict'):
+            raise CommandError(f"{model._meta.label} does not support restriction")
+
+        # Determine the strategy which would be selected automatically
+        permission = f'{model._meta.app_label}.{options["action"]}_{model._meta.model_name}'
+        constraints = user.get_all_permissions().get(permission)
+        if constraints is None:
+            raise CommandError(f"{user} has not been granted the {permission} permission")
+        lookups = frozenset(lookup for constraint in constraints if constraint for lookup in constraint)
+        self.stdout.write(f"Default strategy for {permission}: {get_restrict_strategy(model, lookups)}")
+
+        for strategy in STRATEGIES:
+            qs = queryset.restrict(user, options['action'], strategy=strategy).order_by('pk')
+            if options['explain']:
+                self.stdout.write(qs[:options['limit']].explain(analyze=connection.vendor == 'postgresql'))
+
+            count_time = page_time = 0
+            for i in range(options['iterations']):
+                start = time.monotonic()
+                count = qs.count()
+                count_time += time.monotonic() - start
+                start = time.monotonic()
+                list(qs[:options['limit']])
+                page_time += time.monotonic() - start
+
+            self.stdout.write(
+                f"{strategy:>10}: {count} objects; "
+                f"count {count_time / options['iterations'] * 1000:.2f}ms, "
+                f"page {page_time / options['iterations'] * 1000:.2f}ms"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Finished.'))
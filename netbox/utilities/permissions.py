@@ -1,15 +1,31 @@
+import threading
+import uuid
+from collections import OrderedDict
+
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 
 __all__ = (
     'get_permission_for_model',
+    'get_permissions_version',
+    'get_user_permission_filter',
+    'invalidate_permissions',
     'permission_is_exempt',
     'qs_filter_from_constraints',
     'resolve_permission',
     'resolve_permission_type',
 )
 
+PERMISSIONS_VERSION_CACHE_KEY = 'object_permissions_version'
+PERMISSION_FILTER_CACHE_SIZE = 4096
+
+# A process-wide LRU cache of compiled permission filters (see get_user_permission_filter())
+_permission_filters = OrderedDict()
+_permission_filters_lock = threading.Lock()
+
 
 def get_permission_for_model(model, action):
     """
@@ -104,3 +120,57 @@ def qs_filter_from_constraints(constraints, tokens=None):
             return Q()
 
     return params
+
+
+def get_permissions_version():
+    """
+    Return the current global version of all assigned permissions. The version changes whenever an ObjectPermission,
+    or the assignment of an ObjectPermission or Group, is modified.
+    """
+    version = cache.get(PERMISSIONS_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(PERMISSIONS_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        version = cache.get(PERMISSIONS_VERSION_CACHE_KEY)
+    return version
+
+
+def invalidate_permissions():
+    """
+    Assign a new global permissions version, invalidating all cached permissions. The version is changed immediately,
+    and again once the current transaction (if any) has been committed, so that permissions cached by other
+    processes in the interim are also discarded.
+    """
+    def set_version():
+        cache.set(PERMISSIONS_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+    set_version()
+    transaction.on_commit(set_version)
+
+
+def get_user_permission_filter(user, permission, tokens=None):
+    """
+    Return the Q filter compiled from the user's constraints for the specified permission. Filters are cached per
+    process for users whose permissions were loaded from the shared permissions cache (identified by the
+    `_object_perm_cache_key` attribute).
+
+    :param user: User instance
+    :param permission: Permission name in the format <app_label>.<action>_<model>
+    :param tokens: A dictionary mapping string tokens to be replaced with a value
+    """
+    constraints = user._object_perm_cache[permission]
+    if (cache_key := getattr(user, '_object_perm_cache_key', None)) is None:
+        return qs_filter_from_constraints(constraints, tokens)
+
+    key = (cache_key, permission)
+    with _permission_filters_lock:
+        if key in _permission_filters:
+            _permission_filters.move_to_end(key)
+            return _permission_filters[key]
+
+    qs_filter = qs_filter_from_constraints(constraints, tokens)
+    with _permission_filters_lock:
+        _permission_filters[key] = qs_filter
+        if len(_permission_filters) > PERMISSION_FILTER_CACHE_SIZE:
+            _permission_filters.popitem(last=False)
+
+    return qs_filter
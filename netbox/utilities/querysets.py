@@ -1,13 +1,66 @@
-from django.db.models import Prefetch, QuerySet
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Exists, OuterRef, Prefetch, QuerySet
+from django.db.models.constants import LOOKUP_SEP
 
 from users.constants import CONSTRAINT_TOKEN_USER
-from utilities.permissions import get_permission_for_model, permission_is_exempt, qs_filter_from_constraints
+from utilities.permissions import get_permission_for_model, get_user_permission_filter, permission_is_exempt
 
 __all__ = (
+    'RESTRICT_DIRECT',
+    'RESTRICT_EXISTS',
+    'RESTRICT_SUBQUERY',
     'RestrictedPrefetch',
     'RestrictedQuerySet',
+    'get_restrict_strategy',
 )
 
+# Strategies for applying permission constraints to a QuerySet (see RestrictedQuerySet.restrict())
+RESTRICT_DIRECT = 'direct'
+RESTRICT_EXISTS = 'exists'
+RESTRICT_SUBQUERY = 'subquery'
+
+
+def lookup_is_multivalued(model, lookup):
+    """
+    Return True if the given lookup (e.g. "site__tenant__name") traverses a many-to-many or reverse foreign key
+    relation, such that filtering on it may return duplicate rows.
+    """
+    opts = model._meta
+    for part in lookup.split(LOOKUP_SEP):
+        if part == 'pk':
+            return False
+        try:
+            field = opts.get_field(part)
+        except FieldDoesNotExist:
+            # Any remaining parts are transforms or lookups
+            return False
+        if field.many_to_many or field.one_to_many:
+            return True
+        if not field.is_relation:
+            return False
+        if field.related_model is None:
+            # Generic foreign keys cannot be followed; assume the worst
+            return True
+        opts = field.related_model._meta
+    return False
+
+
+@lru_cache(maxsize=1024)
+def get_restrict_strategy(model, lookups):
+    """
+    Return the strategy with which constraints referencing the given lookups are applied to the model's QuerySet.
+    Constraints which traverse only single-valued relations are applied directly; those which traverse a multi-valued
+    relation are applied using an EXISTS subquery to avoid returning duplicate rows.
+
+    :param model: The model being restricted
+    :param lookups: A frozenset of the lookups referenced by the constraints
+    """
+    if any(lookup_is_multivalued(model, lookup) for lookup in lookups):
+        return RESTRICT_EXISTS
+    return RESTRICT_DIRECT
+
 
 class RestrictedPrefetch(Prefetch):
     """
@@ -37,13 +90,15 @@ class RestrictedPrefetch(Prefetch):
 
 class RestrictedQuerySet(QuerySet):
 
-    def restrict(self, user, action='view'):
+    def restrict(self, user, action='view', strategy=None):
         """
         Filter the QuerySet to return only objects on which the specified user has been granted the specified
         permission.
 
         :param user: User instance
         :param action: The action which must be permitted (e.g. "view" for "dcim.view_site"); default is 'view'
+        :param strategy: Override the strategy used to apply constraints (one of RESTRICT_DIRECT, RESTRICT_EXISTS,
+            or RESTRICT_SUBQUERY); by default, the strategy is chosen based on the lookups within the constraints
         """
         # Resolve the full name of the required permission
         permission_required = get_permission_for_model(self.model, action)
@@ -61,10 +116,24 @@ class RestrictedQuerySet(QuerySet):
             tokens = {
                 CONSTRAINT_TOKEN_USER: user,
             }
-            attrs = qs_filter_from_constraints(user._object_perm_cache[permission_required], tokens)
-            # #8715: Avoid duplicates when JOIN on many-to-many fields without using DISTINCT.
-            # DISTINCT acts globally on the entire request, which may not be desirable.
-            allowed_objects = self.model.objects.filter(attrs)
-            qs = self.filter(pk__in=allowed_objects)
+            attrs = get_user_permission_filter(user, permission_required, tokens)
+            if not attrs:
+                # Found null constraint; permit model-level access
+                return self
+
+            if strategy is None:
+                lookups = frozenset(
+                    lookup for constraint in user._object_perm_cache[permission_required] for lookup in constraint
+                )
+                strategy = get_restrict_strategy(self.model, lookups)
+
+            if strategy == RESTRICT_DIRECT:
+                qs = self.filter(attrs)
+            elif strategy == RESTRICT_EXISTS:
+                # #8715: Avoid duplicates when JOIN on many-to-many fields without using DISTINCT.
+                # DISTINCT acts globally on the entire request, which may not be desirable.
+                qs = self.filter(Exists(self.model.objects.filter(attrs, pk=OuterRef('pk'))))
+            else:
+                qs = self.filter(pk__in=self.model.objects.filter(attrs))
 
         return qs
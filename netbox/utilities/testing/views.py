@@ -496,6 +496,15 @@ class ViewTestCases:
             response = self.client.get(f'{url}?export=table')
             self.assertHttpStatus(response, 200)
             self.assertEqual(response.get('Content-Type'), 'text/csv; charset=utf-8')
+            headers = response.content.splitlines()[0]
+
+            # Test streaming table-based export
+            with override_settings(EXPORT_STREAMING_THRESHOLD=0):
+                response = self.client.get(f'{url}?export=table')
+            self.assertHttpStatus(response, 200)
+            self.assertTrue(response.streaming)
+            self.assertEqual(response.get('Content-Type'), 'text/csv; charset=utf-8')
+            self.assertEqual(b''.join(response.streaming_content).splitlines()[0], headers)
 
     class CreateMultipleObjectsViewTestCase(ModelViewTestCase):
         """
@@ -3,11 +3,13 @@ from django.urls import reverse
 from rest_framework import status
 
 from core.models import ObjectType
+from dcim.api.serializers import SiteSerializer
 from dcim.models import Region, Site
 from extras.choices import CustomFieldTypeChoices
 from extras.models import CustomField
 from ipam.models import VLAN
 from netbox.config import get_config
+from utilities.api import get_serializer_plan
 from utilities.testing import APITestCase, disable_warnings
 
 
@@ -232,6 +234,46 @@ class APIOrderingTestCase(APITestCase):
         )
 
 
+class SerializerPlanTestCase(APITestCase):
+    user_permissions = ('dcim.view_site',)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse('dcim-api:site-list')
+
+        region = Region.objects.create(name='Region 1', slug='region-1')
+        Site.objects.create(name='Site 1', slug='site-1', region=region, description='Description 1')
+
+    def test_plan(self):
+        plan = get_serializer_plan(SiteSerializer, ['id', 'name', 'region'])
+
+        self.assertEqual(plan.select_related, ('region',))
+        self.assertEqual(plan.prefetch_related, ())
+        self.assertEqual(plan.only, ('id', 'name', 'region'))
+
+    def test_plan_cached(self):
+        plan1 = get_serializer_plan(SiteSerializer, ['id', 'name', 'region'])
+        plan2 = get_serializer_plan(SiteSerializer, ['region', 'name', 'id', 'name'])
+
+        self.assertEqual(plan1, plan2)
+        self.assertIs(plan1.only, plan2.only)
+
+    def test_plan_unknown_fields(self):
+        plan = get_serializer_plan(SiteSerializer, ['id', 'display'])
+
+        self.assertIsNone(plan.only)
+
+    def test_requested_fields(self):
+        response = self.client.get(f'{self.url}?fields=id,name,region', format='json', **self.header)
+
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        result = response.data['results'][0]
+        self.assertEqual(result['name'], 'Site 1')
+        self.assertEqual(result['region']['name'], 'Region 1')
+        self.assertNotIn('description', result)
+
+
 class APIDocsTestCase(TestCase):
 
     def setUp(self):
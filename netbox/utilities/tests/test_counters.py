@@ -2,6 +2,7 @@ from django.test import override_settings
 from django.urls import reverse
 
 from dcim.models import *
+from utilities.counters import deferred_counters, reconcile_counts
 from utilities.testing.base import TestCase
 from utilities.testing.utils import create_test_device
 
@@ -102,3 +103,50 @@ class CountersTest(TestCase):
         self.client.post(reverse("dcim:inventoryitem_bulk_delete"), data)
         device1.refresh_from_db()
         self.assertEqual(device1.inventory_item_count, 0)
+
+    def test_deferred_counters(self):
+        """
+        Counter updates made within a deferred_counters() context should be applied upon exit.
+        """
+        device1, device2 = Device.objects.all()
+
+        with deferred_counters():
+            interface = Interface.objects.create(device=device1, name='Interface 5')
+            Interface.objects.create(device=device1, name='Interface 6')
+            interface.device = device2
+            interface.save()
+            Interface.objects.get(name='Interface 3').delete()
+
+            device1.refresh_from_db()
+            self.assertEqual(device1.interface_count, 2)
+
+        device1.refresh_from_db()
+        device2.refresh_from_db()
+        self.assertEqual(device1.interface_count, 3)
+        self.assertEqual(device2.interface_count, 2)
+
+    def test_deferred_counters_exception(self):
+        """
+        Counter updates queued within a deferred_counters() context should be discarded if an exception is raised.
+        """
+        device1 = Device.objects.first()
+
+        with self.assertRaises(ValueError):
+            with deferred_counters():
+                Interface.objects.create(device=device1, name='Interface 5')
+                raise ValueError()
+
+        device1.refresh_from_db()
+        self.assertEqual(device1.interface_count, 2)
+
+    def test_reconcile_counts(self):
+        """
+        reconcile_counts() should correct only those counters which have drifted.
+        """
+        device1, device2 = Device.objects.all()
+        Device.objects.filter(pk=device1.pk).update(interface_count=5)
+
+        self.assertEqual(reconcile_counts(Device, 'interface_count', 'interfaces'), 1)
+        device1.refresh_from_db()
+        self.assertEqual(device1.interface_count, 2)
+        self.assertEqual(reconcile_counts(Device, 'interface_count', 'interfaces'), 0)
@@ -0,0 +1,20 @@
+from django.test import SimpleTestCase
+
+from dcim.models import Interface, Site
+from utilities.querysets import RESTRICT_DIRECT, RESTRICT_EXISTS, get_restrict_strategy
+
+
+class RestrictStrategyTestCase(SimpleTestCase):
+
+    def test_single_valued_lookups(self):
+        self.assertEqual(get_restrict_strategy(Site, frozenset()), RESTRICT_DIRECT)
+        self.assertEqual(get_restrict_strategy(Site, frozenset(['name', 'status__in'])), RESTRICT_DIRECT)
+        self.assertEqual(get_restrict_strategy(Site, frozenset(['tenant__group__slug'])), RESTRICT_DIRECT)
+        self.assertEqual(get_restrict_strategy(Interface, frozenset(['device__site__pk__in'])), RESTRICT_DIRECT)
+        self.assertEqual(get_restrict_strategy(Interface, frozenset(['custom_field_data__foo'])), RESTRICT_DIRECT)
+
+    def test_multi_valued_lookups(self):
+        self.assertEqual(get_restrict_strategy(Site, frozenset(['name', 'tags__slug'])), RESTRICT_EXISTS)
+        self.assertEqual(get_restrict_strategy(Site, frozenset(['devices__name'])), RESTRICT_EXISTS)
+        self.assertEqual(get_restrict_strategy(Site, frozenset(['asns__asn'])), RESTRICT_EXISTS)
+        self.assertEqual(get_restrict_strategy(Interface, frozenset(['device__site__tags__slug'])), RESTRICT_EXISTS)
@@ -2,6 +2,7 @@ from django.http import QueryDict
 from django.test import TestCase
 
 from utilities.data import deepmerge
+from utilities.jinja2 import get_jinja2_template, render_jinja2
 from utilities.query import dict_to_filter_params
 from utilities.querydict import normalize_querydict
 
@@ -130,3 +131,19 @@ class DeepMergeTest(TestCase):
             deepmerge(dict1, dict2),
             merged
         )
+
+
+class RenderJinja2Test(TestCase):
+    """
+    Validate the caching of compiled templates by render_jinja2().
+    """
+    def test_render_jinja2(self):
+        template_code = '{{ value|upper }}\n'
+        self.assertEqual(render_jinja2(template_code, {'value': 'a'}), 'A')
+        self.assertEqual(render_jinja2(template_code, {'value': 'b'}), 'B')
+
+        # Templates should be compiled only once per set of environment parameters
+        template = get_jinja2_template(template_code)
+        self.assertIs(get_jinja2_template(template_code), template)
+        self.assertIsNot(get_jinja2_template(template_code, {'keep_trailing_newline': True}), template)
+        self.assertEqual(render_jinja2(template_code, {'value': 'c'}, {'keep_trailing_newline': True}), 'C\n')
@@ -62,7 +62,7 @@ class TrackingModelMixin:
     def __setattr__(self, name, value):
         if hasattr(self, "_initialized"):
             # Record any changes to a tracked field
-            if name in registry['counter_fields'][self.__class__]:
+            if name in registry['tracked_fields'][self.__class__]:
                 if name not in self.tracker:
                     # The attribute has been created or changed
                     if name in self.__dict__:
@@ -66,7 +66,7 @@ class ClusterTypeType(OrganizationalObjectType):
 
 @strawberry_django.type(
     models.VirtualMachine,
-    fields='__all__',
+    exclude=('_config_context', '_config_context_hash'),
     filters=VirtualMachineFilter
 )
 class VirtualMachineType(ConfigContextMixin, ContactsMixin, NetBoxObjectType):
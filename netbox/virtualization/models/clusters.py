@@ -7,6 +7,7 @@ from django.utils.translation import gettext_lazy as _
 from dcim.models import Device
 from netbox.models import OrganizationalModel, PrimaryModel
 from netbox.models.features import ContactsMixin
+from utilities.tracking import TrackingModelMixin
 from virtualization.choices import *
 
 __all__ = (
@@ -49,7 +50,7 @@ class ClusterGroup(ContactsMixin, OrganizationalModel):
         return reverse('virtualization:clustergroup', args=[self.pk])
 
 
-class Cluster(ContactsMixin, PrimaryModel):
+class Cluster(ContactsMixin, TrackingModelMixin, PrimaryModel):
     """
     A cluster of VirtualMachines. Each Cluster may optionally be associated with one or more Devices.
     """
@@ -11,7 +11,7 @@ from django.utils.translation import gettext_lazy as _
 
 from dcim.models import BaseInterface
 from dcim.models.mixins import RenderConfigMixin
-from extras.models import ConfigContextModel
+from extras.models import MaterializedConfigContextModel
 from extras.querysets import ConfigContextModelQuerySet
 from netbox.config import get_config
 from netbox.models import NetBoxModel, PrimaryModel
@@ -29,7 +29,13 @@ __all__ = (
 )
 
 
-class VirtualMachine(ContactsMixin, ImageAttachmentsMixin, RenderConfigMixin, ConfigContextModel, PrimaryModel):
+class VirtualMachine(
+    ContactsMixin,
+    ImageAttachmentsMixin,
+    RenderConfigMixin,
+    MaterializedConfigContextModel,
+    PrimaryModel
+):
     """
     A virtual machine which runs inside a Cluster.
     """